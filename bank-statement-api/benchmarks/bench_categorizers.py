@@ -0,0 +1,35 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from statement_generator import MERCHANTS
+from support import SIZES
+
+from src.app.services.categorizers.keyword import KeywordTransactionCategorizer
+from src.app.services.categorizers.transaction_categorizer import CategorisationData
+
+
+def keyword_categorizer():
+    keywords = {merchant.lower(): i for i, merchant in enumerate(MERCHANTS)}
+    keywords.update({f"keyword{i}": 1000 + i for i in range(2000)})
+    return KeywordTransactionCategorizer(MagicMock(), keywords_map=keywords)
+
+
+@pytest.mark.benchmark(group="keyword_categorizer")
+@pytest.mark.parametrize("rows", SIZES)
+def bench_keyword_categorizer(benchmark, rows):
+    categorizer = keyword_categorizer()
+    transactions = [
+        CategorisationData(
+            transaction_id=i,
+            description=f"Compra {MERCHANTS[i % len(MERCHANTS)]} ref {i}",
+            normalized_description="",
+        )
+        for i in range(rows)
+    ]
+
+    results = benchmark(
+        lambda: asyncio.run(categorizer.categorize_transaction(transactions))
+    )
+
+    assert len(results) == rows
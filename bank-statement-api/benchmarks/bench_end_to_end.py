@@ -0,0 +1,85 @@
+import pytest
+from statement_generator import LAYOUTS, generate_statement
+from support import DB_SIZES, StubLLMClient, create_session
+
+from src.app.repositories.statement_repository import StatementRepository
+from src.app.repositories.statement_schema_repository import StatementSchemaRepository
+from src.app.repositories.transactions_repository import TransactionsRepository
+from src.app.schemas import UploadFileSpec
+from src.app.services.file_processing.column_normalizer import ColumnNormalizer
+from src.app.services.file_processing.file_type_detector import FileTypeDetector
+from src.app.services.file_processing.parsers.parser_factory import ParserFactory
+from src.app.services.file_processing.statement_analysis_service import (
+    StatementAnalysisService,
+)
+from src.app.services.file_processing.statement_statistics_calculator import (
+    StatementStatisticsCalculator,
+)
+from src.app.services.file_processing.statement_upload_service import (
+    StatementUploadService,
+)
+from src.app.services.file_processing.transactions_builder import TransactionsBuilder
+from src.app.services.file_processing.transactions_cleaner import TransactionsCleaner
+
+
+def create_services(llm_response: str):
+    db = create_session()
+    statement_repository = StatementRepository(db)
+    statement_schema_repository = StatementSchemaRepository(db)
+    analysis = StatementAnalysisService(
+        file_type_detector=FileTypeDetector(),
+        parser_factory=ParserFactory(),
+        column_normalizer=ColumnNormalizer(StubLLMClient(llm_response)),
+        transaction_cleaner=TransactionsCleaner(),
+        transactions_builder=TransactionsBuilder(),
+        statistics_calculator=StatementStatisticsCalculator(),
+        statement_repository=statement_repository,
+        statement_schema_repository=statement_schema_repository,
+    )
+    upload = StatementUploadService(
+        parser_factory=ParserFactory(),
+        transaction_cleaner=TransactionsCleaner(),
+        transactions_builder=TransactionsBuilder(),
+        statement_repository=statement_repository,
+        transactions_repository=TransactionsRepository(db),
+        statement_schema_repository=statement_schema_repository,
+    )
+    return analysis, upload
+
+
+@pytest.mark.benchmark(group="analyze")
+@pytest.mark.parametrize("rows", DB_SIZES)
+@pytest.mark.parametrize("layout", LAYOUTS)
+def bench_analyze_statement(benchmark, layout, rows):
+    statement = generate_statement(layout, rows)
+    analysis, _ = create_services(statement.llm_response())
+
+    response = benchmark.pedantic(
+        analysis.analyze_statement,
+        args=(statement.content, statement.file_name),
+        rounds=3,
+    )
+
+    assert response.total_transactions == rows
+
+
+@pytest.mark.benchmark(group="upload")
+@pytest.mark.parametrize("rows", DB_SIZES)
+@pytest.mark.parametrize("layout", LAYOUTS)
+def bench_upload_statement(benchmark, layout, rows):
+    statement = generate_statement(layout, rows)
+
+    def setup():
+        analysis, upload = create_services(statement.llm_response())
+        response = analysis.analyze_statement(statement.content, statement.file_name)
+        spec = UploadFileSpec(
+            statement_id=response.statement_id,
+            statement_schema=response.statement_schema,
+        )
+        return (upload, spec), {}
+
+    result = benchmark.pedantic(
+        lambda upload, spec: upload.upload_statement(spec), setup=setup, rounds=3
+    )
+
+    assert result.transactions_processed + result.skipped_duplicates == rows
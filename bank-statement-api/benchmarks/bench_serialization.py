@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+from typing import List
+
+import pytest
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from support import LIST_SIZES, create_session
+
+from src.app.common.fast_json import RowSerializer
+from src.app.models import Category, Source
+from src.app.repositories.transactions_repository import (
+    TransactionsFilter,
+    TransactionsRepository,
+)
+from src.app.schemas import Transaction as TransactionSchema
+from src.app.schemas import TransactionCreate
+
+
+def create_repository(rows: int) -> TransactionsRepository:
+    db = create_session()
+    db.add(Source(id=1, name="bank"))
+    db.add(Category(id=1, category_name="Food"))
+    db.add(Category(id=2, category_name="Groceries", parent_category_id=1))
+    db.commit()
+    repository = TransactionsRepository(db)
+    repository.create_many(
+        [
+            TransactionCreate(
+                date=date(2024, 1, 1) + timedelta(days=i % 365),
+                description=f"Transaction {i}",
+                normalized_description=f"transaction {i}",
+                amount=-(i % 500) - 0.99,
+                source_id=1,
+                category_id=1 if i % 3 else None,
+                sub_category_id=2 if i % 3 else None,
+                categorization_status="categorized" if i % 3 else "pending",
+            )
+            for i in range(rows)
+        ]
+    )
+    return repository
+
+
+def orm_and_pydantic(repository, rows):
+    """The previous path: ORM objects, response_model validation, json.dumps"""
+    adapter = TypeAdapter(List[TransactionSchema])
+    transactions = repository.get_all(TransactionsFilter(), limit=rows)
+    content = adapter.dump_python(
+        adapter.validate_python(transactions), mode="json", by_alias=True
+    )
+    return JSONResponse(content).body
+
+
+def rows_and_orjson(repository, rows):
+    transactions = repository.get_all_rows(TransactionsFilter(), limit=rows)
+    return RowSerializer(TransactionSchema).dumps(transactions)
+
+
+@pytest.mark.benchmark(group="list_transactions")
+@pytest.mark.parametrize("rows", LIST_SIZES)
+@pytest.mark.parametrize("serialize", [orm_and_pydantic, rows_and_orjson])
+def bench_list_transactions(benchmark, serialize, rows):
+    repository = create_repository(rows)
+
+    def run():
+        # A fresh identity map each round, as in a request
+        repository.db.expire_all()
+        return serialize(repository, rows)
+
+    body = benchmark.pedantic(run, rounds=5)
+
+    assert body == orm_and_pydantic(repository, rows)
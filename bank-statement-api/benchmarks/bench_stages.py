@@ -0,0 +1,122 @@
+import pytest
+from statement_generator import LAYOUTS, generate_statement
+from support import (
+    DB_SIZES,
+    EXCEL_SIZES,
+    SIZES,
+    create_session,
+    to_transaction_creates,
+)
+
+from src.app.repositories.transactions_repository import TransactionsRepository
+from src.app.services.file_processing.parsers.csv_parser import CSVParser
+from src.app.services.file_processing.parsers.excel_parser import ExcelParser
+from src.app.services.file_processing.statement_statistics_calculator import (
+    StatementStatisticsCalculator,
+)
+from src.app.services.file_processing.transactions_builder import TransactionsBuilder
+from src.app.services.file_processing.transactions_cleaner import TransactionsCleaner
+
+
+def parsed(layout, rows):
+    statement = generate_statement(layout, rows)
+    return statement, CSVParser().parse(statement.content)
+
+
+def built(layout, rows):
+    statement, df = parsed(layout, rows)
+    cleaned_df = TransactionsCleaner().clean(df, statement.conversion_model)
+    return TransactionsBuilder().build_transactions(cleaned_df)
+
+
+@pytest.mark.benchmark(group="parse_csv")
+@pytest.mark.parametrize("rows", SIZES)
+@pytest.mark.parametrize("layout", LAYOUTS)
+def bench_csv_parser(benchmark, layout, rows):
+    statement = generate_statement(layout, rows)
+
+    df = benchmark(CSVParser().parse, statement.content)
+
+    assert len(df) >= rows
+
+
+@pytest.mark.benchmark(group="parse_excel")
+@pytest.mark.parametrize("rows", EXCEL_SIZES)
+@pytest.mark.parametrize("layout", LAYOUTS)
+def bench_excel_parser(benchmark, layout, rows):
+    statement = generate_statement(layout, rows, file_format="xlsx")
+
+    df = benchmark.pedantic(ExcelParser().parse, args=(statement.content,), rounds=3)
+
+    assert len(df) >= rows
+
+
+@pytest.mark.benchmark(group="clean")
+@pytest.mark.parametrize("rows", SIZES)
+@pytest.mark.parametrize("layout", LAYOUTS)
+def bench_transactions_cleaner(benchmark, layout, rows):
+    statement, df = parsed(layout, rows)
+
+    cleaned_df = benchmark(TransactionsCleaner().clean, df, statement.conversion_model)
+
+    assert len(cleaned_df) == rows
+
+
+@pytest.mark.benchmark(group="build")
+@pytest.mark.parametrize("rows", SIZES)
+def bench_transactions_builder(benchmark, rows):
+    statement, df = parsed("revolut", rows)
+    cleaned_df = TransactionsCleaner().clean(df, statement.conversion_model)
+
+    # build_transactions converts the amount column in place, so each round
+    # gets its own copy
+    transactions = benchmark.pedantic(
+        TransactionsBuilder().build_transactions,
+        setup=lambda: ((cleaned_df.copy(),), {}),
+        rounds=5,
+    )
+
+    assert len(transactions) == rows
+
+
+@pytest.mark.benchmark(group="statistics")
+@pytest.mark.parametrize("rows", SIZES)
+def bench_statistics_calculator(benchmark, rows):
+    transactions = built("revolut", rows)
+
+    statistics = benchmark(
+        StatementStatisticsCalculator().calc_statistics, transactions
+    )
+
+    assert statistics.total_transactions == rows
+
+
+@pytest.mark.benchmark(group="find_duplicates")
+@pytest.mark.parametrize("rows", DB_SIZES)
+def bench_find_duplicates(benchmark, rows):
+    transactions = built("revolut", rows)
+    repository = TransactionsRepository(create_session())
+    creates = to_transaction_creates(transactions[: rows // 2])
+    repository.create_many(creates)
+
+    duplicates = benchmark.pedantic(
+        repository.find_duplicates, args=(transactions, 1), rounds=3
+    )
+
+    assert len(duplicates) >= rows // 2
+
+
+@pytest.mark.benchmark(group="create_many")
+@pytest.mark.parametrize("rows", DB_SIZES)
+def bench_create_many(benchmark, rows):
+    transactions = built("revolut", rows)
+    creates = to_transaction_creates(transactions)
+
+    def setup():
+        return (TransactionsRepository(create_session()),), {}
+
+    created = benchmark.pedantic(
+        lambda repository: repository.create_many(creates), setup=setup, rounds=3
+    )
+
+    assert len(created) == rows
@@ -0,0 +1,183 @@
+"""Synthetic bank statements in the layouts found in data/statements"""
+
+import io
+import json
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.app.services.file_processing.conversion_model import ConversionModel
+
+MERCHANTS = [
+    "Continente Lisboa",
+    "Pingo Doce",
+    "Uber Eats",
+    "Uber Trip",
+    "Galp Energia",
+    "Airbnb",
+    "Rest Bufalo Grill",
+    "Ericeira Surf & Skate",
+    "Transfer from Revolut user",
+    "Transfer to Revolut user",
+    "Top-Up by *4190",
+    "Netflix.com",
+    "Spotify",
+    "Via Verde",
+    "EDP Comercial",
+    "Farmacia Central",
+]
+
+LAYOUTS = ["revolut", "bt", "header_offset"]
+
+
+@dataclass
+class GeneratedStatement:
+    layout: str
+    file_name: str
+    content: bytes
+    conversion_model: ConversionModel
+    rows: int
+
+    def llm_response(self) -> str:
+        """What a well-behaved LLM would answer for ColumnNormalizer"""
+        return json.dumps(self.conversion_model.__dict__)
+
+
+def _random_columns(rows: int, seed: int):
+    rng = np.random.default_rng(seed)
+    start = date(2020, 1, 1)
+    dates = [
+        start + timedelta(days=int(d)) for d in np.sort(rng.integers(0, 1500, rows))
+    ]
+    merchants = np.array(MERCHANTS)[rng.integers(0, len(MERCHANTS), rows)]
+    references = rng.integers(1000, 99999, rows)
+    descriptions = [f"{m} {r}" for m, r in zip(merchants, references)]
+    amounts = np.round(rng.normal(-40, 120, rows), 2)
+    balances = np.round(1000 + np.cumsum(amounts), 2)
+    return dates, descriptions, amounts, balances
+
+
+def _revolut(rows: int, seed: int) -> tuple[pd.DataFrame, ConversionModel]:
+    dates, descriptions, amounts, balances = _random_columns(rows, seed)
+    timestamps = [f"{d.isoformat()} 12:{i % 60:02d}:00" for i, d in enumerate(dates)]
+    df = pd.DataFrame(
+        {
+            "Type": np.where(amounts < 0, "CARD_PAYMENT", "TOPUP"),
+            "Product": "Current",
+            "date": timestamps,
+            "Completed Date": timestamps,
+            "description": descriptions,
+            "amount": amounts,
+            "Fee": 0,
+            "Currency": "EUR",
+            "State": "COMPLETED",
+            "Balance": balances,
+        }
+    )
+    model = ConversionModel(
+        column_map={
+            "date": "date",
+            "description": "description",
+            "amount": "amount",
+            "debit_amount": "",
+            "credit_amount": "",
+            "currency": "Currency",
+            "balance": "Balance",
+        },
+        header_row=0,
+        start_row=1,
+    )
+    return df, model
+
+
+def _bt(rows: int, seed: int) -> tuple[pd.DataFrame, ConversionModel]:
+    dates, descriptions, amounts, balances = _random_columns(rows, seed)
+    deposits = np.where(amounts > 0, amounts, 0.0)
+    withdrawals = np.where(amounts < 0, -amounts, 0.0)
+    df = pd.DataFrame(
+        {
+            "Date": [d.strftime("%d-%b-%Y") for d in dates],
+            "Description": descriptions,
+            "Deposits": [f"{v:,.2f}" for v in deposits],
+            "Withdrawls": [f"{v:,.2f}" for v in withdrawals],
+            "Balance": [f"{v:,.2f}" for v in balances],
+        }
+    )
+    model = ConversionModel(
+        column_map={
+            "date": "Date",
+            "description": "Description",
+            "amount": "",
+            "debit_amount": "Withdrawls",
+            "credit_amount": "Deposits",
+            "currency": "",
+            "balance": "Balance",
+        },
+        header_row=0,
+        start_row=1,
+    )
+    return df, model
+
+
+def _header_offset(rows: int, seed: int) -> tuple[pd.DataFrame, ConversionModel]:
+    """Metadata rows above the table, like the ab7.xlsx export"""
+    dates, descriptions, amounts, balances = _random_columns(rows, seed)
+    metadata = [
+        ["HISTÓRICO DE CONTA NÚMERO 45621121287", "", "", "", ""],
+        ["Moeda:", "EUR", "", "", ""],
+        ["", "", "", "", ""],
+        ["Tipo:", "Todos", "", "", ""],
+        ["Data de:", dates[0].isoformat(), "", "", ""],
+        ["Data até:", dates[-1].isoformat(), "", "", ""],
+        ["", "", "", "", ""],
+        ["Data Lanc.", "Data Valor", "Descrição", "Valor", "Saldo"],
+    ]
+    iso_dates = [d.isoformat() for d in dates]
+    body = pd.DataFrame(
+        {0: iso_dates, 1: iso_dates, 2: descriptions, 3: amounts, 4: balances}
+    )
+    df = pd.concat([pd.DataFrame(metadata), body], ignore_index=True)
+    model = ConversionModel(
+        column_map={
+            "date": "Data Lanc.",
+            "description": "Descrição",
+            "amount": "Valor",
+            "debit_amount": "",
+            "credit_amount": "",
+            "currency": "",
+            "balance": "Saldo",
+        },
+        header_row=7,
+        start_row=8,
+    )
+    return df, model
+
+
+_BUILDERS = {"revolut": _revolut, "bt": _bt, "header_offset": _header_offset}
+
+
+def generate_statement(
+    layout: str, rows: int, file_format: str = "csv", seed: int = 0
+) -> GeneratedStatement:
+    df, conversion_model = _BUILDERS[layout](rows, seed)
+    # header_offset has no real header line; the first metadata row plays that part
+    write_header = layout != "header_offset"
+
+    if file_format == "csv":
+        content = df.to_csv(index=False, header=write_header).encode("utf-8")
+    elif file_format == "xlsx":
+        buffer = io.BytesIO()
+        df.to_excel(buffer, index=False, header=write_header, engine="openpyxl")
+        content = buffer.getvalue()
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+    return GeneratedStatement(
+        layout=layout,
+        file_name=f"{layout}_{rows}.{file_format}",
+        content=content,
+        conversion_model=conversion_model,
+        rows=rows,
+    )
@@ -0,0 +1,61 @@
+import os
+from typing import List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.app.ai.llm_client import LLMClient
+from src.app.db import Base
+from src.app.schemas import StatementTransaction, TransactionCreate
+from src.app.services.file_processing.statement_upload_service import (
+    StatementUploadService,
+)
+
+
+def sizes_from_env(name: str, default: str) -> List[int]:
+    return [int(size) for size in os.getenv(name, default).split(",") if size]
+
+
+# 1k by default; BENCH_SIZES=1000,100000,1000000 for the full matrix
+SIZES = sizes_from_env("BENCH_SIZES", "1000")
+# Excel and DB-bound stages get slow quickly, so they have their own limit
+EXCEL_SIZES = [
+    size for size in SIZES if size <= int(os.getenv("BENCH_EXCEL_MAX_ROWS", "100000"))
+]
+DB_SIZES = [
+    size for size in SIZES if size <= int(os.getenv("BENCH_DB_MAX_ROWS", "100000"))
+]
+# Page sizes for the list endpoint serialization benchmarks
+LIST_SIZES = sizes_from_env("BENCH_LIST_SIZES", "10000")
+
+
+def create_session():
+    engine = create_engine(
+        os.getenv("BENCH_DATABASE_URL", "sqlite://"),
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+class StubLLMClient(LLMClient):
+    """Answers every prompt with a fixed response, so benchmarks measure our code"""
+
+    def __init__(self, response: str):
+        self.response = response
+
+    def generate(self, prompt: str) -> str:
+        return self.response
+
+    async def generate_async(self, prompt: str) -> str:
+        return self.response
+
+
+def to_transaction_creates(
+    transactions: List[StatementTransaction], source_id: int = 1
+) -> List[TransactionCreate]:
+    service = StatementUploadService(None, None, None, None, None, None)
+    return service._create_transaction_models(transactions, source_id)
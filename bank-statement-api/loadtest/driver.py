@@ -0,0 +1,291 @@
+"""Concurrent load driver for the statements API.
+
+Each virtual user loops over a weighted mix of scenarios until the run ends:
+
+- analyze:    POST /transactions/analyze with a synthetic statement
+- upload:     analyze, then POST /transactions/upload with the returned schema
+- list:       GET /transactions with random date, category, source and search filters
+- categorize: POST /categorization/process-now
+
+Per endpoint latencies (p50/p95/p99) and throughput are printed at the end of
+each concurrency level, and optionally written as JSON.
+
+    python -m loadtest.driver --concurrency 1,4,16 --duration 60
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.statement_generator import LAYOUTS, MERCHANTS, generate_statement
+
+CATEGORIES_CSV = Path(__file__).resolve().parent.parent / "data" / "categories.csv"
+DEFAULT_MIX = "analyze=1,upload=2,list=6,categorize=1"
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[int, int] = field(default_factory=lambda: defaultdict(int))
+
+    def record(self, seconds: float, status: int):
+        self.latencies.append(seconds)
+        self.statuses[status] += 1
+        if status >= 400:
+            self.errors += 1
+
+    def to_dict(self, elapsed: float) -> Dict:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": self.errors / count if count else 0.0,
+            "throughput_rps": count / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+            "statuses": dict(self.statuses),
+        }
+
+
+class LoadTest:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        mix: Dict[str, float],
+        statements: list,
+        source_id: Optional[int],
+        category_ids: List[int],
+        seed: int = 0,
+    ):
+        self.client = client
+        self.mix = mix
+        self.statements = statements
+        self.source_id = source_id
+        self.category_ids = category_ids
+        self.rng = random.Random(seed)
+        self.stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+
+    async def request(self, name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response = None
+            status = 599
+        self.stats[name].record(time.perf_counter() - start, status)
+        return response if status < 400 else None
+
+    async def analyze(self) -> Optional[Dict]:
+        statement = self.rng.choice(self.statements)
+        response = await self.request(
+            "POST /transactions/analyze",
+            "POST",
+            "/transactions/analyze",
+            files={"file": (statement.file_name, statement.content)},
+        )
+        return response.json() if response is not None else None
+
+    async def upload(self):
+        analysis = await self.analyze()
+        if analysis is None:
+            return
+        schema = analysis["statementSchema"]
+        if self.source_id is not None:
+            schema["sourceId"] = self.source_id
+        await self.request(
+            "POST /transactions/upload",
+            "POST",
+            "/transactions/upload",
+            json={"statementId": analysis["statementId"], "statementSchema": schema},
+        )
+
+    async def list(self):
+        params = {"limit": self.rng.choice([20, 100, 500])}
+        if self.rng.random() < 0.5:
+            start = date(2020, 1, 1) + timedelta(days=self.rng.randint(0, 1400))
+            params["start_date"] = start.isoformat()
+            params["end_date"] = (start + timedelta(days=90)).isoformat()
+        if self.category_ids and self.rng.random() < 0.3:
+            params["category_id"] = self.rng.choice(self.category_ids)
+        if self.source_id is not None and self.rng.random() < 0.3:
+            params["source_id"] = self.source_id
+        if self.rng.random() < 0.3:
+            params["search"] = self.rng.choice(MERCHANTS).split()[0]
+        await self.request("GET /transactions", "GET", "/transactions", params=params)
+
+    async def categorize(self):
+        await self.request(
+            "POST /categorization/process-now", "POST", "/categorization/process-now"
+        )
+
+    async def user(self, deadline: float):
+        scenarios = list(self.mix)
+        weights = [self.mix[name] for name in scenarios]
+        while time.perf_counter() < deadline:
+            scenario = self.rng.choices(scenarios, weights)[0]
+            await getattr(self, scenario)()
+
+    async def run(self, concurrency: int, duration: float) -> Dict:
+        self.stats = defaultdict(EndpointStats)
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(self.user(deadline) for _ in range(concurrency)))
+        # In-flight requests finish after the deadline, so measure the real span
+        elapsed = time.perf_counter() - start
+
+        endpoints = {
+            name: stats.to_dict(elapsed) for name, stats in sorted(self.stats.items())
+        }
+        total = sum(stats["requests"] for stats in endpoints.values())
+        return {
+            "concurrency": concurrency,
+            "elapsed_seconds": elapsed,
+            "requests": total,
+            "throughput_rps": total / elapsed if elapsed else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+async def prepare(client: httpx.AsyncClient, source_name: str):
+    """Make sure there are categories to categorize into and a source to upload to"""
+    categories = (await client.get("/categories")).json()
+    if not categories:
+        with open(CATEGORIES_CSV, "rb") as f:
+            response = await client.post(
+                "/categories/import", files={"file": ("categories.csv", f.read())}
+            )
+        response.raise_for_status()
+        categories = (await client.get("/categories")).json()
+
+    sources = (await client.get("/sources")).json()
+    source = next((s for s in sources if s["name"] == source_name), None)
+    if source is None:
+        response = await client.post(
+            "/sources", json={"name": source_name, "description": "Load test"}
+        )
+        response.raise_for_status()
+        source = response.json()
+
+    category_ids = [c["id"] for c in categories if c.get("parentCategoryId") is None]
+    return source["id"], category_ids
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in ("analyze", "upload", "list", "categorize"):
+            raise ValueError(f"Unknown scenario: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def print_report(report: Dict):
+    print(
+        f"\nconcurrency={report['concurrency']} "
+        f"requests={report['requests']} "
+        f"elapsed={report['elapsed_seconds']:.1f}s "
+        f"throughput={report['throughput_rps']:.2f} req/s"
+    )
+    header = f"{'endpoint':36} {'reqs':>6} {'err%':>6} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, stats in report["endpoints"].items():
+        print(
+            f"{name:36} {stats['requests']:>6} {stats['error_rate'] * 100:>5.1f}% "
+            f"{stats['throughput_rps']:>8.2f} {stats['p50_ms']:>7.0f}ms "
+            f"{stats['p95_ms']:>7.0f}ms {stats['p99_ms']:>7.0f}ms {stats['max_ms']:>7.0f}ms"
+        )
+
+
+async def main_async(args):
+    mix = parse_mix(args.mix)
+    layouts = args.layouts.split(",") if args.layouts else LAYOUTS
+    # Distinct seeds give distinct transactions, so uploads are not all duplicates
+    statements = [
+        generate_statement(layouts[i % len(layouts)], args.rows, seed=args.seed + i)
+        for i in range(args.statements)
+    ]
+
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, timeout=timeout, limits=limits
+    ) as client:
+        source_id, category_ids = await prepare(client, args.source_name)
+        load_test = LoadTest(
+            client, mix, statements, source_id, category_ids, seed=args.seed
+        )
+
+        reports = []
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            report = await load_test.run(concurrency, args.duration)
+            print_report(report)
+            reports.append(report)
+
+        pipeline = await client.get("/metrics/pipeline")
+        server_spans = pipeline.json() if pipeline.status_code == 200 else None
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "settings": vars(args),
+                    "runs": reports,
+                    "server_spans": server_spans,
+                },
+                f,
+                indent=2,
+            )
+        print(f"\nReport written to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the statements API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument(
+        "--concurrency",
+        default="4",
+        help="Virtual users; a comma separated list runs one level after another",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=30, help="Seconds per concurrency level"
+    )
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,...")
+    parser.add_argument("--rows", type=int, default=200, help="Rows per statement")
+    parser.add_argument(
+        "--statements", type=int, default=20, help="Distinct statements to upload"
+    )
+    parser.add_argument("--layouts", default="", help=f"Subset of {LAYOUTS}")
+    parser.add_argument("--source-name", default="loadtest")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the full report as JSON")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
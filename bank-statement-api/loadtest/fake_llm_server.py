@@ -0,0 +1,253 @@
+"""Local stand-in for the Gemini and Groq APIs.
+
+Answers the column normalizer and categorization prompts with plausible JSON
+after a configurable delay, and fails a configurable share of requests, so a
+load test measures our code and our behaviour under LLM latency and errors
+without spending quota.
+
+    python -m loadtest.fake_llm_server --port 8090 --latency-ms 800 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+SEPARATOR = "-" * 57
+
+# Header keywords per conversion model field, English and Portuguese exports
+HEADER_KEYWORDS = {
+    "date": ["date", "data"],
+    "description": ["description", "descri", "details", "movimento"],
+    "amount": ["amount", "valor", "montante"],
+    "debit_amount": ["debit", "withdraw", "débito"],
+    "credit_amount": ["credit", "deposit", "crédito"],
+    "currency": ["currency", "moeda"],
+    "balance": ["balance", "saldo"],
+}
+
+
+@dataclass
+class FakeLLMSettings:
+    latency_ms: float = 500.0
+    jitter_ms: float = 100.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    seed: Optional[int] = None
+
+
+def _match_column(field: str, headers: List[str]) -> str:
+    keywords = HEADER_KEYWORDS[field]
+    # Exact names first, so "Valor" wins over "Data Valor"
+    for header in headers:
+        if header.lower() in keywords:
+            return header
+    for header in headers:
+        if any(keyword in header.lower() for keyword in keywords):
+            return header
+    return ""
+
+
+def column_map_response(prompt: str) -> Dict:
+    """Guess the conversion model from the excerpt at the end of the prompt"""
+    excerpt = prompt.rstrip().rsplit(SEPARATOR, 2)[-2]
+    rows = list(csv.reader(io.StringIO(excerpt.strip())))
+
+    for index, row in enumerate(rows):
+        headers = [cell.strip() for cell in row]
+        date = _match_column("date", headers)
+        description = _match_column("description", headers)
+        if not date or not description:
+            continue
+
+        amount = _match_column("amount", headers)
+        return {
+            "column_map": {
+                "date": date,
+                "description": description,
+                "amount": amount,
+                "debit_amount": (
+                    "" if amount else _match_column("debit_amount", headers)
+                ),
+                "credit_amount": (
+                    "" if amount else _match_column("credit_amount", headers)
+                ),
+                "currency": _match_column("currency", headers),
+                "balance": _match_column("balance", headers),
+            },
+            "header_row": index,
+            "start_row": index + 1,
+        }
+
+    return {
+        "column_map": {field: "" for field in HEADER_KEYWORDS},
+        "header_row": 0,
+        "start_row": 1,
+    }
+
+
+def categorization_response(prompt: str, rng: random.Random) -> List[Dict]:
+    """Assign every transaction in the prompt to one of the offered subcategories"""
+    transactions_block = prompt.split("Transactions:", 1)[1].split(
+        "Available Categories:", 1
+    )
+    descriptions = [line for line in transactions_block[0].splitlines() if line.strip()]
+    sub_category_ids = [
+        int(match) for match in re.findall(r"\{id: (\d+),", transactions_block[1])
+    ] or [1]
+
+    return [
+        {
+            "transaction_description": description,
+            "sub_category_id": rng.choice(sub_category_ids),
+            "confidence": round(rng.uniform(0.6, 0.99), 2),
+        }
+        for description in descriptions
+    ]
+
+
+def answer(prompt: str, rng: random.Random) -> str:
+    if "Available Categories:" in prompt:
+        return json.dumps(categorization_response(prompt, rng))
+    if '"column_map"' in prompt:
+        return json.dumps(column_map_response(prompt))
+    return "{}"
+
+
+def _token_count(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def create_app(settings: Optional[FakeLLMSettings] = None) -> FastAPI:
+    settings = settings or FakeLLMSettings()
+    rng = random.Random(settings.seed)
+    app = FastAPI(title="Fake LLM")
+    app.state.settings = settings
+    app.state.requests = 0
+
+    async def simulate() -> Optional[JSONResponse]:
+        app.state.requests += 1
+        delay = max(0.0, rng.gauss(settings.latency_ms, settings.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        if rng.random() < settings.error_rate:
+            return JSONResponse(
+                status_code=settings.error_status,
+                content={
+                    "error": {
+                        "code": settings.error_status,
+                        "message": "Injected failure",
+                        "status": "UNAVAILABLE",
+                    }
+                },
+            )
+        return None
+
+    # Gemini REST: POST /v1beta/models/gemini-2.0-flash:generateContent
+    @app.post("/{version}/models/{model}:generateContent")
+    async def gemini_generate_content(version: str, model: str, request: Request):
+        body = await request.json()
+        prompt = "\n".join(
+            part.get("text", "")
+            for content in body.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        error = await simulate()
+        if error is not None:
+            return error
+
+        text = answer(prompt, rng)
+        return {
+            "candidates": [
+                {
+                    "content": {"parts": [{"text": text}], "role": "model"},
+                    "finishReason": "STOP",
+                    "index": 0,
+                }
+            ],
+            "usageMetadata": {
+                "promptTokenCount": _token_count(prompt),
+                "candidatesTokenCount": _token_count(text),
+                "totalTokenCount": _token_count(prompt) + _token_count(text),
+            },
+            "modelVersion": model,
+        }
+
+    # Groq (OpenAI compatible): POST /openai/v1/chat/completions
+    @app.post("/openai/v1/chat/completions")
+    async def groq_chat_completions(request: Request):
+        body = await request.json()
+        prompt = "\n".join(
+            message.get("content", "") for message in body.get("messages", [])
+        )
+        error = await simulate()
+        if error is not None:
+            return error
+
+        text = answer(prompt, rng)
+        return {
+            "id": f"chatcmpl-{app.state.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": _token_count(prompt),
+                "completion_tokens": _token_count(text),
+                "total_tokens": _token_count(prompt) + _token_count(text),
+            },
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": app.state.requests, "settings": settings.__dict__}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Gemini/Groq server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--error-status",
+        type=int,
+        default=503,
+        help="HTTP status for injected failures, e.g. 429 to mimic rate limits",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    settings = FakeLLMSettings(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    uvicorn.run(
+        create_app(settings), host=args.host, port=args.port, log_level="warning"
+    )
+
+
+if __name__ == "__main__":
+    main()
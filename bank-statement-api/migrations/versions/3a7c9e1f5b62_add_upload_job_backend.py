@@ -0,0 +1,30 @@
+"""Add upload_jobs.backend
+
+Revision ID: 3a7c9e1f5b62
+Revises: 8f3b6d2a4c17
+Create Date: 2026-10-19 22:48:02.731945
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3a7c9e1f5b62"
+down_revision = "8f3b6d2a4c17"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Which jobs ran before is unknown; thread is the default backend
+    op.add_column(
+        "upload_jobs",
+        sa.Column(
+            "backend", sa.String(length=16), server_default="thread", nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("upload_jobs", "backend")
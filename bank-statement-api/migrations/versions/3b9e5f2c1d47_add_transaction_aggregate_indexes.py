@@ -0,0 +1,35 @@
+"""Add composite indexes for transaction aggregates
+
+Revision ID: 3b9e5f2c1d47
+Revises: ec6da67186a0
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3b9e5f2c1d47"
+down_revision = "ec6da67186a0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_transactions_source_id_date",
+        "transactions",
+        ["source_id", "date"],
+        postgresql_include=["category_id", "sub_category_id", "amount"],
+    )
+    op.create_index(
+        "ix_transactions_category_id_date",
+        "transactions",
+        ["category_id", "date"],
+        postgresql_include=["sub_category_id", "source_id", "amount"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_category_id_date", table_name="transactions")
+    op.drop_index("ix_transactions_source_id_date", table_name="transactions")
@@ -0,0 +1,31 @@
+"""Store statement analysis and import results
+
+Revision ID: 4f2b7d9a1c36
+Revises: c5e1a8f3b902
+Create Date: 2026-10-19 14:02:17.318904
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4f2b7d9a1c36"
+down_revision = "c5e1a8f3b902"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("statements", sa.Column("analysis", sa.JSON(), nullable=True))
+    op.add_column("statements", sa.Column("import_result", sa.JSON(), nullable=True))
+    # Replaying an import loads its transactions by statement
+    op.create_index(
+        "ix_transactions_statement_id", "transactions", ["statement_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_statement_id", table_name="transactions")
+    op.drop_column("statements", "import_result")
+    op.drop_column("statements", "analysis")
@@ -0,0 +1,58 @@
+"""Make the monthly rollup key unique
+
+Revision ID: 5c2e8a9f1b34
+Revises: 1d8f5b3a7e90
+Create Date: 2026-10-19 20:41:53.208117
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5c2e8a9f1b34"
+down_revision = "1d8f5b3a7e90"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index(
+        "ix_transaction_monthly_rollups_key", table_name="transaction_monthly_rollups"
+    )
+    # Recomputing the rollups merges keys that have more than one row
+    op.execute("DELETE FROM transaction_monthly_rollups")
+    op.execute("""
+        INSERT INTO transaction_monthly_rollups
+            (month, source_id, category_id, sub_category_id, currency,
+             count, total, inflow, outflow)
+        SELECT date_trunc('month', date)::date, source_id, category_id,
+               sub_category_id, currency, count(id), coalesce(sum(amount), 0),
+               coalesce(sum(CASE WHEN amount > 0 THEN amount ELSE 0 END), 0),
+               coalesce(sum(CASE WHEN amount < 0 THEN -amount ELSE 0 END), 0)
+        FROM transactions
+        GROUP BY 1, 2, 3, 4, 5
+        """)
+    op.create_index(
+        "ix_transaction_monthly_rollups_key",
+        "transaction_monthly_rollups",
+        [
+            "month",
+            "source_id",
+            sa.text("coalesce(category_id, 0)"),
+            sa.text("coalesce(sub_category_id, 0)"),
+            sa.text("coalesce(currency, '')"),
+        ],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_transaction_monthly_rollups_key", table_name="transaction_monthly_rollups"
+    )
+    op.create_index(
+        "ix_transaction_monthly_rollups_key",
+        "transaction_monthly_rollups",
+        ["month", "source_id", "category_id", "sub_category_id", "currency"],
+    )
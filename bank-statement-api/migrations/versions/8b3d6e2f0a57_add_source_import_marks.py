@@ -0,0 +1,37 @@
+"""Add source import marks
+
+Revision ID: 8b3d6e2f0a57
+Revises: 4f2b7d9a1c36
+Create Date: 2026-10-19 15:26:48.904117
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8b3d6e2f0a57"
+down_revision = "4f2b7d9a1c36"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Starts empty: each source gets its mark on its next import
+    op.create_table(
+        "source_import_marks",
+        sa.Column("source_id", sa.Integer(), nullable=False),
+        sa.Column("low_water_mark", sa.Date(), nullable=False),
+        sa.Column("high_water_mark", sa.Date(), nullable=False),
+        sa.Column("overlap_start", sa.Date(), nullable=False),
+        sa.Column("overlap_fingerprint", sa.String(length=64), nullable=False),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=True
+        ),
+        sa.ForeignKeyConstraint(["source_id"], ["sources.id"]),
+        sa.PrimaryKeyConstraint("source_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("source_import_marks")
@@ -0,0 +1,37 @@
+"""Add transactions.categorization_attempts
+
+Revision ID: 8f3b6d2a4c17
+Revises: 5c2e8a9f1b34
+Create Date: 2026-10-19 22:14:36.590281
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8f3b6d2a4c17"
+down_revision = "5c2e8a9f1b34"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "transactions",
+        sa.Column(
+            "categorization_attempts",
+            sa.Integer(),
+            server_default="0",
+            nullable=False,
+        ),
+    )
+    # Rows given up on when nothing matched them get another chance
+    op.execute("""
+        UPDATE transactions SET categorization_status = 'pending'
+        WHERE categorization_status = 'failed' AND category_id IS NULL
+        """)
+
+
+def downgrade() -> None:
+    op.drop_column("transactions", "categorization_attempts")
@@ -0,0 +1,60 @@
+"""Add transaction_monthly_rollups table
+
+Revision ID: 9d4a7c0e6b21
+Revises: 3b9e5f2c1d47
+Create Date: 2026-10-19 11:02:17.846530
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9d4a7c0e6b21"
+down_revision = "3b9e5f2c1d47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "transaction_monthly_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("source_id", sa.Integer(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=True),
+        sa.Column("sub_category_id", sa.Integer(), nullable=True),
+        sa.Column("currency", sa.String(), nullable=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column("inflow", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column("outflow", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(["source_id"], ["sources.id"]),
+        sa.ForeignKeyConstraint(["category_id"], ["categories.id"]),
+        sa.ForeignKeyConstraint(["sub_category_id"], ["categories.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_transaction_monthly_rollups_key",
+        "transaction_monthly_rollups",
+        ["month", "source_id", "category_id", "sub_category_id", "currency"],
+    )
+    # Backfill; scripts/rebuild_monthly_rollups.py does the same later on
+    op.execute("""
+        INSERT INTO transaction_monthly_rollups
+            (month, source_id, category_id, sub_category_id, currency,
+             count, total, inflow, outflow)
+        SELECT date_trunc('month', date)::date, source_id, category_id,
+               sub_category_id, currency, count(id), coalesce(sum(amount), 0),
+               coalesce(sum(CASE WHEN amount > 0 THEN amount ELSE 0 END), 0),
+               coalesce(sum(CASE WHEN amount < 0 THEN -amount ELSE 0 END), 0)
+        FROM transactions
+        GROUP BY 1, 2, 3, 4, 5
+        """)
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_transaction_monthly_rollups_key", table_name="transaction_monthly_rollups"
+    )
+    op.drop_table("transaction_monthly_rollups")
@@ -0,0 +1,94 @@
+"""Move statement content to the content-addressed blob store
+
+Revision ID: c5e1a8f3b902
+Revises: 9d4a7c0e6b21
+Create Date: 2026-10-19 12:41:05.553817
+
+"""
+
+import hashlib
+
+import sqlalchemy as sa
+import zstandard
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c5e1a8f3b902"
+down_revision = "9d4a7c0e6b21"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "statement_blobs",
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("compressed_size", sa.Integer(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=True
+        ),
+        sa.PrimaryKeyConstraint("sha256"),
+    )
+    op.add_column(
+        "statements", sa.Column("content_hash", sa.String(length=64), nullable=True)
+    )
+    op.add_column("statements", sa.Column("size", sa.Integer(), nullable=True))
+
+    # Existing files go to the database backend; with STATEMENT_STORE=filesystem
+    # they stay readable from there
+    connection = op.get_bind()
+    compressor = zstandard.ZstdCompressor(level=3)
+    statements = connection.execute(sa.text("SELECT id, content FROM statements"))
+    for statement_id, content in statements.fetchall():
+        content = bytes(content)
+        sha256 = hashlib.sha256(content).hexdigest()
+        data = compressor.compress(content)
+        connection.execute(
+            sa.text(
+                "INSERT INTO statement_blobs (sha256, size, compressed_size, data) "
+                "VALUES (:sha256, :size, :compressed_size, :data) "
+                "ON CONFLICT (sha256) DO NOTHING"
+            ),
+            {
+                "sha256": sha256,
+                "size": len(content),
+                "compressed_size": len(data),
+                "data": data,
+            },
+        )
+        connection.execute(
+            sa.text(
+                "UPDATE statements SET content_hash = :sha256, size = :size "
+                "WHERE id = :id"
+            ),
+            {"sha256": sha256, "size": len(content), "id": statement_id},
+        )
+
+    with op.batch_alter_table("statements") as batch_op:
+        batch_op.alter_column("content_hash", nullable=False)
+        batch_op.alter_column("size", nullable=False)
+        batch_op.drop_column("content")
+    op.create_index(op.f("ix_statements_content_hash"), "statements", ["content_hash"])
+
+
+def downgrade() -> None:
+    op.add_column("statements", sa.Column("content", sa.LargeBinary(), nullable=True))
+
+    connection = op.get_bind()
+    decompressor = zstandard.ZstdDecompressor()
+    blobs = connection.execute(sa.text("SELECT sha256, data FROM statement_blobs"))
+    for sha256, data in blobs.fetchall():
+        connection.execute(
+            sa.text(
+                "UPDATE statements SET content = :content WHERE content_hash = :sha256"
+            ),
+            {"content": decompressor.decompress(bytes(data)), "sha256": sha256},
+        )
+
+    op.drop_index(op.f("ix_statements_content_hash"), table_name="statements")
+    with op.batch_alter_table("statements") as batch_op:
+        batch_op.drop_column("size")
+        batch_op.drop_column("content_hash")
+    op.drop_table("statement_blobs")
@@ -0,0 +1,74 @@
+"""Add transaction fingerprints
+
+Revision ID: e7a94c1b5d28
+Revises: 8b3d6e2f0a57
+Create Date: 2026-10-19 16:48:31.226540
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+from src.app.common.fingerprint import (
+    normalize_description,
+    occurrences,
+    transaction_fingerprint,
+)
+
+# revision identifiers, used by Alembic.
+revision = "e7a94c1b5d28"
+down_revision = "8b3d6e2f0a57"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.add_column(
+        "transactions", sa.Column("fingerprint", sa.String(length=64), nullable=True)
+    )
+
+    # Existing rows get the fingerprint a re-import would compute, counting
+    # repeated same-day charges in id order
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.text(
+            "SELECT id, source_id, date, amount, description FROM transactions "
+            "ORDER BY id"
+        ).columns(date=sa.Date, amount=sa.Numeric(10, 2))
+    ).fetchall()
+    descriptions = [normalize_description(row.description) for row in rows]
+    indices = occurrences(
+        (row.source_id, row.date, row.amount, description)
+        for row, description in zip(rows, descriptions)
+    )
+    updates = [
+        {
+            "id": row.id,
+            "fingerprint": transaction_fingerprint(
+                row.source_id, row.date, row.amount or 0, description, occurrence
+            ),
+        }
+        for row, description, occurrence in zip(rows, descriptions, indices)
+        if row.date is not None
+    ]
+    for start in range(0, len(updates), BATCH_SIZE):
+        connection.execute(
+            sa.text(
+                "UPDATE transactions SET fingerprint = :fingerprint WHERE id = :id"
+            ),
+            updates[start : start + BATCH_SIZE],
+        )
+
+    op.create_index(
+        op.f("ix_transactions_fingerprint"),
+        "transactions",
+        ["fingerprint"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_transactions_fingerprint"), table_name="transactions")
+    op.drop_column("transactions", "fingerprint")
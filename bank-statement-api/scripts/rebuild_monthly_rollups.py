@@ -0,0 +1,18 @@
+from src.app.db import SessionLocal
+from src.app.repositories.transaction_rollups_repository import (
+    TransactionRollupsRepository,
+)
+
+
+def rebuild_monthly_rollups():
+    session = SessionLocal()
+    try:
+        count = TransactionRollupsRepository(session).rebuild()
+    finally:
+        session.close()
+
+    print(f"Rebuilt {count} monthly rollups from the transactions table")
+
+
+if __name__ == "__main__":
+    rebuild_monthly_rollups()
@@ -1,10 +1,10 @@
+import asyncio
 import logging
 import os
 from typing import Optional
 
-import google.generativeai as genai
-
-from src.app.ai.llm_client import LLMClient
+from src.app.ai.llm_client import LLMClient, LLMRateLimitError
+from src.app.observability.metrics import track_llm_call
 
 logger_content = logging.getLogger("app.llm.big")
 logger = logging.getLogger("app")
@@ -16,25 +16,45 @@ class GeminiAI(LLMClient):
         api_key: Optional[str] = None,
         model_name: str = "gemini-2.0-flash",
         temperature: float = 0,
+        api_endpoint: Optional[str] = None,
     ):
         self.api_key = api_key or os.environ.get("GOOGLE_API_KEY")
-        if not self.api_key:
-            raise ValueError(
-                "API key must be provided either as an argument or as GOOGLE_API_KEY environment variable"
-            )
-
         self.model_name = model_name
+        # Point at another Gemini-compatible server, e.g. loadtest/fake_llm_server.py
+        self.api_endpoint = api_endpoint or os.environ.get("GEMINI_API_ENDPOINT")
+        self._model = None
+
+    @property
+    def model(self):
+        # The SDK is slow to import and configure, so wait for the first call
+        if self._model is None:
+            if not self.api_key:
+                raise ValueError(
+                    "API key must be provided either as an argument or as GOOGLE_API_KEY environment variable"
+                )
+
+            import google.generativeai as genai
 
-        genai.configure(api_key=self.api_key)
+            if self.api_endpoint:
+                genai.configure(
+                    api_key=self.api_key,
+                    transport="rest",
+                    client_options={"api_endpoint": self.api_endpoint},
+                )
+            else:
+                genai.configure(api_key=self.api_key)
 
-        self.model = genai.GenerativeModel(
-            model_name=self.model_name,
-        )
+            self._model = genai.GenerativeModel(
+                model_name=self.model_name,
+            )
+        return self._model
 
     def generate(self, prompt: str) -> str:
         try:
             logger_content.debug(prompt, extra={"prefix": "gemini.prompt"})
-            response = self.model.generate_content(prompt)
+            with track_llm_call("gemini") as call:
+                response = self.model.generate_content(prompt)
+                self._record_usage(call, response)
             response = response.text
             logger_content.debug(
                 response, extra={"prefix": "gemini.response", "ext": "json"}
@@ -42,11 +62,35 @@ class GeminiAI(LLMClient):
             return response
         except Exception as e:
             logger.error("Error generating response: %s", str(e))
+            if _is_rate_limit(e):
+                raise LLMRateLimitError(str(e)) from e
             raise Exception(f"Error generating response: {str(e)}")
 
     async def generate_async(self, prompt: str) -> str:
         try:
-            response = await self.model.generate_content_async(prompt)
+            with track_llm_call("gemini") as call:
+                if self.api_endpoint:
+                    # The REST transport has no async client
+                    response = await asyncio.to_thread(
+                        self.model.generate_content, prompt
+                    )
+                else:
+                    response = await self.model.generate_content_async(prompt)
+                self._record_usage(call, response)
             return response.text
         except Exception as e:
+            if _is_rate_limit(e):
+                raise LLMRateLimitError(str(e)) from e
             raise Exception(f"Error generating response: {str(e)}")
+
+    def _record_usage(self, call, response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            call.record_tokens(usage.prompt_token_count, usage.candidates_token_count)
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    from google.api_core import exceptions
+
+    # gRPC reports quota errors as RESOURCE_EXHAUSTED, REST as HTTP 429
+    return isinstance(error, (exceptions.ResourceExhausted, exceptions.TooManyRequests))
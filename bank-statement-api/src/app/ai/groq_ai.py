@@ -1,9 +1,8 @@
 import os
 from typing import Optional
 
-from groq import Groq
-
-from src.app.ai.llm_client import LLMClient
+from src.app.ai.llm_client import LLMClient, LLMRateLimitError
+from src.app.observability.metrics import track_llm_call
 
 
 class GroqAI(LLMClient):
@@ -11,6 +10,7 @@ class GroqAI(LLMClient):
         self,
         api_key: Optional[str] = None,
         model_name: str = "llama-3.3-70b-versatile",
+        base_url: Optional[str] = None,
     ):
         self.api_key = api_key or os.environ.get("GROQ_API_KEY")
         if not self.api_key:
@@ -19,28 +19,63 @@ class GroqAI(LLMClient):
             )
 
         self.model_name = model_name
+        self.base_url = base_url or os.environ.get("GROQ_BASE_URL")
+        self._client = None
+
+    @property
+    def client(self):
+        # Created on first use to keep the SDK import out of startup
+        if self._client is None:
+            from groq import Groq
 
-        # Initialize the Groq client
-        self.client = Groq(
-            api_key=self.api_key,
-        )
+            self._client = Groq(
+                api_key=self.api_key,
+                base_url=self.base_url,
+            )
+        return self._client
 
     def generate(self, prompt: str) -> str:
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[{"role": "user", "content": prompt}],
-            )
+            with track_llm_call("groq") as call:
+                response = self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=[{"role": "user", "content": prompt}],
+                )
+                self._record_usage(call, response)
             return response.choices[0].message.content
         except Exception as e:
+            if _is_rate_limit(e):
+                raise LLMRateLimitError(str(e), _retry_after(e)) from e
             raise Exception(f"Error generating response: {str(e)}")
 
     async def generate_async(self, prompt: str) -> str:
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[{"role": "user", "content": prompt}],
-            )
+            with track_llm_call("groq") as call:
+                response = self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=[{"role": "user", "content": prompt}],
+                )
+                self._record_usage(call, response)
             return response.choices[0].message.content
         except Exception as e:
+            if _is_rate_limit(e):
+                raise LLMRateLimitError(str(e), _retry_after(e)) from e
             raise Exception(f"Error generating response: {str(e)}")
+
+    def _record_usage(self, call, response):
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            call.record_tokens(usage.prompt_tokens, usage.completion_tokens)
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    from groq import RateLimitError
+
+    return isinstance(error, RateLimitError)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    try:
+        return float(error.response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
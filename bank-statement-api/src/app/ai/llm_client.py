@@ -1,4 +1,13 @@
 from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class LLMRateLimitError(Exception):
+    """The provider asked us to slow down"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
 
 
 class LLMClient(ABC):
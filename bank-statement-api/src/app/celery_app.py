@@ -1,12 +1,16 @@
+import os
+
 from celery import Celery
 
-REDIS_URL = "redis://localhost:6379/0"
+from .observability.metrics import instrument_celery
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
 celery_app = Celery(
     "bank_statement_api",
     broker=REDIS_URL,
     backend=REDIS_URL,
-    include=["app.tasks.categorization"],
+    include=["app.tasks.categorization", "app.tasks.uploads"],
 )
 
 celery_app.conf.task_serializer = "json"
@@ -14,10 +18,18 @@ celery_app.conf.result_serializer = "json"
 celery_app.conf.accept_content = ["json"]
 celery_app.conf.result_expires = 3600
 
+instrument_celery()
+
+# Uploads enqueue categorization themselves; the beat only picks up rows left
+# behind by a lost task or an upload made while the broker was down
+CATEGORIZATION_SAFETY_NET_SECONDS = int(
+    os.getenv("CATEGORIZATION_SAFETY_NET_SECONDS", "300")
+)
+
 celery_app.conf.beat_schedule = {
-    "categorize-transactions-every-1-minute": {
+    "categorize-transactions-safety-net": {
         "task": "src.app.tasks.categorization.categorize_pending_transactions",
-        "schedule": 60 * 1,
+        "schedule": CATEGORIZATION_SAFETY_NET_SECONDS,
         "args": (10,),
     },
 }
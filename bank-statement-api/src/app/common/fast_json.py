@@ -0,0 +1,73 @@
+import types
+import typing
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Tuple, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+
+class RowSerializer:
+    """Writes plain database rows as the JSON a response model would produce.
+
+    Keys are the model's camelCase aliases, in field order. A nested model
+    field reads the columns labelled "<field>__<nested field>" and is null when
+    they all are (an outer join without a match). This skips pydantic
+    validation and jsonable_encoder, so rows must come from trusted queries."""
+
+    def __init__(self, model: Type[BaseModel], prefix: str = ""):
+        self.fields: List[Tuple[str, str, Any]] = []
+        for name, field in model.model_fields.items():
+            alias = field.alias or name
+            nested = _nested_model(field.annotation)
+            if nested is not None:
+                self.fields.append(
+                    (alias, name, RowSerializer(nested, f"{prefix}{name}__"))
+                )
+            else:
+                self.fields.append(
+                    (alias, f"{prefix}{name}", _converter(field.annotation))
+                )
+
+    def to_dict(self, row: Mapping[str, Any]) -> dict:
+        result = {}
+        for alias, key, convert in self.fields:
+            if isinstance(convert, RowSerializer):
+                result[alias] = convert.to_nested_dict(row)
+                continue
+            value = row[key]
+            result[alias] = (
+                value if value is None or convert is None else convert(value)
+            )
+        return result
+
+    def to_nested_dict(self, row: Mapping[str, Any]) -> Optional[dict]:
+        result = self.to_dict(row)
+        return None if all(value is None for value in result.values()) else result
+
+    def dumps(self, rows: Iterable[Mapping[str, Any]]) -> bytes:
+        return orjson.dumps([self.to_dict(row) for row in rows])
+
+    def response(self, rows: Iterable[Mapping[str, Any]]) -> Response:
+        return Response(content=self.dumps(rows), media_type="application/json")
+
+
+def _nested_model(annotation) -> Optional[Type[BaseModel]]:
+    for candidate in _union_members(annotation):
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+def _converter(annotation) -> Optional[Callable[[Any], Any]]:
+    # Numeric columns come back as Decimal, which orjson doesn't write
+    if float in _union_members(annotation):
+        return float
+    return None
+
+
+def _union_members(annotation) -> tuple:
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union or origin is getattr(types, "UnionType", None):
+        return typing.get_args(annotation)
+    return (annotation,)
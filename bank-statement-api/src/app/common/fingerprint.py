@@ -0,0 +1,67 @@
+import hashlib
+import re
+from collections import Counter
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, List, Tuple, Union
+
+
+def normalize_description(description: str) -> str:
+    if not description:
+        return ""
+
+    description = str(description).lower()
+    description = re.sub(r"[^\w\s]", " ", description)
+    description = re.sub(r"\s+", " ", description).strip()
+
+    return description
+
+
+def transaction_fingerprint(
+    source_id: int,
+    date: date,
+    amount: Union[Decimal, float],
+    normalized_description: str,
+    occurrence: int,
+) -> str:
+    """Identifies a transaction across imports of overlapping statements.
+
+    occurrence is the index among rows of the statement with the same date,
+    amount and description, so repeated same-day charges stay distinct."""
+    key = "|".join(
+        [
+            str(source_id),
+            date.isoformat(),
+            f"{Decimal(str(amount)):.2f}",
+            normalized_description,
+            str(occurrence),
+        ]
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def occurrences(keys: Iterable[Tuple]) -> List[int]:
+    """For each key, how many times it was seen before"""
+    seen: Counter = Counter()
+    result = []
+    for key in keys:
+        result.append(seen[key])
+        seen[key] += 1
+    return result
+
+
+def statement_fingerprints(transactions: List, source_id: int) -> List[str]:
+    """Fingerprints for the rows of one statement, given in file order"""
+    descriptions = [normalize_description(t.description) for t in transactions]
+    occurrence_indices = occurrences(
+        (transaction.date, transaction.amount, description)
+        for transaction, description in zip(transactions, descriptions)
+    )
+    return [
+        transaction_fingerprint(
+            source_id, transaction.date, transaction.amount, description, occurrence
+        )
+        for transaction, description, occurrence in zip(
+            transactions, descriptions, occurrence_indices
+        )
+    ]
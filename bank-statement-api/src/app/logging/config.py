@@ -1,9 +1,15 @@
+import atexit
 import logging.config
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOG_DIR = os.path.join(BASE_DIR, "../../..", "logs")
 
+# Loggers whose handlers run on a background thread instead of the caller's
+BACKGROUND_LOGGERS = ["app.llm.big"]
+
 LOGGING_CONFIG = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -17,6 +23,9 @@ LOGGING_CONFIG = {
             "level": "DEBUG",
             "formatter": "raw",
             "directory": os.path.join(LOG_DIR, "files"),
+            "max_bytes": 20 * 1024 * 1024,
+            "backup_count": 5,
+            "max_age_days": 7,
         },
         "file": {
             "level": "DEBUG",
@@ -31,12 +40,56 @@ LOGGING_CONFIG = {
         },
     },
     "loggers": {
-        "app.llm.big": {"handlers": ["big_file"], "level": "DEBUG", "propagate": False},
+        "app.llm.big": {
+            "handlers": ["big_file"],
+            "level": os.getenv("PAYLOAD_LOG_LEVEL", "DEBUG"),
+            "propagate": False,
+        },
         "app": {"handlers": ["console", "file"], "level": "DEBUG", "propagate": True},
     },
 }
 
+_listeners = []
+
+
+class InProcessQueueHandler(QueueHandler):
+    """Hands records to the listener thread untouched.
+
+    The base class formats the record on the caller's thread so it can be
+    pickled; the queue never leaves the process, so formatting is left to the
+    listener's handlers."""
+
+    def prepare(self, record):
+        return record
+
+
+def move_handlers_to_background(logger_name: str) -> QueueListener:
+    logger = logging.getLogger(logger_name)
+    handlers = list(logger.handlers)
+    for handler in handlers:
+        logger.removeHandler(handler)
+
+    records = queue.SimpleQueue()
+    logger.addHandler(InProcessQueueHandler(records))
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def stop_background_logging():
+    while _listeners:
+        listener = _listeners.pop()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
 
 def init_logging():
+    stop_background_logging()
     os.makedirs(LOG_DIR, exist_ok=True)
     logging.config.dictConfig(LOGGING_CONFIG)
+    for logger_name in BACKGROUND_LOGGERS:
+        _listeners.append(move_handlers_to_background(logger_name))
+
+
+atexit.register(stop_background_logging)
@@ -1,42 +1,88 @@
 import logging
 import os
-import uuid
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
+from logging.handlers import RotatingFileHandler
 
 
-class DynamicContentFileHandler(logging.Handler):
-    def __init__(self, directory="logs/files"):
-        super().__init__()
+class DynamicContentFileHandler(RotatingFileHandler):
+    """Appends large payloads to a size-bounded rotating archive.
+
+    Each record is written as a section headed by its timestamp, prefix and
+    extension, so payloads stay easy to find without creating one file per
+    record. Files older than max_age_days are removed by a background timer."""
+
+    def __init__(
+        self,
+        directory="logs/files",
+        filename="payloads.log",
+        max_bytes=20 * 1024 * 1024,
+        backup_count=5,
+        max_age_days=7,
+        cleanup_interval_seconds=3600,
+    ):
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(
+            os.path.join(directory, filename),
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
         self.directory = directory
+        self.max_age_days = max_age_days
+        self.cleanup_interval_seconds = cleanup_interval_seconds
+        self._cleanup_timer = None
+        self._schedule_cleanup()
 
-    def emit(self, record):
-        try:
-            os.makedirs(self.directory, exist_ok=True)
+    def format(self, record):
+        prefix = getattr(record, "prefix", "log")
+        ext = getattr(record, "ext", "log")
+        timestamp = datetime.fromtimestamp(record.created).strftime("%Y%m%d_%H%M%S.%f")
+        return f"===== {timestamp} {prefix}.{ext} =====\n{super().format(record)}\n"
 
-            self.delete_old_files()
+    def shouldRollover(self, record):
+        # The base class formats the record a second time to measure it; payloads
+        # can be large, so only look at the current file size
+        if self.stream is None:
+            self.stream = self._open()
+        return self.maxBytes > 0 and self.stream.tell() >= self.maxBytes
 
-            prefix = getattr(record, "prefix", "log")
-            ext = getattr(record, "ext", "log")
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S.%f")
-            uid = uuid.uuid4().hex[:8]
-            filename = f"{timestamp}_{prefix}_{uid}.{ext}"
-            filepath = os.path.join(self.directory, filename)
+    def _schedule_cleanup(self):
+        if self.cleanup_interval_seconds <= 0:
+            return
+        self._cleanup_timer = threading.Timer(
+            self.cleanup_interval_seconds, self._run_cleanup
+        )
+        self._cleanup_timer.daemon = True
+        self._cleanup_timer.start()
 
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(self.format(record))
+    def _run_cleanup(self):
+        try:
+            self.delete_old_files()
         except Exception:
-            self.handleError(record)
+            logging.getLogger("app").exception("Failed to delete old log files")
+        if self._cleanup_timer is not None:
+            self._schedule_cleanup()
 
     def delete_old_files(self):
-        now = datetime.now()
-        cutoff = now - timedelta(days=self.max_age_days)
+        cutoff = datetime.now() - timedelta(days=self.max_age_days)
 
         for filename in os.listdir(self.directory):
             filepath = os.path.join(self.directory, filename)
-            if os.path.isfile(filepath):
-                mtime = datetime.fromtimestamp(os.path.getmtime(filepath))
-                if mtime < cutoff:
-                    try:
-                        os.remove(filepath)
-                    except Exception:
-                        pass
+            if os.path.abspath(filepath) == self.baseFilename:
+                continue
+            if not os.path.isfile(filepath):
+                continue
+            mtime = datetime.fromtimestamp(os.path.getmtime(filepath))
+            if mtime < cutoff:
+                try:
+                    os.remove(filepath)
+                except Exception:
+                    pass
+
+    def close(self):
+        if self._cleanup_timer is not None:
+            self._cleanup_timer.cancel()
+            self._cleanup_timer = None
+        super().close()
@@ -1,7 +1,58 @@
 import logging
+import os
+import random
+from typing import Any, Callable, Optional
+
+PAYLOAD_SAMPLE_RATE = float(os.getenv("PAYLOAD_LOG_SAMPLE_RATE", "1.0"))
+PAYLOAD_MAX_CHARS = int(os.getenv("PAYLOAD_LOG_MAX_CHARS", str(1024 * 1024)))
 
 
 def log_exception(message, *args, logger_name="app", **kwargs):
     logger = logging.getLogger(logger_name)
     kwargs.setdefault("exc_info", True)
     logger.error(message, *args, **kwargs)
+
+
+class LazyPayload:
+    """Defers building a log message until a handler formats the record"""
+
+    def __init__(self, build: Callable[[], Any], max_chars: Optional[int] = None):
+        self.build = build
+        self.max_chars = max_chars
+        self._value = None
+
+    def __str__(self):
+        if self._value is None:
+            value = self.build()
+            value = value if isinstance(value, str) else str(value)
+            if self.max_chars and len(value) > self.max_chars:
+                truncated = len(value) - self.max_chars
+                value = f"{value[: self.max_chars]}\n... [{truncated} chars truncated]"
+            self._value = value
+        return self._value
+
+
+def log_payload(
+    logger: logging.Logger,
+    build: Callable[[], Any],
+    prefix: str,
+    ext: str = "log",
+    sample_rate: Optional[float] = None,
+    max_chars: Optional[int] = None,
+):
+    """Log a large debug payload without paying for it when nobody reads it.
+
+    Nothing is built when the logger is disabled for DEBUG or the record is
+    not sampled; otherwise build runs when a handler formats the record and
+    the result is capped at max_chars."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+
+    sample_rate = PAYLOAD_SAMPLE_RATE if sample_rate is None else sample_rate
+    if sample_rate < 1.0 and random.random() >= sample_rate:
+        return
+
+    logger.debug(
+        LazyPayload(build, PAYLOAD_MAX_CHARS if max_chars is None else max_chars),
+        extra={"prefix": prefix, "ext": ext},
+    )
@@ -1,42 +1,56 @@
 import logging
-from typing import Optional
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Callable, Optional
 
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 
-from src.app.services.categorizers.existing_transactions_categorizer import (
-    ExistingTransactionsCategorizer,
-)
 from src.app.services.file_processing.statement_statistics_calculator import (
     StatementStatisticsCalculator,
 )
 from src.app.services.file_processing.transactions_builder import TransactionsBuilder
 
 from .ai.gemini_ai import GeminiAI
-from .db import get_db
+from .db import DBSessionMiddleware, RequestSession, session_scope
 from .logging.config import init_logging
+from .observability.metrics import instrument_app, instrument_engine, instrument_tracer
+from .observability.tracing import tracer
 from .repositories.categories_repository import CategoriesRepository
+from .repositories.source_import_marks_repository import SourceImportMarksRepository
 from .repositories.sources_repository import SourcesRepository
 from .repositories.statement_repository import StatementRepository
 from .repositories.statement_schema_repository import StatementSchemaRepository
 from .repositories.transactions_repository import TransactionsRepository
+from .repositories.upload_jobs_repository import UploadJobsRepository
 from .routes.categories import CategoryRouter
 from .routes.categorization import CategorizationRouter
+from .routes.jobs import JobRouter
+from .routes.metrics import MetricsRouter
 from .routes.sources import SourceRouter
+from .routes.statements import StatementRouter
 from .routes.transactions import TransactionRouter
-from .services.categorizers.llm_transaction_categorizer import LLMTransactionCategorizer
+from .services.categorizers.factory import create_categorizer
 from .services.categorizers.transaction_categorizer import TransactionCategorizer
+from .services.file_processing.batch_statement_analysis_service import (
+    BatchStatementAnalysisService,
+)
 from .services.file_processing.column_normalizer import ColumnNormalizer
 from .services.file_processing.file_type_detector import FileTypeDetector
+from .services.file_processing.incremental_import import IncrementalImport
 from .services.file_processing.parsers.parser_factory import ParserFactory
 from .services.file_processing.statement_analysis_service import (
     StatementAnalysisService,
 )
 from .services.file_processing.statement_upload_service import StatementUploadService
 from .services.file_processing.transactions_cleaner import TransactionsCleaner
+from .services.file_processing.upload_job_service import UploadJobService
+from .services.transactions_export import TransactionsExporter
 
-init_logging()
 logger = logging.getLogger("app")
 
 
@@ -50,6 +64,7 @@ class App:
         statement_repository: Optional[StatementRepository] = None,
         statement_schema_repository: Optional[StatementSchemaRepository] = None,
         categorizer: Optional[TransactionCategorizer] = None,
+        schedule_categorization: Optional[Callable[[int], str]] = None,
     ):
         logger.info("Initializing app...")
 
@@ -57,7 +72,9 @@ class App:
             title="Bank Statement API",
             description="API for processing and categorizing bank statements",
             version="0.1.0",
+            lifespan=self._lifespan,
         )
+        self.owns_session = db_session is None
 
         self.app.add_middleware(
             CORSMiddleware,
@@ -66,12 +83,19 @@ class App:
             allow_methods=["*"],
             allow_headers=["*"],
         )
+        instrument_app(self.app)
+        instrument_tracer(tracer)
 
         if db_session is None:
-            db = next(get_db())
+            db = RequestSession
+            self.app.add_middleware(DBSessionMiddleware, session=RequestSession)
         else:
             db = db_session
 
+        bind = db.get_bind()
+        if isinstance(bind, Engine):
+            instrument_engine(bind)
+
         self.categories_repository = categories_repository or CategoriesRepository(db)
         self.sources_repository = sources_repository or SourcesRepository(db)
         self.transactions_repository = (
@@ -83,13 +107,11 @@ class App:
         )
 
         llm_client = GeminiAI()
-        groq_categorizer = categorizer or LLMTransactionCategorizer(
-            self.categories_repository, llm_client
-        )
-
-        self.categorizer = ExistingTransactionsCategorizer(
+        self.categorizer = create_categorizer(
+            categories_repository=self.categories_repository,
             transactions_repository=self.transactions_repository,
-            fallback_categorizer=groq_categorizer,
+            llm_client=llm_client,
+            llm_categorizer=categorizer,
         )
 
         def on_category_change(action, categories):
@@ -104,7 +126,8 @@ class App:
         transaction_cleaner = TransactionsCleaner()
         transactions_builder = TransactionsBuilder()
         statistics_calculator = StatementStatisticsCalculator()
-        parser_factory = ParserFactory()
+        self.parser_executor = self._create_parser_executor()
+        parser_factory = ParserFactory(self.parser_executor)
         statement_analysis_service = StatementAnalysisService(
             file_type_detector=file_type_detector,
             parser_factory=parser_factory,
@@ -122,12 +145,30 @@ class App:
             statement_repository=self.statement_repository,
             transactions_repository=self.transactions_repository,
             statement_schema_repository=self.statement_schema_repository,
+            incremental_import=IncrementalImport(SourceImportMarksRepository(db)),
         )
         transaction_router = TransactionRouter(
             transactions_repository=self.transactions_repository,
             statement_analysis_service=statement_analysis_service,
             statement_upload_service=statement_upload_service,
             statement_repository=self.statement_repository,
+            schedule_categorization=schedule_categorization,
+            transactions_exporter=TransactionsExporter(self.transactions_repository),
+            batch_analysis_service=BatchStatementAnalysisService(
+                statement_analysis_service,
+                self.transactions_repository,
+                executor=self.parser_executor,
+            ),
+        )
+        upload_jobs_repository = UploadJobsRepository(db)
+        self.upload_executor = self._create_upload_executor()
+        self.upload_job_service = UploadJobService(
+            upload_jobs_repository,
+            statement_upload_service,
+            executor=self.upload_executor,
+            enqueue=enqueue_upload_job if self.upload_executor is None else None,
+            scope=session_scope if self.owns_session else None,
+            schedule_categorization=schedule_categorization,
         )
         categorization_router = CategorizationRouter(
             transactions_repository=self.transactions_repository,
@@ -138,7 +179,18 @@ class App:
         self.app.include_router(category_router.router)
         self.app.include_router(source_router.router)
         self.app.include_router(transaction_router.router)
+        self.app.include_router(StatementRouter(self.statement_repository).router)
+        self.app.include_router(
+            JobRouter(
+                upload_jobs_repository,
+                self.upload_job_service,
+                self.statement_repository,
+            ).router
+        )
         self.app.include_router(categorization_router.router)
+        self.app.include_router(
+            MetricsRouter(tracer, self.transactions_repository).router
+        )
 
         @self.app.get("/")
         def read_root():
@@ -149,16 +201,101 @@ class App:
                     {"path": "/categories", "methods": ["GET", "POST"]},
                     {"path": "/transactions", "methods": ["GET", "POST"]},
                     {"path": "/sources", "methods": ["GET", "POST", "PUT", "DELETE"]},
+                    {"path": "/statements", "methods": ["GET"]},
+                    {"path": "/jobs", "methods": ["POST", "GET"]},
                     {"path": "/categorization", "methods": ["POST", "GET"]},
+                    {"path": "/metrics", "methods": ["GET"]},
                 ],
             }
 
+    def _create_parser_executor(self) -> Optional[ProcessPoolExecutor]:
+        # Routes already parse off the event loop in the threadpool; a process pool
+        # also takes large files off the GIL, at the cost of pickling the DataFrame
+        processes = int(os.getenv("PARSER_PROCESSES", "0"))
+        if processes <= 0:
+            return None
+        return ProcessPoolExecutor(max_workers=processes)
+
+    def _create_upload_executor(self) -> Optional[Executor]:
+        # Background uploads run on API threads unless a Celery worker takes them
+        if os.getenv("UPLOAD_JOBS_BACKEND", "thread").lower() == "celery":
+            return None
+        return ThreadPoolExecutor(
+            max_workers=int(os.getenv("UPLOAD_JOB_WORKERS", "2")),
+            thread_name_prefix="upload-job",
+        )
+
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        # Components load lazily; warming up here keeps that first load off
+        # the first request without putting it on the import path
+        await run_in_threadpool(self._warm_up)
+        if self.upload_executor is not None:
+            await run_in_threadpool(self._fail_stale_upload_jobs)
+        yield
+        if self.upload_executor is not None:
+            # Running jobs finish; a job that had not started is marked failed
+            self.upload_executor.shutdown(cancel_futures=True)
+        if self.parser_executor is not None:
+            self.parser_executor.shutdown()
+
+    def _warm_up(self):
+        try:
+            if self.owns_session:
+                with session_scope():
+                    self.categorizer.refresh_rules()
+            else:
+                self.categorizer.refresh_rules()
+        except Exception:
+            logger.exception("Warm-up failed; components will load on first use")
+
+    def _fail_stale_upload_jobs(self):
+        # Thread jobs die with the process that ran them. Other API workers share
+        # the table, so only jobs idle for UPLOAD_JOB_STALE_SECONDS are failed
+        idle_seconds = float(os.getenv("UPLOAD_JOB_STALE_SECONDS", "900"))
+        try:
+            if self.owns_session:
+                with session_scope():
+                    self.upload_job_service.fail_stale(idle_seconds)
+            else:
+                self.upload_job_service.fail_stale(idle_seconds)
+        except Exception:
+            logger.exception("Failed to clean up abandoned upload jobs")
+
+
+def schedule_categorization(transactions_count: int) -> str:
+    # Celery is only imported once the first upload needs it
+    from .tasks.categorization import schedule_categorization
+
+    return schedule_categorization(transactions_count)
+
+
+def enqueue_upload_job(job_id: str) -> str:
+    from .tasks.uploads import enqueue_upload_job
+
+    return enqueue_upload_job(job_id)
+
 
-# Create the default app instance
 def create_default_app():
-    app_instance = App()
+    init_logging()
+    categorize_on_upload = os.getenv("CATEGORIZE_ON_UPLOAD", "true").lower() == "true"
+    app_instance = App(
+        schedule_categorization=(
+            schedule_categorization if categorize_on_upload else None
+        )
+    )
     return app_instance.app
 
 
-# Only create the app when this module is run directly, not when imported
-app = create_default_app()
+_default_app: Optional[FastAPI] = None
+
+
+def __getattr__(name: str):
+    # "src.app.main:app" is built on first access, so importing this module
+    # (tests, Celery, tooling) doesn't configure logging or build the App
+    global _default_app
+    if name == "app":
+        if _default_app is None:
+            _default_app = create_default_app()
+        return _default_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
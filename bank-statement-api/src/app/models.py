@@ -1,17 +1,20 @@
 from sqlalchemy import (
     JSON,
+    Boolean,
     Column,
     Date,
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     LargeBinary,
     Numeric,
     String,
     func,
+    literal_column,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from .db import Base
 
@@ -66,7 +69,17 @@ class Transaction(Base):
         default="pending",
         index=True,
     )
-    statement_id = Column(String, ForeignKey("statements.id"), nullable=True)
+    # Drains that had no answer for the row; it is retried up to
+    # CATEGORIZATION_MAX_ATTEMPTS times
+    categorization_attempts = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    statement_id = Column(
+        String, ForeignKey("statements.id"), nullable=True, index=True
+    )
+    # Set for imported rows (see common.fingerprint); unique, so concurrent
+    # imports of overlapping statements cannot both insert a row
+    fingerprint = Column(String(64), nullable=True, unique=True, index=True)
 
     category = relationship(
         "Category", foreign_keys=[category_id], back_populates="transactions"
@@ -75,18 +88,101 @@ class Transaction(Base):
     source = relationship("Source", back_populates="transactions")
     statement = relationship("Statement", back_populates="transactions")
 
+    # Aggregates filter on a source and/or a date range; Postgres can answer
+    # them from the index alone
+    __table_args__ = (
+        Index(
+            "ix_transactions_source_id_date",
+            "source_id",
+            "date",
+            postgresql_include=["category_id", "sub_category_id", "amount"],
+        ),
+        Index(
+            "ix_transactions_category_id_date",
+            "category_id",
+            "date",
+            postgresql_include=["sub_category_id", "source_id", "amount"],
+        ),
+    )
+
+
+class TransactionMonthlyRollup(Base):
+    """Monthly totals kept in step with transactions by TransactionsRepository.
+
+    There is one row per key; NULL category, sub category and currency are
+    coalesced in the unique index so they compare equal."""
+
+    __tablename__ = "transaction_monthly_rollups"
+
+    id = Column(Integer, primary_key=True)
+    month = Column(Date, nullable=False)
+    source_id = Column(Integer, ForeignKey("sources.id"), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    sub_category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    currency = Column(String, nullable=True)
+    count = Column(Integer, nullable=False, default=0)
+    total = Column(Numeric(14, 2), nullable=False, default=0)
+    inflow = Column(Numeric(14, 2), nullable=False, default=0)
+    outflow = Column(Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        Index(
+            "ix_transaction_monthly_rollups_key",
+            month,
+            source_id,
+            func.coalesce(category_id, literal_column("0")),
+            func.coalesce(sub_category_id, literal_column("0")),
+            func.coalesce(currency, literal_column("''")),
+            unique=True,
+        ),
+    )
+
+
+class SourceImportMark(Base):
+    """The date range already imported for a source, used to skip old rows.
+
+    Statements for a source are merged into one range while they overlap; the
+    fingerprint covers the rows in the last days of it (the overlap window)."""
+
+    __tablename__ = "source_import_marks"
+
+    source_id = Column(Integer, ForeignKey("sources.id"), primary_key=True)
+    low_water_mark = Column(Date, nullable=False)
+    high_water_mark = Column(Date, nullable=False)
+    overlap_start = Column(Date, nullable=False)
+    overlap_fingerprint = Column(String(64), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
 
 class Statement(Base):
     __tablename__ = "statements"
 
     id = Column(String, primary_key=True, index=True)
     file_name = Column(String, nullable=False)
-    content = Column(LargeBinary, nullable=False)
+    # The file itself is in the blob store, under its SHA-256
+    content_hash = Column(String(64), nullable=False, index=True)
+    size = Column(Integer, nullable=False)
+    # Results replayed when the same file comes in again
+    analysis = Column(JSON(none_as_null=True), nullable=True)
+    import_result = Column(JSON(none_as_null=True), nullable=True)
     created_at = Column(DateTime, server_default=func.now())
 
     transactions = relationship("Transaction", back_populates="statement")
 
 
+class StatementBlob(Base):
+    """zstd-compressed statement files for the database blob backend"""
+
+    __tablename__ = "statement_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(Integer, nullable=False)
+    compressed_size = Column(Integer, nullable=False)
+    # Only loaded when asked for, so listing blobs never pulls the files
+    data = deferred(Column(LargeBinary, nullable=False))
+    created_at = Column(DateTime, server_default=func.now())
+
+
 class StatementSchemaMapping(Base):
     __tablename__ = "statement_schema_mappings"
 
@@ -94,3 +190,30 @@ class StatementSchemaMapping(Base):
     statement_hash = Column(String, unique=True, index=True)
     schema_data = Column(JSON, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
+
+
+class UploadJob(Base):
+    """A statement upload running in the background, with its progress.
+
+    Written by whichever process runs the job (an API thread or a Celery
+    worker) and polled by GET /jobs/{id}."""
+
+    __tablename__ = "upload_jobs"
+
+    id = Column(String, primary_key=True)
+    statement_id = Column(String, ForeignKey("statements.id"), nullable=False)
+    # The UploadFileSpec to run, so any process can pick the job up
+    spec = Column(JSON, nullable=False)
+    auto_categorize = Column(Boolean, nullable=False, default=True)
+    # thread (API process) or celery; only thread jobs die with the API
+    backend = Column(String(16), nullable=False, default="thread")
+    # queued, running, succeeded or failed
+    status = Column(String(16), nullable=False, default="queued")
+    stage = Column(String(16), nullable=True)
+    rows_parsed = Column(Integer, nullable=False, default=0)
+    rows_inserted = Column(Integer, nullable=False, default=0)
+    duplicates = Column(Integer, nullable=False, default=0)
+    result = Column(JSON(none_as_null=True), nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,250 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from fastapi import FastAPI, Request
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+from sqlalchemy import event
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from .tracing import Span, Tracer
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+)
+
+DB_QUERIES = Counter(
+    "db_queries_total",
+    "SQL statements executed",
+    ["operation"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement latency",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts that gave up waiting for a pooled connection",
+)
+DB_POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total",
+    "Connections checked out of the pool",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured pool size, not counting overflow",
+)
+
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds",
+    "LLM call latency by provider",
+    ["provider"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32, 64),
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "LLM tokens used by provider",
+    ["provider", "kind"],
+)
+LLM_ERRORS = Counter(
+    "llm_errors_total",
+    "Failed LLM calls by provider",
+    ["provider"],
+)
+
+CATEGORIZED_TRANSACTIONS = Counter(
+    "categorization_transactions_total",
+    "Transactions processed by the categorization service",
+    ["status"],
+)
+CATEGORIZATION_RATE_LIMIT_BACKOFFS = Counter(
+    "categorization_rate_limit_backoffs_total",
+    "Times categorization backed off because the LLM was rate limiting",
+)
+CATEGORIZATION_PENDING = Gauge(
+    "categorization_pending_transactions",
+    "Transactions waiting to be categorized",
+)
+
+CELERY_TASK_SECONDS = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task duration",
+    ["task", "state"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600),
+)
+
+PIPELINE_STAGE_SECONDS = Histogram(
+    "pipeline_stage_duration_seconds",
+    "Statement pipeline stage duration",
+    ["stage"],
+)
+PIPELINE_STAGE_ROWS = Counter(
+    "pipeline_stage_rows_total",
+    "Rows handled by statement pipeline stages",
+    ["stage"],
+)
+
+
+def render_latest(registry: CollectorRegistry = REGISTRY) -> bytes:
+    return generate_latest(registry)
+
+
+def instrument_app(app: FastAPI):
+    @app.middleware("http")
+    async def record_request_latency(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            # Label by route template, not the raw path, to keep cardinality bounded
+            route_path = getattr(route, "path", "unmatched")
+            HTTP_REQUEST_SECONDS.labels(
+                request.method, route_path, str(status)
+            ).observe(time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    operation = statement.lstrip().split(" ", 1)[0].upper() or "UNKNOWN"
+    DB_QUERIES.labels(operation).inc()
+    DB_QUERY_SECONDS.labels(operation).observe(time.perf_counter() - start_times.pop())
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a free connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except sa_exc.TimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKOUTS.inc()
+
+
+def instrument_engine(engine: Engine):
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "checkout", _on_checkout)
+
+    if isinstance(engine.pool, QueuePool):
+        DB_POOL_CHECKED_OUT.set_function(lambda: engine.pool.checkedout())
+        DB_POOL_SIZE.set(engine.pool.size())
+
+
+class LLMCall:
+    def __init__(self, provider: str):
+        self.provider = provider
+
+    def record_tokens(
+        self, prompt_tokens: Optional[int], completion_tokens: Optional[int]
+    ):
+        if prompt_tokens:
+            LLM_TOKENS.labels(self.provider, "prompt").inc(prompt_tokens)
+        if completion_tokens:
+            LLM_TOKENS.labels(self.provider, "completion").inc(completion_tokens)
+
+
+@contextmanager
+def track_llm_call(provider: str) -> Iterator[LLMCall]:
+    start = time.perf_counter()
+    try:
+        yield LLMCall(provider)
+    except Exception:
+        LLM_ERRORS.labels(provider).inc()
+        raise
+    finally:
+        LLM_REQUEST_SECONDS.labels(provider).observe(time.perf_counter() - start)
+
+
+def record_pipeline_span(span: Span):
+    PIPELINE_STAGE_SECONDS.labels(span.name).observe(span.duration)
+    rows = span.attributes.get("rows")
+    if rows:
+        PIPELINE_STAGE_ROWS.labels(span.name).inc(rows)
+
+
+def instrument_tracer(tracer: Tracer):
+    if record_pipeline_span not in tracer.listeners:
+        tracer.listeners.append(record_pipeline_span)
+
+
+def start_metrics_server(port: int):
+    # Prefork workers run tasks in child processes; with PROMETHEUS_MULTIPROC_DIR
+    # set, their samples are aggregated from the shared directory
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(port, registry=registry)
+    else:
+        start_http_server(port)
+
+
+def instrument_celery():
+    from celery.signals import task_postrun, task_prerun, worker_ready
+
+    start_times = {}
+
+    @worker_ready.connect(weak=False)
+    def on_worker_ready(**kwargs):
+        port = os.getenv("CELERY_METRICS_PORT")
+        if port:
+            start_metrics_server(int(port))
+
+    @task_prerun.connect(weak=False)
+    def on_task_prerun(task_id=None, **kwargs):
+        start_times[task_id] = time.perf_counter()
+
+    @task_postrun.connect(weak=False)
+    def on_task_postrun(task_id=None, task=None, state=None, **kwargs):
+        start = start_times.pop(task_id, None)
+        if start is None:
+            return
+        CELERY_TASK_SECONDS.labels(task.name, state or "UNKNOWN").observe(
+            time.perf_counter() - start
+        )
@@ -0,0 +1,157 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - optional dependency
+    otel_trace = None
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    end: Optional[float] = None
+    parent: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+    def set(self, key: str, value: Any) -> "Span":
+        self.attributes[key] = value
+        return self
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "parent": self.parent,
+            "duration_ms": self.duration * 1000,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+@dataclass
+class SpanStats:
+    count: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": self.total_seconds * 1000,
+            "avg_ms": self.total_seconds * 1000 / self.count if self.count else 0.0,
+            "max_ms": self.max_seconds * 1000,
+            "rows": self.rows,
+            "bytes": self.bytes,
+        }
+
+
+class InMemorySpanCollector:
+    """Keeps per-name aggregates and the most recent finished spans"""
+
+    def __init__(self, max_recent_spans: int = 500):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, SpanStats] = {}
+        self._recent: Deque[Span] = deque(maxlen=max_recent_spans)
+
+    def record(self, span: Span):
+        duration = span.duration
+        with self._lock:
+            stats = self._stats.setdefault(span.name, SpanStats())
+            stats.count += 1
+            stats.total_seconds += duration
+            stats.max_seconds = max(stats.max_seconds, duration)
+            stats.rows += int(span.attributes.get("rows", 0) or 0)
+            stats.bytes += int(span.attributes.get("bytes", 0) or 0)
+            if span.error:
+                stats.errors += 1
+            self._recent.append(span)
+
+    def summary(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self._stats.items()}
+
+    def recent(self, limit: int = 50) -> List[Dict]:
+        with self._lock:
+            return [span.to_dict() for span in list(self._recent)[-limit:]]
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self._recent.clear()
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class Tracer:
+    def __init__(
+        self,
+        collector: Optional[InMemorySpanCollector] = None,
+        otel_tracer: Any = None,
+    ):
+        self.collector = collector or InMemorySpanCollector()
+        self.otel_tracer = otel_tracer
+        self.listeners: List[Callable[[Span], None]] = []
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            start=time.perf_counter(),
+            parent=parent.name if parent else None,
+            attributes=dict(attributes),
+        )
+        token = _current_span.set(span)
+        otel_context = (
+            self.otel_tracer.start_as_current_span(name)
+            if self.otel_tracer is not None
+            else None
+        )
+        otel_span = otel_context.__enter__() if otel_context is not None else None
+        try:
+            yield span
+        except Exception as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end = time.perf_counter()
+            _current_span.reset(token)
+            self.collector.record(span)
+            for listener in self.listeners:
+                listener(span)
+            if otel_span is not None:
+                for key, value in span.attributes.items():
+                    otel_span.set_attribute(key, value)
+                if span.error:
+                    otel_span.set_attribute("error", span.error)
+                otel_context.__exit__(None, None, None)
+
+
+def create_tracer() -> Tracer:
+    otel_tracer = None
+    if otel_trace is not None and os.getenv("TRACING_OTEL_ENABLED") == "true":
+        otel_tracer = otel_trace.get_tracer("bank-statement-api")
+    return Tracer(otel_tracer=otel_tracer)
+
+
+tracer = create_tracer()
@@ -1,6 +1,7 @@
-from typing import List, Optional
+import hashlib
+from typing import Any, List, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 from ..models import Category
 from ..schemas import CategoryCreate
@@ -11,7 +12,37 @@ class CategoriesRepository:
         self.db = db
 
     def get_all(self, skip: int = 0, limit: int = 100) -> List[Category]:
-        return self.db.query(Category).offset(skip).limit(limit).all()
+        # Categorizers keep these beyond the request session that loaded them
+        return (
+            self.db.query(Category)
+            .options(selectinload(Category.subcategories))
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def get_all_rows(self, skip: int = 0, limit: int = 100) -> List[Any]:
+        """Same page as get_all, as plain rows for RowSerializer"""
+        return [
+            row._mapping
+            for row in self.db.query(
+                Category.id, Category.category_name, Category.parent_category_id
+            )
+            .offset(skip)
+            .limit(limit)
+            .all()
+        ]
+
+    def get_version(self) -> str:
+        """Changes whenever a category is added, renamed, moved or removed"""
+        rows = (
+            self.db.query(
+                Category.id, Category.category_name, Category.parent_category_id
+            )
+            .order_by(Category.id)
+            .all()
+        )
+        return hashlib.sha1(repr([tuple(row) for row in rows]).encode()).hexdigest()
 
     def get_by_id(self, category_id: int) -> Optional[Category]:
         return self.db.query(Category).filter(Category.id == category_id).first()
@@ -0,0 +1,69 @@
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..db import dialect_insert
+from ..models import SourceImportMark, Transaction
+
+
+class SourceImportMarksRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, source_id: int) -> Optional[SourceImportMark]:
+        return self.db.get(SourceImportMark, source_id)
+
+    def window_rows(self, source_id: int, start: date, end: date) -> List:
+        """(date, description, amount) of the source's transactions in the range"""
+        return (
+            self.db.query(Transaction.date, Transaction.description, Transaction.amount)
+            .filter(Transaction.source_id == source_id)
+            .filter(Transaction.date >= start)
+            .filter(Transaction.date <= end)
+            .all()
+        )
+
+    def save(
+        self,
+        source_id: int,
+        low_water_mark: date,
+        high_water_mark: date,
+        overlap_start: date,
+        overlap_fingerprint: str,
+    ) -> SourceImportMark:
+        """Creates or replaces the mark in one statement.
+
+        Of two imports recording at once, the last one wins; the mark then
+        covers less than was imported, which only costs lookups."""
+        values = {
+            "low_water_mark": low_water_mark,
+            "high_water_mark": high_water_mark,
+            "overlap_start": overlap_start,
+            "overlap_fingerprint": overlap_fingerprint,
+        }
+        statement = dialect_insert(self.db, SourceImportMark).values(
+            source_id=source_id, **values
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["source_id"], set_={**values, "updated_at": func.now()}
+        ).returning(SourceImportMark)
+        mark = self.db.scalars(
+            statement, execution_options={"populate_existing": True}
+        ).one()
+        self.db.commit()
+        return mark
+
+    def delete(self, source_id: int, covering: Optional[date] = None) -> None:
+        """Drops the source's mark, or only one whose range covers a date.
+
+        Runs in the caller's transaction, like the change that invalidates it."""
+        query = self.db.query(SourceImportMark).filter(
+            SourceImportMark.source_id == source_id
+        )
+        if covering is not None:
+            query = query.filter(SourceImportMark.low_water_mark <= covering).filter(
+                SourceImportMark.high_water_mark >= covering
+            )
+        query.delete(synchronize_session="fetch")
@@ -1,18 +1,34 @@
-from typing import List, Optional
+from typing import Any, List, Optional
 
 from sqlalchemy.orm import Session
 
 from ..models import Source
 from ..schemas import SourceCreate
+from .source_import_marks_repository import SourceImportMarksRepository
 
 
 class SourcesRepository:
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        import_marks_repository: Optional[SourceImportMarksRepository] = None,
+    ):
         self.db = db
+        self.import_marks = import_marks_repository or SourceImportMarksRepository(db)
 
     def get_all(self, skip: int = 0, limit: int = 100) -> List[Source]:
         return self.db.query(Source).offset(skip).limit(limit).all()
 
+    def get_all_rows(self, skip: int = 0, limit: int = 100) -> List[Any]:
+        """Same page as get_all, as plain rows for RowSerializer"""
+        return [
+            row._mapping
+            for row in self.db.query(Source.id, Source.name, Source.description)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        ]
+
     def get_by_id(self, source_id: int) -> Optional[Source]:
         return self.db.query(Source).filter(Source.id == source_id).first()
 
@@ -32,5 +48,6 @@ class SourcesRepository:
         return source
 
     def delete(self, source: Source) -> None:
+        self.import_marks.delete(source.id)
         self.db.delete(source)
         self.db.commit()
@@ -1,27 +1,47 @@
+import logging
 import uuid
-from typing import Dict, Optional
+from typing import Any, Dict, Iterator, List, Mapping, Optional
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from ..models import Statement
+from ..models import Statement, Transaction, UploadJob
+from ..storage.blob_store import BlobStore, create_blob_store
+
+logger = logging.getLogger("app")
+
+CONTENT_CHUNK_SIZE = 1024 * 1024
 
 
 class StatementRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, blob_store: Optional[BlobStore] = None):
         self.db = db
+        self.blob_store = blob_store or create_blob_store(db)
 
     def save(self, file_content: bytes, file_name: str) -> str:
-        statement_id = str(uuid.uuid4())
-        statement = Statement(
-            id=statement_id, file_name=file_name, content=file_content
-        )
+        # A delete of the same file waits until this statement is committed
+        with self.blob_store.lock(BlobStore.hash(file_content)):
+            blob = self.blob_store.put(file_content)
+            if blob.already_stored:
+                logger.info(
+                    f"Statement {file_name} was uploaded before ({blob.sha256})"
+                )
 
-        self.db.add(statement)
-        self.db.commit()
+            statement_id = str(uuid.uuid4())
+            statement = Statement(
+                id=statement_id,
+                file_name=file_name,
+                content_hash=blob.sha256,
+                size=blob.size,
+            )
+
+            self.db.add(statement)
+            self.db.commit()
 
         return statement_id
 
     def get_by_id(self, statement_id: str) -> Optional[Dict]:
+        """Metadata only; the file is read with iter_content or read_content"""
         statement = (
             self.db.query(Statement).filter(Statement.id == statement_id).first()
         )
@@ -32,10 +52,98 @@ class StatementRepository:
         return {
             "id": statement.id,
             "file_name": statement.file_name,
-            "content": statement.content,
+            "content_hash": statement.content_hash,
+            "size": statement.size,
             "created_at": statement.created_at,
         }
 
+    def iter_content(
+        self, statement_id: str, chunk_size: int = CONTENT_CHUNK_SIZE
+    ) -> Optional[Iterator[bytes]]:
+        """The statement file in chunks, or None if there is no such statement"""
+        content_hash = (
+            self.db.query(Statement.content_hash)
+            .filter(Statement.id == statement_id)
+            .scalar()
+        )
+        if content_hash is None:
+            return None
+        return self.blob_store.iter_content(content_hash, chunk_size)
+
+    def read_content(self, statement_id: str) -> Optional[bytes]:
+        chunks = self.iter_content(statement_id)
+        return None if chunks is None else b"".join(chunks)
+
+    def list_metadata(self, skip: int = 0, limit: int = 100) -> List[Mapping[str, Any]]:
+        """Newest statements first, with what their transactions cover"""
+        transactions = (
+            self.db.query(
+                Transaction.statement_id.label("statement_id"),
+                func.count(Transaction.id).label("row_count"),
+                func.min(Transaction.date).label("start_date"),
+                func.max(Transaction.date).label("end_date"),
+                func.min(Transaction.source_id).label("source_id"),
+            )
+            .filter(Transaction.statement_id.is_not(None))
+            .group_by(Transaction.statement_id)
+            .subquery()
+        )
+        query = (
+            self.db.query(
+                Statement.id.label("id"),
+                Statement.file_name.label("file_name"),
+                Statement.content_hash.label("content_hash"),
+                Statement.size.label("size"),
+                Statement.created_at.label("created_at"),
+                func.coalesce(transactions.c.row_count, 0).label("row_count"),
+                transactions.c.start_date.label("start_date"),
+                transactions.c.end_date.label("end_date"),
+                transactions.c.source_id.label("source_id"),
+            )
+            .outerjoin(transactions, transactions.c.statement_id == Statement.id)
+            .order_by(Statement.created_at.desc(), Statement.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return [row._mapping for row in query.all()]
+
+    def find_by_content_hash(self, content_hash: str) -> Optional[Statement]:
+        return (
+            self.db.query(Statement)
+            .filter(Statement.content_hash == content_hash)
+            .order_by(Statement.created_at.desc())
+            .first()
+        )
+
+    def find_analyzed(self, content_hash: str) -> Optional[Statement]:
+        """The latest statement with this file that has an analysis to replay"""
+        return (
+            self.db.query(Statement)
+            .filter(Statement.content_hash == content_hash)
+            .filter(Statement.analysis.is_not(None))
+            .order_by(Statement.created_at.desc())
+            .first()
+        )
+
+    def save_analysis(self, statement_id: str, analysis: Dict) -> None:
+        self.db.query(Statement).filter(Statement.id == statement_id).update(
+            {Statement.analysis: analysis}, synchronize_session=False
+        )
+        self.db.commit()
+
+    def get_import_result(self, statement_id: str) -> Optional[Dict]:
+        return (
+            self.db.query(Statement.import_result)
+            .filter(Statement.id == statement_id)
+            .scalar()
+        )
+
+    def save_import_result(self, statement_id: str, import_result: Dict) -> None:
+        self.db.query(Statement).filter(Statement.id == statement_id).update(
+            {Statement.import_result: import_result}, synchronize_session=False
+        )
+        self.db.commit()
+
     def get_all(self, skip: int = 0, limit: int = 100) -> list[Statement]:
         return (
             self.db.query(Statement)
@@ -53,7 +161,18 @@ class StatementRepository:
         if not statement:
             return False
 
+        content_hash = statement.content_hash
+        # Jobs only exist to upload this statement, so they go with it
+        self.db.query(UploadJob).filter(UploadJob.statement_id == statement_id).delete(
+            synchronize_session=False
+        )
         self.db.delete(statement)
         self.db.commit()
 
+        # Other statements may point at the same file, or be saving it now
+        with self.blob_store.lock(content_hash):
+            if not self.find_by_content_hash(content_hash):
+                self.blob_store.delete(content_hash)
+            self.db.commit()
+
         return True
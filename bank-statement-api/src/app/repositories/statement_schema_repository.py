@@ -1,6 +1,7 @@
 import uuid
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from ..models import StatementSchemaMapping
@@ -23,7 +24,15 @@ class StatementSchemaRepository:
             schema.statement_id = schema_data["statement_id"]
 
         self.db.add(schema)
-        self.db.commit()
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # A concurrent analysis of the same layout saved it first
+            self.db.rollback()
+            existing = self.find_by_statement_hash(schema_data["statement_hash"])
+            if existing is None:
+                raise
+            return existing.id
 
         return schema_id
 
@@ -52,6 +61,15 @@ class StatementSchemaRepository:
             .all()
         )
 
+    def list_schema_data(self) -> List[Dict]:
+        """The schema_data of every stored schema, newest first"""
+        return [
+            schema_data
+            for (schema_data,) in self.db.query(
+                StatementSchemaMapping.schema_data
+            ).order_by(StatementSchemaMapping.created_at.desc())
+        ]
+
     def update(
         self, statement_id: str, schema_data: Dict
     ) -> Optional[StatementSchemaMapping]:
@@ -0,0 +1,248 @@
+import calendar
+import logging
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import Date, case, cast, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..db import dialect_insert
+from ..models import Transaction, TransactionMonthlyRollup
+from ..schemas import AggregateGroupBy
+
+logger = logging.getLogger("app")
+
+KEY_INDEX = next(
+    index
+    for index in TransactionMonthlyRollup.__table__.indexes
+    if index.name == "ix_transaction_monthly_rollups_key"
+)
+
+
+class RollupKey(NamedTuple):
+    month: date
+    source_id: int
+    category_id: Optional[int]
+    sub_category_id: Optional[int]
+    currency: Optional[str]
+
+
+class RollupEntry(NamedTuple):
+    key: RollupKey
+    amount: Decimal
+
+
+def rollup_entry(transaction) -> RollupEntry:
+    key = RollupKey(
+        month=transaction.date.replace(day=1),
+        source_id=transaction.source_id,
+        category_id=transaction.category_id,
+        sub_category_id=transaction.sub_category_id,
+        currency=transaction.currency,
+    )
+    return RollupEntry(key, Decimal(str(transaction.amount or 0)))
+
+
+def _sort_key(key: RollupKey):
+    return (
+        key.month,
+        key.source_id,
+        key.category_id or 0,
+        key.sub_category_id or 0,
+        key.currency or "",
+    )
+
+
+def covers_whole_months(start_date: Optional[date], end_date: Optional[date]) -> bool:
+    if start_date and start_date.day != 1:
+        return False
+    if end_date:
+        last_day = calendar.monthrange(end_date.year, end_date.month)[1]
+        if end_date.day != last_day:
+            return False
+    return True
+
+
+class TransactionRollupsRepository:
+    """Monthly totals per (month, source, category, sub category, currency).
+
+    Changes are applied as upserts in the caller's transaction and committed
+    with the transactions they describe; a key left with nothing is deleted."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record(
+        self,
+        added: Iterable[RollupEntry] = (),
+        removed: Iterable[RollupEntry] = (),
+    ) -> None:
+        deltas: Dict[RollupKey, List] = defaultdict(
+            lambda: [0, Decimal(0), Decimal(0), Decimal(0)]
+        )
+        for sign, entries in ((1, added), (-1, removed)):
+            for key, amount in entries:
+                delta = deltas[key]
+                delta[0] += sign
+                delta[1] += sign * amount
+                if amount > 0:
+                    delta[2] += sign * amount
+                else:
+                    delta[3] -= sign * amount
+
+        # Upserts lock rows in key order, so concurrent writers cannot deadlock
+        months = set()
+        for key in sorted(deltas, key=_sort_key):
+            count, total, inflow, outflow = deltas[key]
+            if count == 0 and total == 0 and inflow == 0 and outflow == 0:
+                continue
+            statement = dialect_insert(self.db, TransactionMonthlyRollup).values(
+                **key._asdict(),
+                count=count,
+                total=total,
+                inflow=inflow,
+                outflow=outflow,
+            )
+            self.db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=KEY_INDEX.expressions,
+                    set_={
+                        column: getattr(TransactionMonthlyRollup, column)
+                        + statement.excluded[column]
+                        for column in ("count", "total", "inflow", "outflow")
+                    },
+                )
+            )
+            months.add(key.month)
+
+        if months:
+            self.db.query(TransactionMonthlyRollup).filter(
+                TransactionMonthlyRollup.month.in_(months),
+                TransactionMonthlyRollup.count == 0,
+                TransactionMonthlyRollup.total == 0,
+                TransactionMonthlyRollup.inflow == 0,
+                TransactionMonthlyRollup.outflow == 0,
+            ).delete(synchronize_session=False)
+
+    def persisted_entry(self, transaction_id: int) -> Optional[RollupEntry]:
+        """The entry as stored, ignoring changes not flushed yet.
+
+        An expired instance does not keep its old values when an attribute is
+        set, so they have to be read back from the database."""
+        with self.db.no_autoflush:
+            row = (
+                self.db.query(
+                    Transaction.date,
+                    Transaction.source_id,
+                    Transaction.category_id,
+                    Transaction.sub_category_id,
+                    Transaction.currency,
+                    Transaction.amount,
+                )
+                .filter(Transaction.id == transaction_id)
+                .first()
+            )
+        return rollup_entry(row) if row else None
+
+    def move(self, before: Optional[RollupEntry], after: RollupEntry) -> None:
+        if before is None:
+            self.record(added=[after])
+            return
+        if before != after:
+            self.record(added=[after], removed=[before])
+
+    def aggregate(
+        self,
+        group_by: List[AggregateGroupBy],
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None,
+        sub_category_id: Optional[int] = None,
+        source_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Same result as TransactionsRepository.aggregate for whole months"""
+        keys = [key if key == "month" else f"{key}_id" for key in group_by]
+        group_columns = [getattr(TransactionMonthlyRollup, key) for key in keys]
+
+        query = self.db.query(
+            *group_columns,
+            func.coalesce(func.sum(TransactionMonthlyRollup.count), 0).label("count"),
+            func.coalesce(func.sum(TransactionMonthlyRollup.total), 0).label("total"),
+            func.coalesce(func.sum(TransactionMonthlyRollup.inflow), 0).label("inflow"),
+            func.coalesce(func.sum(TransactionMonthlyRollup.outflow), 0).label(
+                "outflow"
+            ),
+        )
+        if start_date:
+            query = query.filter(TransactionMonthlyRollup.month >= start_date)
+        if end_date:
+            query = query.filter(TransactionMonthlyRollup.month <= end_date)
+        if category_id:
+            query = query.filter(TransactionMonthlyRollup.category_id == category_id)
+        if sub_category_id:
+            query = query.filter(
+                TransactionMonthlyRollup.sub_category_id == sub_category_id
+            )
+        if source_id:
+            query = query.filter(TransactionMonthlyRollup.source_id == source_id)
+        if group_columns:
+            query = query.group_by(*group_columns).order_by(*group_columns)
+
+        rows = []
+        for row in query.all():
+            values = row._asdict()
+            if "month" in values:
+                values["month"] = values["month"].strftime("%Y-%m")
+            rows.append(values)
+        return rows
+
+    def rebuild(self) -> int:
+        """Recomputes every rollup from the transactions table"""
+        month = self._month_start(Transaction.date)
+        columns = [
+            month,
+            Transaction.source_id,
+            Transaction.category_id,
+            Transaction.sub_category_id,
+            Transaction.currency,
+        ]
+        totals = select(
+            *columns,
+            func.count(Transaction.id),
+            func.coalesce(func.sum(Transaction.amount), 0),
+            func.coalesce(func.sum(_positive(Transaction.amount)), 0),
+            func.coalesce(func.sum(_positive(-Transaction.amount)), 0),
+        ).group_by(*columns)
+
+        self.db.query(TransactionMonthlyRollup).delete()
+        self.db.execute(
+            insert(TransactionMonthlyRollup).from_select(
+                [
+                    "month",
+                    "source_id",
+                    "category_id",
+                    "sub_category_id",
+                    "currency",
+                    "count",
+                    "total",
+                    "inflow",
+                    "outflow",
+                ],
+                totals,
+            )
+        )
+        self.db.commit()
+        count = self.db.query(TransactionMonthlyRollup).count()
+        logger.info(f"Rebuilt {count} monthly rollups")
+        return count
+
+    def _month_start(self, column):
+        if self.db.get_bind().dialect.name == "sqlite":
+            return func.date(column, "start of month")
+        return cast(func.date_trunc("month", column), Date)
+
+
+def _positive(amount):
+    return case((amount > 0, amount), else_=0)
@@ -1,15 +1,56 @@
 import logging
+import os
 from dataclasses import dataclass
 from datetime import date, datetime
-from typing import List, Optional, Tuple
+from typing import Any, Collection, Dict, Iterator, List, Optional, Set, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session, aliased
 
-from ..models import Transaction
-from ..schemas import StatementTransaction, TransactionCreate
+from ..db import dialect_insert
+from ..models import Category, Source, Transaction
+from ..schemas import AggregateGroupBy, StatementTransaction, TransactionCreate
+from .source_import_marks_repository import SourceImportMarksRepository
+from .transaction_rollups_repository import (
+    TransactionRollupsRepository,
+    covers_whole_months,
+    rollup_entry,
+)
 
 logger = logging.getLogger("app")
 
+# Pending rows no categorizer had an answer for this many times are left alone
+MAX_CATEGORIZATION_ATTEMPTS = int(os.getenv("CATEGORIZATION_MAX_ATTEMPTS", "3"))
+
+
+EXPORT_COLUMNS = [
+    "id",
+    "date",
+    "description",
+    "amount",
+    "currency",
+    "source",
+    "category",
+    "sub_category",
+    "categorization_status",
+]
+
+
+TRANSACTION_FIELDS = [
+    "id",
+    "date",
+    "description",
+    "amount",
+    "currency",
+    "source_id",
+    "category_id",
+    "sub_category_id",
+    "categorization_status",
+    "normalized_description",
+]
+CATEGORY_FIELDS = ["id", "category_name", "parent_category_id"]
+SOURCE_FIELDS = ["id", "name", "description"]
+
 
 @dataclass
 class TransactionsFilter:
@@ -23,14 +64,128 @@ class TransactionsFilter:
 
 
 class TransactionsRepository:
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        rollups_repository: Optional[TransactionRollupsRepository] = None,
+        import_marks_repository: Optional[SourceImportMarksRepository] = None,
+    ):
         self.db = db
+        self.rollups = rollups_repository or TransactionRollupsRepository(db)
+        self.import_marks = import_marks_repository or SourceImportMarksRepository(db)
 
     def get_all(
         self, filter: TransactionsFilter, skip: int = 0, limit: int = 100
     ) -> List[Transaction]:
-        query = self.db.query(Transaction)
+        query = self._apply_filter(self.db.query(Transaction), filter)
+        query = query.order_by(Transaction.date.desc())
+
+        return query.offset(skip).limit(limit).all()
+
+    def get_all_rows(
+        self, filter: TransactionsFilter, skip: int = 0, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Same page as get_all, as plain rows for RowSerializer"""
+        category = aliased(Category)
+        columns = [
+            *(getattr(Transaction, name).label(name) for name in TRANSACTION_FIELDS),
+            *(
+                getattr(category, name).label(f"category__{name}")
+                for name in CATEGORY_FIELDS
+            ),
+            *(getattr(Source, name).label(f"source__{name}") for name in SOURCE_FIELDS),
+        ]
+        query = (
+            self.db.query(*columns)
+            .outerjoin(category, Transaction.category_id == category.id)
+            .outerjoin(Source, Transaction.source_id == Source.id)
+        )
+        query = self._apply_filter(query, filter).order_by(Transaction.date.desc())
+        return [row._mapping for row in query.offset(skip).limit(limit).all()]
+
+    def stream_for_export(
+        self, filter: TransactionsFilter, batch_size: int = 1000
+    ) -> Iterator[Tuple]:
+        """Plain rows in EXPORT_COLUMNS order, fetched batch_size at a time"""
+        category = aliased(Category)
+        sub_category = aliased(Category)
+        query = (
+            self.db.query(
+                Transaction.id,
+                Transaction.date,
+                Transaction.description,
+                Transaction.amount,
+                Transaction.currency,
+                Source.name,
+                category.category_name,
+                sub_category.category_name,
+                Transaction.categorization_status,
+            )
+            .outerjoin(Source, Transaction.source_id == Source.id)
+            .outerjoin(category, Transaction.category_id == category.id)
+            .outerjoin(sub_category, Transaction.sub_category_id == sub_category.id)
+        )
+        query = self._apply_filter(query, filter)
+        # yield_per also turns on stream_results, i.e. a server-side cursor on
+        # Postgres, so the whole result never sits in memory
+        query = query.order_by(Transaction.date, Transaction.id).yield_per(batch_size)
+        for row in query:
+            yield tuple(row)
+
+    def aggregate(
+        self, filter: TransactionsFilter, group_by: List[AggregateGroupBy]
+    ) -> List[Dict[str, Any]]:
+        """Count, total, inflow and outflow (as a positive amount) per group"""
+        if (
+            not filter.search
+            and not filter.categorization_status
+            and covers_whole_months(filter.start_date, filter.end_date)
+        ):
+            return self.rollups.aggregate(
+                list(dict.fromkeys(group_by)),
+                start_date=filter.start_date,
+                end_date=filter.end_date,
+                category_id=filter.category_id,
+                sub_category_id=filter.sub_category_id,
+                source_id=filter.source_id,
+            )
+
+        columns = {
+            "month": self._month(),
+            "category_id": Transaction.category_id,
+            "sub_category_id": Transaction.sub_category_id,
+            "source_id": Transaction.source_id,
+        }
+        keys = [
+            key if key == "month" else f"{key}_id" for key in dict.fromkeys(group_by)
+        ]
+        group_columns = [columns[key].label(key) for key in keys]
+
+        query = self.db.query(
+            *group_columns,
+            func.count(Transaction.id).label("count"),
+            func.coalesce(func.sum(Transaction.amount), 0).label("total"),
+            func.coalesce(
+                func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)),
+                0,
+            ).label("inflow"),
+            func.coalesce(
+                func.sum(case((Transaction.amount < 0, -Transaction.amount), else_=0)),
+                0,
+            ).label("outflow"),
+        )
+        query = self._apply_filter(query, filter)
+        if group_columns:
+            query = query.group_by(*group_columns).order_by(*group_columns)
+
+        return [row._asdict() for row in query.all()]
+
+    def _month(self):
+        if self.db.get_bind().dialect.name == "sqlite":
+            return func.strftime("%Y-%m", Transaction.date)
+        return func.to_char(Transaction.date, "YYYY-MM")
 
+    def _apply_filter(self, query, filter: TransactionsFilter):
         if filter.start_date:
             query = query.filter(Transaction.date >= filter.start_date)
         if filter.end_date:
@@ -47,10 +202,7 @@ class TransactionsRepository:
             query = query.filter(
                 Transaction.categorization_status == filter.categorization_status
             )
-
-        query = query.order_by(Transaction.date.desc())
-
-        return query.offset(skip).limit(limit).all()
+        return query
 
     def get_by_id(self, transaction_id: int) -> Optional[Transaction]:
         return (
@@ -60,6 +212,14 @@ class TransactionsRepository:
     def get_by_source_id(self, source_id: int):
         return self.db.query(Transaction).filter(Transaction.source_id == source_id)
 
+    def get_by_statement_id(self, statement_id: str) -> List[Transaction]:
+        return (
+            self.db.query(Transaction)
+            .filter(Transaction.statement_id == statement_id)
+            .order_by(Transaction.id)
+            .all()
+        )
+
     def get_by_ids(self, transaction_ids: List[int]) -> List[Transaction]:
         return (
             self.db.query(Transaction).filter(Transaction.id.in_(transaction_ids)).all()
@@ -80,19 +240,29 @@ class TransactionsRepository:
             date=transaction.date,
             normalized_description=transaction.normalized_description,
             categorization_status=transaction.categorization_status,
+            statement_id=transaction.statement_id,
         )
         self.db.add(db_transaction)
+        self.rollups.record(added=[rollup_entry(db_transaction)])
         if auto_commit:
             self.db.commit()
         return db_transaction
 
     def update(self, transaction: Transaction) -> Transaction:
+        self.rollups.move(
+            self.rollups.persisted_entry(transaction.id), rollup_entry(transaction)
+        )
         transaction.dt_updated = datetime.now()
         self.db.add(transaction)
         self.db.commit()
         return transaction
 
     def delete(self, transaction: Transaction) -> None:
+        persisted = self.rollups.persisted_entry(transaction.id)
+        if persisted:
+            self.rollups.record(removed=[persisted])
+        # Otherwise the mark would reject the row when it is imported again
+        self.import_marks.delete(transaction.source_id, covering=transaction.date)
         self.db.delete(transaction)
         self.db.commit()
 
@@ -100,14 +270,33 @@ class TransactionsRepository:
         self.db.commit()
 
     def get_uncategorized_transactions(
-        self, batch_size: int = 100
+        self, batch_size: int = 100, exclude_ids: Collection[int] = ()
     ) -> List[Transaction]:
+        query = self._pending()
+        if exclude_ids:
+            query = query.filter(Transaction.id.not_in(exclude_ids))
+        return query.limit(batch_size).all()
+
+    def count_pending(self) -> int:
+        return self._pending().count()
+
+    def _pending(self):
         return (
             self.db.query(Transaction)
             .filter(Transaction.categorization_status == "pending")
-            .limit(batch_size)
-            .all()
+            .filter(Transaction.categorization_attempts < MAX_CATEGORIZATION_ATTEMPTS)
+        )
+
+    def record_unresolved(self, transaction_ids: Collection[int]) -> None:
+        """Counts an attempt for rows that stay pending without a category"""
+        self.db.query(Transaction).filter(Transaction.id.in_(transaction_ids)).update(
+            {
+                Transaction.categorization_attempts: Transaction.categorization_attempts
+                + 1
+            },
+            synchronize_session=False,
         )
+        self.db.commit()
 
     def update_transaction_category(
         self,
@@ -118,9 +307,11 @@ class TransactionsRepository:
     ) -> Transaction:
         transaction = self.get_by_id(transaction_id)
         if transaction:
+            before = rollup_entry(transaction)
             transaction.category_id = category_id
             transaction.sub_category_id = sub_category_id
             transaction.categorization_status = status
+            self.rollups.move(before, rollup_entry(transaction))
             self.db.add(transaction)
             self.db.commit()
         return transaction
@@ -128,8 +319,6 @@ class TransactionsRepository:
     def get_unique_normalized_descriptions(
         self, limit: int = 100
     ) -> List[Tuple[str, int]]:
-        from sqlalchemy import func
-
         subquery = (
             self.db.query(
                 Transaction.normalized_description,
@@ -179,6 +368,7 @@ class TransactionsRepository:
             self.db.add(db_transaction)
             db_transactions.append(db_transaction)
 
+        self.rollups.record(added=[rollup_entry(t) for t in db_transactions])
         self.db.commit()
 
         # Refresh all transactions to get their generated IDs
@@ -187,6 +377,48 @@ class TransactionsRepository:
 
         return db_transactions
 
+    def insert_new(self, transactions: List[TransactionCreate]) -> List[Transaction]:
+        """Inserts the rows whose fingerprint is not stored yet, in one statement.
+
+        Uses INSERT ... ON CONFLICT DO NOTHING RETURNING, so rows inserted by a
+        concurrent import are skipped rather than duplicated or failing."""
+        if not transactions:
+            return []
+
+        statement = (
+            dialect_insert(self.db, Transaction)
+            .on_conflict_do_nothing(index_elements=["fingerprint"])
+            .returning(Transaction)
+        )
+        inserted = list(
+            self.db.scalars(statement, [t.model_dump() for t in transactions])
+        )
+        self.rollups.record(added=[rollup_entry(t) for t in inserted])
+        ids = [transaction.id for transaction in inserted]
+        self.db.commit()
+
+        if not ids:
+            return []
+        return (
+            self.db.query(Transaction)
+            .filter(Transaction.id.in_(ids))
+            .order_by(Transaction.id)
+            .all()
+        )
+
+    def existing_fingerprints(self, fingerprints: List[str]) -> Set[str]:
+        """The given fingerprints that are already stored"""
+        existing: Set[str] = set()
+        for start in range(0, len(fingerprints), 1000):
+            batch = fingerprints[start : start + 1000]
+            existing.update(
+                fingerprint
+                for (fingerprint,) in self.db.query(Transaction.fingerprint).filter(
+                    Transaction.fingerprint.in_(batch)
+                )
+            )
+        return existing
+
     def get_transactions_by_normalized_description(
         self, normalized_description: str, limit: int = 100
     ) -> List[Transaction]:
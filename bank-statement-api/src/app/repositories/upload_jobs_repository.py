@@ -0,0 +1,88 @@
+import uuid
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models import UploadJob
+
+JOB_FIELDS = [
+    "id",
+    "statement_id",
+    "status",
+    "stage",
+    "rows_parsed",
+    "rows_inserted",
+    "duplicates",
+    "result",
+    "error",
+    "created_at",
+    "updated_at",
+]
+
+
+class UploadJobsRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create(
+        self,
+        statement_id: str,
+        spec: Dict[str, Any],
+        auto_categorize: bool = True,
+        backend: str = "thread",
+    ) -> str:
+        job = UploadJob(
+            id=str(uuid.uuid4()),
+            statement_id=statement_id,
+            spec=spec,
+            auto_categorize=auto_categorize,
+            backend=backend,
+            status="queued",
+            rows_parsed=0,
+            rows_inserted=0,
+            duplicates=0,
+        )
+        self.db.add(job)
+        self.db.commit()
+        return job.id
+
+    def get(self, job_id: str) -> Optional[UploadJob]:
+        return self.db.get(UploadJob, job_id)
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job without its spec, read fresh from the database"""
+        row = (
+            self.db.query(*(getattr(UploadJob, name) for name in JOB_FIELDS))
+            .filter(UploadJob.id == job_id)
+            .first()
+        )
+        # Pollers call this for as long as a job runs; ending the transaction
+        # hands the connection back to the pool in between
+        self.db.commit()
+        return dict(row._mapping) if row is not None else None
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        self.db.query(UploadJob).filter(UploadJob.id == job_id).update(
+            fields, synchronize_session=False
+        )
+        self.db.commit()
+
+    def fail_stale(self, backend: str, idle_seconds: float, error: str) -> int:
+        """Fails the backend's queued and running jobs that have not changed
+        for idle_seconds"""
+        # updated_at is set by the database, so the cutoff comes from its clock
+        cutoff = self.db.scalar(select(func.now())) - timedelta(seconds=idle_seconds)
+        count = (
+            self.db.query(UploadJob)
+            .filter(UploadJob.backend == backend)
+            .filter(UploadJob.status.in_(("queued", "running")))
+            .filter(UploadJob.updated_at < cutoff)
+            .update({"status": "failed", "error": error}, synchronize_session=False)
+        )
+        self.db.commit()
+        return count
+
+    def rollback(self) -> None:
+        self.db.rollback()
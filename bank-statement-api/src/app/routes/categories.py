@@ -4,11 +4,14 @@ from typing import Callable, List, Optional
 
 from fastapi import APIRouter, File, HTTPException, UploadFile
 
+from ..common.fast_json import RowSerializer
 from ..models import Category
 from ..repositories.categories_repository import CategoriesRepository
 from ..schemas import Category as CategorySchema
 from ..schemas import CategoryCreate
 
+categories_json = RowSerializer(CategorySchema)
+
 # Callback type for category changes
 CategoryChangeCallback = Callable[[str, List[Category]], None]
 
@@ -57,17 +60,16 @@ class CategoryRouter:
         if self.on_change_callback:
             self.on_change_callback(action, categories)
 
-    async def get_categories(self):
-        categories = self.categories_repository.get_all()
-        return categories
+    def get_categories(self):
+        return categories_json.response(self.categories_repository.get_all_rows())
 
-    async def get_category(self, category_id: int):
+    def get_category(self, category_id: int):
         category = self.categories_repository.get_by_id(category_id)
         if category is None:
             raise HTTPException(status_code=404, detail="Category not found")
         return category
 
-    async def create_category(self, category: CategoryCreate):
+    def create_category(self, category: CategoryCreate):
         db_category = self.categories_repository.get_by_name(category.category_name)
         if db_category:
             raise HTTPException(
@@ -83,10 +85,10 @@ class CategoryRouter:
 
         return new_category
 
-    async def import_categories_from_csv(self, file: UploadFile = File(...)):
+    def import_categories_from_csv(self, file: UploadFile = File(...)):
         """Import categories from a CSV file"""
         try:
-            contents = await file.read()
+            contents = file.file.read()
             csv_file = io.StringIO(contents.decode("utf-8"))
             csv_reader = csv.reader(csv_file)
 
@@ -1,12 +1,17 @@
+import asyncio
+import os
+import threading
+from typing import Optional
+
 from fastapi import APIRouter
 
 from ..repositories.categories_repository import CategoriesRepository
 from ..repositories.transactions_repository import TransactionsRepository
+from ..services.categorizers.cascade import CascadeTransactionCategorizer
 from ..services.categorizers.transaction_categorizer import TransactionCategorizer
 from ..services.transaction_categorization_service import (
     TransactionCategorizationService,
 )
-from ..tasks.categorization import manually_trigger_categorization
 
 
 class CategorizationRouter:
@@ -15,6 +20,7 @@ class CategorizationRouter:
         transactions_repository: TransactionsRepository,
         categories_repository: CategoriesRepository,
         categorizer: TransactionCategorizer,
+        process_now_max_seconds: Optional[float] = None,
     ):
         self.router = APIRouter(
             prefix="/categorization",
@@ -37,16 +43,30 @@ class CategorizationRouter:
             self.process_categorization_now,
             methods=["POST"],
         )
+        self.router.add_api_route(
+            "/stats",
+            self.get_categorization_stats,
+            methods=["GET"],
+        )
 
         self.transactions_repository = transactions_repository
         self.categories_repository = categories_repository
         self.categorizer = categorizer
+        self.process_now_max_seconds = process_now_max_seconds or float(
+            os.getenv("CATEGORIZATION_PROCESS_NOW_MAX_SECONDS", "30")
+        )
+        # Async LLM clients bind to the loop they first run on, so keep one;
+        # it runs one drain at a time, off the server's event loop
+        self.loop = asyncio.new_event_loop()
+        self.loop_lock = threading.Lock()
+
+    def trigger_categorization(self, batch_size: int = 10):
+        from ..tasks.categorization import manually_trigger_categorization
 
-    async def trigger_categorization(self, batch_size: int = 10):
         task = manually_trigger_categorization(batch_size)
         return {"message": "Categorization process triggered", "task_id": task.id}
 
-    async def get_categorization_status(self, task_id: str):
+    def get_categorization_status(self, task_id: str):
         from ..celery_app import celery_app
 
         task = celery_app.AsyncResult(task_id)
@@ -59,7 +79,9 @@ class CategorizationRouter:
             response["result"] = task.result
         return response
 
-    async def process_categorization_now(self):
+    def process_categorization_now(self):
+        """Drains pending transactions for up to
+        CATEGORIZATION_PROCESS_NOW_MAX_SECONDS; the rest stays pending"""
         categorization_service = TransactionCategorizationService(
             self.categories_repository,
             self.transactions_repository,
@@ -67,11 +89,18 @@ class CategorizationRouter:
         )
 
         batch_size = 100
-        categorized_count = (
-            await categorization_service.categorize_pending_transactions(batch_size)
-        )
+        with self.loop_lock:
+            result = self.loop.run_until_complete(
+                categorization_service.drain(batch_size, self.process_now_max_seconds)
+            )
 
         return {
             "message": "Categorization completed",
-            "categorized_count": categorized_count,
+            "categorized_count": result.categorized,
         }
+
+    async def get_categorization_stats(self):
+        if not isinstance(self.categorizer, CascadeTransactionCategorizer):
+            return {"stages": []}
+
+        return {"stages": [stats.to_dict() for stats in self.categorizer.get_stats()]}
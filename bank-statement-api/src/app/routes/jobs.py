@@ -0,0 +1,133 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from ..logging.utils import log_exception
+from ..repositories.statement_repository import StatementRepository
+from ..repositories.upload_jobs_repository import UploadJobsRepository
+from ..schemas import UploadFileSpec, UploadJobStatus, UploadStatementRequest
+from ..services.file_processing.upload_job_service import (
+    TERMINAL_STATUSES,
+    UploadJobService,
+)
+
+# Proxies drop event streams that stay silent for too long
+KEEPALIVE_SECONDS = 15.0
+
+
+class JobRouter:
+    def __init__(
+        self,
+        jobs_repository: UploadJobsRepository,
+        upload_job_service: UploadJobService,
+        statement_repository: StatementRepository,
+        poll_seconds: Optional[float] = None,
+        max_stream_seconds: Optional[float] = None,
+    ):
+        self.router = APIRouter(
+            prefix="/jobs",
+            tags=["jobs"],
+        )
+        self.jobs_repository = jobs_repository
+        self.upload_job_service = upload_job_service
+        self.statement_repository = statement_repository
+        self.poll_seconds = poll_seconds or float(
+            os.getenv("JOB_EVENTS_POLL_SECONDS", "0.5")
+        )
+        # A job that never finishes must not hold a connection forever;
+        # EventSource clients reconnect on their own when a stream ends
+        self.max_stream_seconds = max_stream_seconds or float(
+            os.getenv("JOB_EVENTS_MAX_SECONDS", "600")
+        )
+
+        self.router.add_api_route(
+            "/uploads",
+            self.submit_upload,
+            methods=["POST"],
+            response_model=UploadJobStatus,
+            status_code=202,
+        )
+        self.router.add_api_route(
+            "/{job_id}",
+            self.get_job,
+            methods=["GET"],
+            response_model=UploadJobStatus,
+        )
+        self.router.add_api_route(
+            "/{job_id}/events",
+            self.get_job_events,
+            methods=["GET"],
+            response_class=StreamingResponse,
+        )
+
+    def submit_upload(
+        self,
+        request: UploadStatementRequest,
+        auto_categorize: bool = Query(
+            True, description="Automatically trigger categorization after upload"
+        ),
+    ):
+        """Same as POST /transactions/upload, but returns once the job is queued"""
+        if self.statement_repository.get_by_id(request.statement_id) is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Statement with ID {request.statement_id} not found",
+            )
+        spec = UploadFileSpec(
+            statement_id=request.statement_id,
+            statement_schema=request.statement_schema,
+        )
+        try:
+            job_id = self.upload_job_service.submit(spec, auto_categorize)
+        except Exception as e:
+            log_exception(f"Error submitting upload job: {str(e)}")
+            raise HTTPException(
+                status_code=503, detail=f"Error submitting upload job: {str(e)}"
+            )
+        return self._get_status(job_id)
+
+    def get_job(self, job_id: str):
+        return self._get_status(job_id)
+
+    async def get_job_events(self, job_id: str):
+        """Server-sent events with the job's status, until it finishes or
+        JOB_EVENTS_MAX_SECONDS pass"""
+        job = await run_in_threadpool(self.jobs_repository.get_status, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return StreamingResponse(
+            self._events(job_id, job),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def _events(self, job_id: str, job: Dict[str, Any]) -> AsyncIterator[str]:
+        last = None
+        silent = 0.0
+        elapsed = 0.0
+        while job is not None:
+            if job != last:
+                status = UploadJobStatus.model_validate(job)
+                yield f"data: {status.model_dump_json(by_alias=True)}\n\n"
+                last = job
+                silent = 0.0
+            elif silent >= KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                silent = 0.0
+            if job["status"] in TERMINAL_STATUSES or elapsed >= self.max_stream_seconds:
+                return
+
+            await asyncio.sleep(self.poll_seconds)
+            silent += self.poll_seconds
+            elapsed += self.poll_seconds
+            job = await run_in_threadpool(self.jobs_repository.get_status, job_id)
+
+    def _get_status(self, job_id: str) -> UploadJobStatus:
+        job = self.jobs_repository.get_status(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return UploadJobStatus.model_validate(job)
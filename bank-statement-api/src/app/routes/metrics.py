@@ -0,0 +1,44 @@
+from typing import Optional
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from ..observability.metrics import CATEGORIZATION_PENDING, render_latest
+from ..observability.tracing import Tracer
+from ..repositories.transactions_repository import TransactionsRepository
+
+
+class MetricsRouter:
+    def __init__(
+        self,
+        tracer: Tracer,
+        transactions_repository: Optional[TransactionsRepository] = None,
+    ):
+        self.router = APIRouter(
+            prefix="/metrics",
+            tags=["metrics"],
+        )
+        self.tracer = tracer
+        self.transactions_repository = transactions_repository
+
+        self.router.add_api_route(
+            "",
+            self.get_metrics,
+            methods=["GET"],
+        )
+        self.router.add_api_route(
+            "/pipeline",
+            self.get_pipeline_metrics,
+            methods=["GET"],
+        )
+
+    def get_metrics(self):
+        if self.transactions_repository is not None:
+            CATEGORIZATION_PENDING.set(self.transactions_repository.count_pending())
+        return Response(content=render_latest(), media_type=CONTENT_TYPE_LATEST)
+
+    async def get_pipeline_metrics(self, recent: int = 0):
+        response = {"spans": self.tracer.collector.summary()}
+        if recent > 0:
+            response["recent_spans"] = self.tracer.collector.recent(recent)
+        return response
@@ -4,11 +4,14 @@ from typing import Callable, List, Optional
 
 from fastapi import APIRouter, File, HTTPException, UploadFile
 
+from ..common.fast_json import RowSerializer
 from ..models import Source
 from ..repositories.sources_repository import SourcesRepository
 from ..schemas import Source as SourceSchema
 from ..schemas import SourceCreate
 
+sources_json = RowSerializer(SourceSchema)
+
 
 class SourceRouter:
     def __init__(
@@ -56,15 +59,14 @@ class SourceRouter:
         if self.on_change_callback:
             self.on_change_callback(action, sources)
 
-    async def get_sources(
+    def get_sources(
         self,
         skip: int = 0,
         limit: int = 100,
     ):
-        sources = self.source_repository.get_all(skip, limit)
-        return sources
+        return sources_json.response(self.source_repository.get_all_rows(skip, limit))
 
-    async def get_source(
+    def get_source(
         self,
         source_id: int,
     ):
@@ -73,7 +75,7 @@ class SourceRouter:
             raise HTTPException(status_code=404, detail="Source not found")
         return source
 
-    async def create_source(
+    def create_source(
         self,
         source: SourceCreate,
     ):
@@ -92,7 +94,7 @@ class SourceRouter:
 
         return new_source
 
-    async def update_source(
+    def update_source(
         self,
         source_id: int,
         source: SourceCreate,
@@ -120,7 +122,7 @@ class SourceRouter:
 
         return db_source
 
-    async def delete_source(
+    def delete_source(
         self,
         source_id: int,
     ):
@@ -149,10 +151,10 @@ class SourceRouter:
 
         return None
 
-    async def import_sources_from_csv(self, file: UploadFile = File(...)):
+    def import_sources_from_csv(self, file: UploadFile = File(...)):
         """Import sources from a CSV file"""
         try:
-            contents = await file.read()
+            contents = file.file.read()
             csv_file = io.StringIO(contents.decode("utf-8"))
             csv_reader = csv.reader(csv_file)
 
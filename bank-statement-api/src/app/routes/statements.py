@@ -0,0 +1,71 @@
+import unicodedata
+from typing import List
+from urllib.parse import quote
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from ..common.fast_json import RowSerializer
+from ..repositories.statement_repository import StatementRepository
+from ..schemas import StatementSummary
+
+statements_json = RowSerializer(StatementSummary)
+
+
+def content_disposition(file_name: str) -> str:
+    """An attachment header for any file name.
+
+    Header values must be latin-1, so the plain filename is an ASCII fallback
+    and browsers that support it read the UTF-8 name from filename*."""
+    # Quotes, backslashes and control characters (CR/LF) could break the header
+    name = "".join(c for c in file_name if c not in '"\\' and c.isprintable())
+    ascii_name = (
+        unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    ) or "statement"
+    utf8_name = quote(name, safe="")
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{utf8_name}"
+
+
+class StatementRouter:
+    def __init__(self, statement_repository: StatementRepository):
+        self.router = APIRouter(
+            prefix="/statements",
+            tags=["statements"],
+        )
+        self.statement_repository = statement_repository
+
+        self.router.add_api_route(
+            "",
+            self.get_statements,
+            methods=["GET"],
+            response_model=List[StatementSummary],
+        )
+        self.router.add_api_route(
+            "/{statement_id}/content",
+            self.get_statement_content,
+            methods=["GET"],
+            response_class=StreamingResponse,
+        )
+
+    def get_statements(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+    ):
+        return statements_json.response(
+            self.statement_repository.list_metadata(skip, limit)
+        )
+
+    def get_statement_content(self, statement_id: str):
+        statement = self.statement_repository.get_by_id(statement_id)
+        if statement is None:
+            raise HTTPException(status_code=404, detail="Statement not found")
+
+        return StreamingResponse(
+            self.statement_repository.iter_content(statement_id),
+            media_type="application/octet-stream",
+            headers={
+                "Content-Disposition": content_disposition(statement["file_name"]),
+                "Content-Length": str(statement["size"]),
+            },
+        )
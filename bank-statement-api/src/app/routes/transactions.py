@@ -4,23 +4,29 @@ import logging
 from datetime import date
 from typing import Callable, List, Optional
 
-from fastapi import APIRouter, HTTPException, Query, File, UploadFile
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 
-from ..logging.utils import log_exception
+from ..common.fast_json import RowSerializer
+from ..logging.utils import log_exception, log_payload
 from ..models import Transaction
 from ..repositories.transactions_repository import (
     TransactionsFilter,
     TransactionsRepository,
 )
 from ..schemas import (
+    AggregateGroupBy,
+    BatchAnalysisResponse,
     FileUploadResponse,
     StatementAnalysisRequest,
     StatementAnalysisResponse,
+    TransactionAggregate,
 )
 from ..schemas import Transaction as TransactionSchema
-from ..schemas import (
-    UploadStatementRequest,
+from ..schemas import UploadStatementRequest
+from ..services.file_processing.batch_statement_analysis_service import (
+    BatchStatementAnalysisService,
 )
 from ..services.file_processing.statement_analysis_service import (
     StatementAnalysisService,
@@ -29,10 +35,18 @@ from ..services.file_processing.statement_upload_service import (
     StatementUploadService,
     UploadFileSpec,
 )
+from ..services.transactions_export import (
+    EXPORT_FORMATS,
+    ExportFormat,
+    ExportFormatUnavailable,
+    TransactionsExporter,
+)
 
 logger_content = logging.getLogger("app.llm.big")
 logger = logging.getLogger("app")
 
+transactions_json = RowSerializer(TransactionSchema)
+
 
 class TransactionRouter:
     def __init__(
@@ -42,6 +56,9 @@ class TransactionRouter:
         statement_upload_service: StatementUploadService,
         statement_repository,
         on_change_callback: Optional[Callable[[str, List[Transaction]], None]] = None,
+        schedule_categorization: Optional[Callable[[int], str]] = None,
+        transactions_exporter: Optional[TransactionsExporter] = None,
+        batch_analysis_service: Optional[BatchStatementAnalysisService] = None,
     ):
         self.router = APIRouter(
             prefix="/transactions",
@@ -52,6 +69,16 @@ class TransactionRouter:
         self.upload_statement_service = statement_upload_service
         self.statement_repository = statement_repository
         self.on_change_callback = on_change_callback
+        self.schedule_categorization = schedule_categorization
+        self.transactions_exporter = transactions_exporter or TransactionsExporter(
+            transactions_repository
+        )
+        self.batch_analysis_service = (
+            batch_analysis_service
+            or BatchStatementAnalysisService(
+                statement_analysis_service, transactions_repository
+            )
+        )
 
         self.router.add_api_route(
             "",
@@ -59,6 +86,19 @@ class TransactionRouter:
             methods=["GET"],
             response_model=List[TransactionSchema],
         )
+        self.router.add_api_route(
+            "/aggregate",
+            self.aggregate_transactions,
+            methods=["GET"],
+            response_model=List[TransactionAggregate],
+            response_model_exclude_unset=True,
+        )
+        self.router.add_api_route(
+            "/export",
+            self.export_transactions,
+            methods=["GET"],
+            response_class=StreamingResponse,
+        )
         self.router.add_api_route(
             "/{transaction_id}",
             self.get_transaction,
@@ -89,12 +129,18 @@ class TransactionRouter:
             methods=["POST"],
             response_model=StatementAnalysisResponse,
         )
+        self.router.add_api_route(
+            "/analyze/batch",
+            self.analyze_statements,
+            methods=["POST"],
+            response_model=BatchAnalysisResponse,
+        )
 
     def _notify_change(self, action: str, transactions: List[Transaction]):
         if self.on_change_callback:
             self.on_change_callback(action, transactions)
 
-    async def get_transactions(
+    def get_transactions(
         self,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
@@ -113,12 +159,64 @@ class TransactionRouter:
             source_id=source_id,
             search=search,
         )
-        transactions = self.transaction_repository.get_all(
-            filter, skip=skip, limit=limit
+        rows = self.transaction_repository.get_all_rows(filter, skip=skip, limit=limit)
+        return transactions_json.response(rows)
+
+    def aggregate_transactions(
+        self,
+        group_by: List[AggregateGroupBy] = Query(["month"]),
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None,
+        sub_category_id: Optional[int] = None,
+        source_id: Optional[int] = None,
+    ):
+        filter = TransactionsFilter(
+            start_date=start_date,
+            end_date=end_date,
+            category_id=category_id,
+            sub_category_id=sub_category_id,
+            source_id=source_id,
         )
-        return transactions
+        return self.transaction_repository.aggregate(filter, group_by)
 
-    async def get_transaction(
+    def export_transactions(
+        self,
+        format: ExportFormat = "csv",
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None,
+        sub_category_id: Optional[int] = None,
+        source_id: Optional[int] = None,
+        search: Optional[str] = None,
+        categorization_status: Optional[str] = None,
+    ):
+        filter = TransactionsFilter(
+            start_date=start_date,
+            end_date=end_date,
+            category_id=category_id,
+            sub_category_id=sub_category_id,
+            source_id=source_id,
+            search=search,
+            categorization_status=categorization_status,
+        )
+        try:
+            content = self.transactions_exporter.export(filter, format)
+        except ExportFormatUnavailable as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        spec = EXPORT_FORMATS[format]
+        return StreamingResponse(
+            content,
+            media_type=spec.media_type,
+            headers={
+                "Content-Disposition": (
+                    f'attachment; filename="transactions.{spec.extension}"'
+                )
+            },
+        )
+
+    def get_transaction(
         self,
         transaction_id: int,
     ):
@@ -127,7 +225,7 @@ class TransactionRouter:
             raise HTTPException(status_code=404, detail="Transaction not found")
         return transaction
 
-    async def delete_transaction(
+    def delete_transaction(
         self,
         transaction_id: int,
     ):
@@ -137,7 +235,7 @@ class TransactionRouter:
         self.transaction_repository.delete(transaction)
         return {"detail": "Transaction deleted"}
 
-    async def categorize_transaction(
+    def categorize_transaction(
         self,
         transaction_id: int,
         category_id: int,
@@ -155,24 +253,23 @@ class TransactionRouter:
 
         return transaction
 
-    async def analyze_statement(
+    def analyze_statement(
         self,
         file: UploadFile = File(...),
     ):
         try:
-            file_content = await file.read()
+            file_content = file.file.read()
             filename = file.filename
 
             response = self.statement_analysis_service.analyze_statement(
                 file_content, filename
             )
 
-            logger_content.debug(
-                json.dumps(jsonable_encoder(response)),
-                extra={
-                    "prefix": "statement_analysis_service.analyze_file.response",
-                    "ext": "json",
-                },
+            log_payload(
+                logger_content,
+                lambda: json.dumps(jsonable_encoder(response)),
+                prefix="statement_analysis_service.analyze_file.response",
+                ext="json",
             )
 
             return response
@@ -182,11 +279,26 @@ class TransactionRouter:
                 status_code=400, detail=f"Error analyzing file: {str(e)}"
             )
 
-    async def upload_statement(
+    def analyze_statements(
+        self,
+        files: List[UploadFile] = File(...),
+    ):
+        """Analyzes many statement files, or ZIP archives of them, together"""
+        try:
+            return self.batch_analysis_service.analyze(
+                [(file.filename, file.file.read()) for file in files]
+            )
+        except Exception as e:
+            log_exception(f"Error analyzing files: {str(e)}")
+            raise HTTPException(
+                status_code=400, detail=f"Error analyzing files: {str(e)}"
+            )
+
+    def upload_statement(
         self,
         request: UploadStatementRequest,
         auto_categorize: bool = Query(
-            False, description="Automatically trigger categorization after upload"
+            True, description="Automatically trigger categorization after upload"
         ),
     ):
         try:
@@ -212,14 +324,13 @@ class TransactionRouter:
 
             result = self.upload_statement_service.upload_statement(spec)
 
-            if auto_categorize and result.transactions_processed > 0:
-                from ..tasks.categorization import manually_trigger_categorization
-
-                task = manually_trigger_categorization(batch_size=100)
-                result.categorization_task_id = task.id
-                result.message = (
-                    "File processed successfully and categorization triggered"
-                )
+            if (
+                auto_categorize
+                and self.schedule_categorization
+                and result.transactions_processed > 0
+                and not result.already_imported
+            ):
+                self._schedule_categorization(result)
 
             return result
         except Exception as e:
@@ -227,3 +338,14 @@ class TransactionRouter:
             raise HTTPException(
                 status_code=400, detail=f"Error processing file: {str(e)}"
             )
+
+    def _schedule_categorization(self, result: FileUploadResponse):
+        # The transactions are already saved; if the broker is down the
+        # periodic safety net categorizes them later
+        try:
+            result.categorization_task_id = self.schedule_categorization(
+                result.transactions_processed
+            )
+            result.message = "File processed successfully and categorization triggered"
+        except Exception:
+            log_exception("Failed to schedule categorization")
@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
 from typing import List, Literal, Optional
 
@@ -69,6 +69,23 @@ class TransactionCreate(TransactionBase):
     sub_category_id: Optional[int] = None
     categorization_status: Literal["pending", "categorized", "failed"] = "pending"
     normalized_description: Optional[str] = None
+    statement_id: Optional[str] = None
+    fingerprint: Optional[str] = None
+
+
+AggregateGroupBy = Literal["month", "category", "sub_category", "source"]
+
+
+class TransactionAggregate(ResponseModel):
+    # Only the requested group_by keys are set
+    month: Optional[str] = None
+    category_id: Optional[int] = None
+    sub_category_id: Optional[int] = None
+    source_id: Optional[int] = None
+    count: int
+    total: float
+    inflow: float
+    outflow: float
 
 
 class Transaction(TransactionBase):
@@ -88,6 +105,8 @@ class FileUploadResponse(ResponseModel):
     transactions: List[Transaction]
     skipped_duplicates: int = 0
     categorization_task_id: Optional[str] = None
+    # True when this is the stored result of an earlier upload of the same file
+    already_imported: bool = False
 
 
 class ColumnMapping(ResponseModel):
@@ -107,6 +126,8 @@ class StatementSchemaDefinition(RequestModel, ResponseModel):
     column_mapping: ColumnMapping
     start_row: int = 1
     header_row: int = 0
+    # The header the mapping refers to, to match files with a similar one
+    column_names: Optional[List[str]] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -126,11 +147,62 @@ class StatementAnalysisResponse(ResponseModel):
     preview_rows: List[List[str]] = []
 
 
+class StatementSummary(ResponseModel):
+    id: str
+    file_name: str
+    content_hash: str
+    size: int
+    created_at: Optional[datetime] = None
+    row_count: int = 0
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    source_id: Optional[int] = None
+
+
+class BatchFileAnalysis(ResponseModel):
+    file_name: str
+    analysis: Optional[StatementAnalysisResponse] = None
+    error: Optional[str] = None
+    # Replayed from an earlier upload of the same file, without parsing it
+    already_analyzed: bool = False
+    # Against the database and the files before this one in the batch
+    new_transactions: Optional[int] = None
+    duplicate_transactions: Optional[int] = None
+
+
+class BatchAnalysisResponse(ResponseModel):
+    files: List[BatchFileAnalysis]
+
+
 class UploadFileSpec(RequestModel, ResponseModel):
     statement_id: str
     statement_schema: StatementSchemaDefinition
 
 
+class UploadJobResult(ResponseModel):
+    """A finished upload, without the transactions it inserted"""
+
+    message: str
+    transactions_processed: int
+    skipped_duplicates: int = 0
+    categorization_task_id: Optional[str] = None
+    already_imported: bool = False
+
+
+class UploadJobStatus(ResponseModel):
+    id: str
+    statement_id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    stage: Optional[str] = None
+    rows_parsed: int = 0
+    rows_inserted: int = 0
+    duplicates: int = 0
+    result: Optional[UploadJobResult] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
 class StatementTransaction(BaseModel):
     date: date
     description: str
@@ -0,0 +1,126 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+from src.app.services.categorizers.transaction_categorizer import (
+    CategorisationData,
+    CategorizationResult,
+    TransactionCategorizer,
+)
+
+logger = logging.getLogger("app")
+
+
+@dataclass
+class CascadeStage:
+    name: str
+    categorizer: TransactionCategorizer
+    min_confidence: float = 0.0
+
+
+@dataclass
+class CascadeStageStats:
+    name: str
+    calls: int = 0
+    transactions_in: int = 0
+    resolved: int = 0
+    total_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        if not self.transactions_in:
+            return 0.0
+        return self.resolved / self.transactions_in
+
+    @property
+    def avg_latency_ms(self) -> float:
+        if not self.calls:
+            return 0.0
+        return self.total_seconds * 1000 / self.calls
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "transactions_in": self.transactions_in,
+            "resolved": self.resolved,
+            "hit_rate": self.hit_rate,
+            "avg_latency_ms": self.avg_latency_ms,
+            "total_seconds": self.total_seconds,
+        }
+
+
+class CascadeTransactionCategorizer(TransactionCategorizer):
+    """Runs stages from cheapest to most expensive. A transaction leaves the
+    cascade at the first stage that categorizes it with at least that stage's
+    min_confidence; only the remainder is passed to the next stage.
+
+    Transactions no stage resolved confidently keep the highest-confidence
+    result seen along the way, if any."""
+
+    def __init__(self, stages: List[CascadeStage]):
+        if not stages:
+            raise ValueError("At least one stage is required")
+        self.stages = stages
+        self.stats = {stage.name: CascadeStageStats(stage.name) for stage in stages}
+
+    async def categorize_transaction(
+        self, transactions: List[CategorisationData]
+    ) -> List[CategorizationResult]:
+        resolved: Dict[int, CategorizationResult] = {}
+        best_effort: Dict[int, CategorizationResult] = {}
+        remaining = transactions
+
+        for stage in self.stages:
+            if not remaining:
+                break
+
+            stats = self.stats[stage.name]
+            start = time.perf_counter()
+            stage_results = await stage.categorizer.categorize_transaction(remaining)
+            stats.total_seconds += time.perf_counter() - start
+            stats.calls += 1
+            stats.transactions_in += len(remaining)
+
+            for result in stage_results:
+                if result.sub_category_id is None:
+                    continue
+                if result.confidence >= stage.min_confidence:
+                    resolved[result.transaction_id] = result
+                    best_effort.pop(result.transaction_id, None)
+                else:
+                    current = best_effort.get(result.transaction_id)
+                    if current is None or result.confidence > current.confidence:
+                        best_effort[result.transaction_id] = result
+
+            resolved_before = len(transactions) - len(remaining)
+            remaining = [t for t in remaining if t.transaction_id not in resolved]
+            stats.resolved += len(transactions) - len(remaining) - resolved_before
+
+            logger.debug(
+                f"Cascade stage {stage.name} resolved {stats.resolved} of "
+                f"{stats.transactions_in} transactions so far, "
+                f"{len(remaining)} left in this batch"
+            )
+
+        results = []
+        for transaction in transactions:
+            result = resolved.get(transaction.transaction_id) or best_effort.get(
+                transaction.transaction_id
+            )
+            if result is not None:
+                results.append(result)
+
+        return results
+
+    def get_stats(self) -> List[CascadeStageStats]:
+        return [self.stats[stage.name] for stage in self.stages]
+
+    def reset_stats(self):
+        self.stats = {
+            stage.name: CascadeStageStats(stage.name) for stage in self.stages
+        }
+
+    def refresh_rules(self):
+        return [stage.categorizer.refresh_rules() for stage in self.stages]
@@ -1,5 +1,5 @@
 import logging
-from typing import List
+from typing import List, Optional
 
 from src.app.repositories.transactions_repository import TransactionsRepository
 from src.app.services.categorizers.transaction_categorizer import (
@@ -15,7 +15,7 @@ class ExistingTransactionsCategorizer(TransactionCategorizer):
     def __init__(
         self,
         transactions_repository: TransactionsRepository,
-        fallback_categorizer: TransactionCategorizer,
+        fallback_categorizer: Optional[TransactionCategorizer] = None,
     ):
         self.transactions_repository = transactions_repository
         self.fallback_categorizer = fallback_categorizer
@@ -55,7 +55,7 @@ class ExistingTransactionsCategorizer(TransactionCategorizer):
             else:
                 transactions_for_fallback.append(transaction)
 
-        if transactions_for_fallback:
+        if transactions_for_fallback and self.fallback_categorizer:
             logger.debug(
                 f"Falling back to {self.fallback_categorizer.__class__.__name__} for {len(transactions_for_fallback)} transactions"
             )
@@ -68,4 +68,5 @@ class ExistingTransactionsCategorizer(TransactionCategorizer):
 
     def refresh_rules(self):
         # Pass through to the fallback categorizer
-        return self.fallback_categorizer.refresh_rules()
+        if self.fallback_categorizer:
+            return self.fallback_categorizer.refresh_rules()
@@ -0,0 +1,70 @@
+import os
+from typing import List, Optional, Tuple
+
+from src.app.ai.llm_client import LLMClient
+from src.app.repositories.categories_repository import CategoriesRepository
+from src.app.repositories.transactions_repository import TransactionsRepository
+from src.app.services.categorizers.cascade import (
+    CascadeStage,
+    CascadeTransactionCategorizer,
+)
+from src.app.services.categorizers.existing_transactions_categorizer import (
+    ExistingTransactionsCategorizer,
+)
+from src.app.services.categorizers.keyword import KeywordTransactionCategorizer
+from src.app.services.categorizers.llm_transaction_categorizer import (
+    LLMTransactionCategorizer,
+)
+from src.app.services.categorizers.rule_based import RuleBasedTransactionCategorizer
+from src.app.services.categorizers.transaction_categorizer import (
+    TransactionCategorizer,
+)
+
+# Comma separated "stage:min_confidence" list, cheapest stage first
+DEFAULT_STAGES = "history:1.0,llm:0"
+
+
+def parse_stages(stages_spec: str) -> List[Tuple[str, float]]:
+    stages = []
+    for item in stages_spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, threshold = item.partition(":")
+        stages.append((name.strip(), float(threshold) if threshold else 0.0))
+    return stages
+
+
+def create_categorizer(
+    categories_repository: CategoriesRepository,
+    transactions_repository: TransactionsRepository,
+    llm_client: Optional[LLMClient] = None,
+    llm_categorizer: Optional[TransactionCategorizer] = None,
+    stages_spec: Optional[str] = None,
+) -> CascadeTransactionCategorizer:
+    stages_spec = stages_spec or os.getenv("CATEGORIZER_STAGES", DEFAULT_STAGES)
+
+    stages = []
+    for name, min_confidence in parse_stages(stages_spec):
+        if name == "history":
+            categorizer = ExistingTransactionsCategorizer(transactions_repository)
+        elif name == "rules":
+            categorizer = RuleBasedTransactionCategorizer(categories_repository)
+        elif name == "keywords":
+            categorizer = KeywordTransactionCategorizer(categories_repository)
+        elif name == "embeddings":
+            from src.app.services.categorizers.embedding import (
+                EmbeddingTransactionCategorizer,
+            )
+
+            categorizer = EmbeddingTransactionCategorizer(categories_repository)
+        elif name == "llm":
+            categorizer = llm_categorizer or LLMTransactionCategorizer(
+                categories_repository, llm_client
+            )
+        else:
+            raise ValueError(f"Unknown categorizer stage: {name}")
+
+        stages.append(CascadeStage(name, categorizer, min_confidence))
+
+    return CascadeTransactionCategorizer(stages)
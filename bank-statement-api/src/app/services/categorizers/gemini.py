@@ -18,12 +18,14 @@ class GeminiTransactionCategorizer(TransactionCategorizer):
     ):
         self.categories_repository = categories_repository
         self.gemini = GeminiAI()
-        self.categories = categories_repository.get_all()
-        self.refresh_rules()
+        # Loaded on first use, so building the categorizer needs no database
+        self.categories = None
 
     async def categorize_transaction(
         self, transactions: List[CategorisationData]
     ) -> List[CategorizationResult]:
+        if self.categories is None:
+            self.refresh_rules()
         if not self.categories:
             raise ValueError("Categories not loaded")
 
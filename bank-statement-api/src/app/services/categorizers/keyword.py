@@ -1,4 +1,7 @@
-from typing import Dict, List, Optional
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 
 from src.app.repositories.categories_repository import CategoriesRepository
 from src.app.services.categorizers.transaction_categorizer import (
@@ -7,60 +10,148 @@ from src.app.services.categorizers.transaction_categorizer import (
     TransactionCategorizer,
 )
 
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, strip accents and split text into word tokens"""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return TOKEN_PATTERN.findall(text)
+
+
+class _TrieNode:
+    __slots__ = ("children", "matches")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.matches: List[Tuple[int, float]] = []
+
+
+class KeywordIndex:
+    """Trie over normalized tokens, so multi-word phrases are matched in a single
+    pass over the description"""
+
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def add(self, phrase: str, sub_category_id: int, weight: float = 1.0):
+        tokens = tokenize(phrase)
+        if not tokens:
+            return
+
+        node = self.root
+        for token in tokens:
+            node = node.children.setdefault(token, _TrieNode())
+
+        node.matches = [m for m in node.matches if m[0] != sub_category_id]
+        node.matches.append((sub_category_id, weight * len(tokens)))
+
+    def score(self, tokens: List[str]) -> Dict[int, float]:
+        scores: Dict[int, float] = defaultdict(float)
+        children = self.root.children
+
+        for start in range(len(tokens)):
+            node = children.get(tokens[start])
+            position = start
+            while node is not None:
+                for sub_category_id, weight in node.matches:
+                    scores[sub_category_id] += weight
+                position += 1
+                if position == len(tokens):
+                    break
+                node = node.children.get(tokens[position])
+
+        return scores
+
 
 class KeywordTransactionCategorizer(TransactionCategorizer):
     def __init__(
         self,
         categories_repository: CategoriesRepository,
         keywords_map: Optional[Dict[str, int]] = None,
+        min_keyword_length: int = 4,
     ):
         self.categories_repository = categories_repository
-        self.keywords_map = keywords_map or {}
-        if not keywords_map:
+        self.min_keyword_length = min_keyword_length
+        self.keywords_map = {}
+        self.index = KeywordIndex()
+        if keywords_map:
+            for keyword, category_id in keywords_map.items():
+                self.add_keyword(keyword, category_id)
+        else:
             self.refresh_rules()
 
-    def add_keyword(self, keyword: str, category_id: int):
-        """Add a keyword mapping to a category"""
+    def add_keyword(self, keyword: str, category_id: int, weight: float = 1.0):
+        """Add a keyword or multi-word phrase mapping to a category"""
         self.keywords_map[keyword.lower()] = category_id
+        self.index.add(keyword, category_id, weight)
 
-    def categorize_transaction(
+    async def categorize_transaction(
         self, transactions: List[CategorisationData]
     ) -> List[CategorizationResult]:
+        return self.categorize_batch(transactions)
+
+    def categorize_batch(
+        self, transactions: List[CategorisationData]
+    ) -> List[CategorizationResult]:
+        best_by_description: Dict[str, Optional[Tuple[int, float]]] = {}
         results = []
+
         for transaction in transactions:
-            description = transaction.description.lower()
-
-            for word in description.split():
-                if word in self.keywords_map:
-                    results.append(
-                        CategorizationResult(
-                            transaction_id=transaction.transaction_id,
-                            sub_category_id=self.keywords_map[word],
-                            confidence=1.0,
-                        )
+            description = transaction.description
+            if description not in best_by_description:
+                best_by_description[description] = self._best_match(description)
+
+            best = best_by_description[description]
+            if best is not None:
+                sub_category_id, confidence = best
+                results.append(
+                    CategorizationResult(
+                        transaction_id=transaction.transaction_id,
+                        sub_category_id=sub_category_id,
+                        confidence=confidence,
                     )
-                    break
+                )
 
         return results
 
+    def _best_match(self, description: str) -> Optional[Tuple[int, float]]:
+        scores = self.index.score(tokenize(description))
+        if not scores:
+            return None
+
+        sub_category_id = max(scores, key=scores.get)
+        confidence = scores[sub_category_id] / sum(scores.values())
+        return sub_category_id, confidence
+
     def refresh_rules(self):
         """Generate keyword mappings from category names"""
         categories = self.categories_repository.get_all()
         self.keywords_map = {}
+        self.index = KeywordIndex()
 
         for category in categories:
-            # Add the main category name as a keyword
-            words = category.category_name.lower().split()
-            for word in words:
-                if len(word) > 3:  # Only use words longer than 3 characters
-                    self.keywords_map[word] = category.id
+            self._add_category_keywords(category.category_name, category.id)
 
-            # Add subcategory names as keywords
             if category.subcategories:
                 for subcategory in category.subcategories:
-                    words = subcategory.category_name.lower().split()
-                    for word in words:
-                        if len(word) > 3:
-                            self.keywords_map[word] = subcategory.id
+                    self._add_category_keywords(
+                        subcategory.category_name, subcategory.id
+                    )
 
         return self.keywords_map
+
+    def _add_category_keywords(self, category_name: str, category_id: int):
+        words = [
+            w for w in tokenize(category_name) if len(w) >= self.min_keyword_length
+        ]
+        for word in words:
+            self.add_keyword(word, category_id)
+
+        # The full name also counts as a phrase, so "Food: Restaurant" outweighs
+        # a lone "restaurant" from another category
+        if len(words) > 1:
+            self.add_keyword(" ".join(words), category_id)
@@ -35,12 +35,14 @@ class LLMTransactionCategorizer(TransactionCategorizer):
     ):
         self.categories_repository = categories_repository
         self.llm_client = llm_client
-        self.categories = categories_repository.get_all()
-        self.refresh_rules()
+        # Loaded on first use, so building the categorizer needs no database
+        self.categories = None
 
     async def categorize_transaction(
         self, transactions: List[CategorisationData]
     ) -> List[CategorizationResult]:
+        if self.categories is None:
+            self.refresh_rules()
         if not self.categories:
             raise ValueError("Categories not loaded")
 
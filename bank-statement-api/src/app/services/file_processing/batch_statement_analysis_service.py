@@ -0,0 +1,311 @@
+import io
+import logging
+import os
+import zipfile
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.app.common.fingerprint import statement_fingerprints
+from src.app.observability.tracing import Tracer
+from src.app.observability.tracing import tracer as default_tracer
+from src.app.repositories.transactions_repository import TransactionsRepository
+from src.app.schemas import (
+    BatchAnalysisResponse,
+    BatchFileAnalysis,
+    StatementSchemaDefinition,
+    StatementTransaction,
+)
+from src.app.services.file_processing.conversion_model import ConversionModel
+from src.app.services.file_processing.file_type_detector import FileType
+from src.app.services.file_processing.statement_analysis_service import (
+    StatementAnalysisService,
+)
+from src.app.services.file_processing.transactions_builder import TransactionsBuilder
+from src.app.services.file_processing.transactions_cleaner import TransactionsCleaner
+from src.app.storage.blob_store import BlobStore
+
+logger = logging.getLogger("app")
+
+
+class BatchTooLarge(ValueError):
+    pass
+
+
+def expand_archives(
+    files: List[Tuple[str, bytes]],
+    max_files: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> List[Tuple[str, bytes]]:
+    """Replaces each .zip by the files in it, within the batch limits"""
+    max_files = max_files or int(os.getenv("BATCH_MAX_FILES", "100"))
+    max_bytes = max_bytes or int(os.getenv("BATCH_MAX_BYTES", str(200 * 1024 * 1024)))
+
+    expanded = []
+    total = 0
+    for name, content in files:
+        # Checked by extension: xlsx files are zip archives too
+        if not name.lower().endswith(".zip"):
+            entries = [(name, len(content), lambda content=content: content)]
+        else:
+            archive = zipfile.ZipFile(io.BytesIO(content))
+            entries = [
+                (
+                    PurePosixPath(info.filename).name,
+                    info.file_size,
+                    _reader(archive, info),
+                )
+                for info in archive.infolist()
+                if _is_statement_entry(info)
+            ]
+        for entry_name, size, read in entries:
+            total += size
+            if len(expanded) == max_files or total > max_bytes:
+                raise BatchTooLarge(
+                    f"A batch is limited to {max_files} files and {max_bytes} bytes"
+                )
+            expanded.append((entry_name, read()))
+    return expanded
+
+
+def _is_statement_entry(info: zipfile.ZipInfo) -> bool:
+    path = PurePosixPath(info.filename)
+    return (
+        not info.is_dir()
+        and "__MACOSX" not in path.parts
+        and not path.name.startswith(".")
+    )
+
+
+def _reader(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> Callable[[], bytes]:
+    return lambda: archive.read(info)
+
+
+def _clean_and_build(
+    cleaner: TransactionsCleaner,
+    builder: TransactionsBuilder,
+    df: pd.DataFrame,
+    conversion_model: ConversionModel,
+) -> List[StatementTransaction]:
+    # Module level so it can run in a process pool
+    return builder.build_transactions(cleaner.clean(df, conversion_model))
+
+
+@dataclass
+class _BatchFile:
+    result: BatchFileAnalysis
+    content: bytes
+    content_hash: str
+    file_type: Optional[FileType] = None
+    statement_id: Optional[str] = None
+    df: Optional[pd.DataFrame] = None
+    group: Optional[str] = None
+    schema: Optional[StatementSchemaDefinition] = None
+    conversion_model: Optional[ConversionModel] = None
+    transactions: Optional[List[StatementTransaction]] = None
+
+
+class BatchStatementAnalysisService:
+    """Analyzes many statement files, or ZIP archives of them, in one request.
+
+    Files are parsed concurrently (in the parser process pool when there is
+    one), columns are mapped once per distinct header, cleaning runs in the
+    executor, and rows are deduped across the batch as well as against the
+    database. Database work stays on the calling thread, which owns the
+    session."""
+
+    def __init__(
+        self,
+        analysis_service: StatementAnalysisService,
+        transactions_repository: TransactionsRepository,
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+        tracer: Optional[Tracer] = None,
+    ):
+        self.analysis_service = analysis_service
+        self.transactions_repository = transactions_repository
+        self.executor = executor
+        self.max_workers = max_workers or int(os.getenv("BATCH_ANALYSIS_WORKERS", "8"))
+        self.tracer = tracer or default_tracer
+
+    def analyze(self, files: List[Tuple[str, bytes]]) -> BatchAnalysisResponse:
+        with self.tracer.span("analyze_batch") as span:
+            batch = [
+                _BatchFile(
+                    result=BatchFileAnalysis(file_name=name),
+                    content=content,
+                    content_hash=BlobStore.hash(content),
+                )
+                for name, content in expand_archives(files)
+            ]
+            span.set("files", len(batch))
+
+            pending, repeats = self._replay_or_save(batch)
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(self.max_workers, len(pending)))
+            ) as threads:
+                self._parse(pending, threads)
+                self._map_columns(pending, threads)
+                self._clean(pending, self.executor or threads)
+
+            self._dedupe(pending)
+            for file in pending:
+                if file.result.error is None:
+                    file.result.analysis = self.analysis_service.build_response(
+                        file.statement_id,
+                        file.schema,
+                        file.df,
+                        file.transactions,
+                    )
+            for repeat, first in repeats:
+                repeat.result.analysis = first.result.analysis
+                repeat.result.error = first.result.error
+                repeat.result.already_analyzed = True
+                if first.transactions is not None:
+                    repeat.result.new_transactions = 0
+                    repeat.result.duplicate_transactions = len(first.transactions)
+
+            return BatchAnalysisResponse(files=[file.result for file in batch])
+
+    def _replay_or_save(
+        self, batch: List[_BatchFile]
+    ) -> Tuple[List[_BatchFile], List[Tuple[_BatchFile, _BatchFile]]]:
+        pending = []
+        repeats = []
+        by_hash: Dict[str, _BatchFile] = {}
+        detector = self.analysis_service.file_type_detector
+        statements = self.analysis_service.statement_repository
+        with self.tracer.span("analyze_batch.lookup_previous"):
+            for file in batch:
+                if file.content_hash in by_hash:
+                    repeats.append((file, by_hash[file.content_hash]))
+                    continue
+                by_hash[file.content_hash] = file
+
+                previous = self.analysis_service.previous_analysis(file.content)
+                if previous is not None:
+                    file.result.analysis = previous
+                    file.result.already_analyzed = True
+                    continue
+
+                file.file_type = detector.detect_file_type(file.result.file_name)
+                file.statement_id = statements.save(file.content, file.result.file_name)
+                pending.append(file)
+        return pending, repeats
+
+    def _parse(self, pending: List[_BatchFile], threads: Executor) -> None:
+        parser_factory = self.analysis_service.parser_factory
+        with self.tracer.span("analyze_batch.parse", files=len(pending)):
+            futures = [
+                threads.submit(
+                    lambda file=file: parser_factory.create_parser(
+                        file.file_type
+                    ).parse(file.content)
+                )
+                for file in pending
+            ]
+            for file, future in zip(pending, futures):
+                file.df = self._result(file, future)
+
+    def _map_columns(self, pending: List[_BatchFile], threads: Executor) -> None:
+        """One schema lookup per distinct header, and an LLM mapping for the
+        headers that match no known layout"""
+        groups: Dict[str, _BatchFile] = {}
+        for file in self._ok(pending):
+            file.group = self.analysis_service.statement_hash(file.df, file.file_type)
+            groups.setdefault(file.group, file)
+
+        with self.tracer.span("analyze_batch.map_columns", groups=len(groups)):
+            # Lookups and saves use the session, so they stay on this thread
+            schemas: Dict[str, Optional[StatementSchemaDefinition]] = {}
+            errors: Dict[str, Exception] = {}
+            for group, first in groups.items():
+                try:
+                    schemas[group] = self.analysis_service.find_schema(
+                        first.df, first.file_type
+                    )
+                except Exception as e:
+                    errors[group] = e
+            futures = {
+                group: threads.submit(self.analysis_service.normalize_columns, first.df)
+                for group, first in groups.items()
+                if group not in errors and schemas[group] is None
+            }
+            for group, first in groups.items():
+                members = [f for f in self._ok(pending) if f.group == group]
+                try:
+                    if group in errors:
+                        raise errors[group]
+                    if group in futures:
+                        conversion_model = futures[group].result()
+                        schema = self.analysis_service.create_schema(
+                            first.df, first.file_type, conversion_model
+                        )
+                    else:
+                        schema = schemas[group]
+                        conversion_model = self.analysis_service.conversion_model(
+                            schema
+                        )
+                except Exception as e:
+                    for file in members:
+                        self._fail(file, e)
+                    continue
+                for file in members:
+                    file.schema = schema
+                    file.conversion_model = conversion_model
+
+    def _clean(self, pending: List[_BatchFile], executor: Executor) -> None:
+        cleaner = self.analysis_service.transaction_cleaner
+        builder = self.analysis_service.transactions_builder
+        ready = list(self._ok(pending))
+        with self.tracer.span("analyze_batch.clean", files=len(ready)):
+            futures = [
+                executor.submit(
+                    _clean_and_build,
+                    cleaner,
+                    builder,
+                    file.df,
+                    file.conversion_model,
+                )
+                for file in ready
+            ]
+            for file, future in zip(ready, futures):
+                file.transactions = self._result(file, future)
+
+    def _dedupe(self, pending: List[_BatchFile]) -> None:
+        ready = list(self._ok(pending))
+        with self.tracer.span("analyze_batch.dedupe", files=len(ready)):
+            fingerprints = {
+                id(file): statement_fingerprints(
+                    file.transactions, file.schema.source_id or 1
+                )
+                for file in ready
+            }
+            stored = self.transactions_repository.existing_fingerprints(
+                [fp for file_fps in fingerprints.values() for fp in file_fps]
+            )
+            seen = set(stored)
+            for file in ready:
+                file_fps = fingerprints[id(file)]
+                new = [fp for fp in file_fps if fp not in seen]
+                file.result.new_transactions = len(new)
+                file.result.duplicate_transactions = len(file_fps) - len(new)
+                seen.update(file_fps)
+
+    def _result(self, file: _BatchFile, future):
+        try:
+            return future.result()
+        except Exception as e:
+            self._fail(file, e)
+            return None
+
+    def _fail(self, file: _BatchFile, error: Exception) -> None:
+        logger.error(f"Error analyzing {file.result.file_name}: {error}")
+        file.result.error = f"Error analyzing file: {error}"
+
+    @staticmethod
+    def _ok(pending: List[_BatchFile]):
+        return (file for file in pending if file.result.error is None)
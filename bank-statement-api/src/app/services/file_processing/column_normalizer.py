@@ -5,6 +5,7 @@ import pandas as pd
 
 from src.app.ai.llm_client import LLMClient
 from src.app.common.json_utils import sanitize_json
+from src.app.logging.utils import log_payload
 from src.app.services.file_processing.conversion_model import ConversionModel
 
 logger_content = logging.getLogger("app.llm.big")
@@ -22,16 +23,20 @@ class ColumnNormalizer:
             extra={"prefix": "column_normalizer.response", "ext": "json"},
         )
         json_result = sanitize_json(response)
-        logger_content.debug(
-            json.dumps(json_result),
-            extra={"prefix": "column_normalizer.json_result", "ext": "json"},
+        log_payload(
+            logger_content,
+            lambda: json.dumps(json_result),
+            prefix="column_normalizer.json_result",
+            ext="json",
         )
         if not json_result:
             raise ValueError("Invalid JSON response")
         conversion_model: ConversionModel = ConversionModel(**json_result)
-        logger_content.debug(
-            json.dumps(conversion_model.__dict__),
-            extra={"prefix": "column_normalizer.conversion_model", "ext": "json"},
+        log_payload(
+            logger_content,
+            lambda: json.dumps(conversion_model.__dict__),
+            prefix="column_normalizer.conversion_model",
+            ext="json",
         )
         return conversion_model
 
@@ -0,0 +1,100 @@
+import hashlib
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+from typing import Iterable, List, Optional, Union
+
+from src.app.repositories.source_import_marks_repository import (
+    SourceImportMarksRepository,
+)
+from src.app.schemas import StatementTransaction, TransactionCreate
+
+logger = logging.getLogger("app")
+
+# Anything with a date, description and amount
+Row = Union[StatementTransaction, TransactionCreate]
+
+
+def overlap_fingerprint(rows: Iterable) -> str:
+    """SHA-256 of the (date, description, amount) rows, in any order"""
+    lines = sorted(
+        f"{row.date.isoformat()}|{row.description}|{Decimal(str(row.amount)):.2f}"
+        for row in rows
+    )
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ImportPartition:
+    # Rows still to be checked against what is stored
+    to_dedupe: List[Row] = field(default_factory=list)
+    # Rows already imported, rejected without a lookup
+    rejected: List[Row] = field(default_factory=list)
+
+
+class IncrementalImport:
+    """Splits a statement's rows by what was already imported for the source.
+
+    Rows inside the imported range but before its overlap window are rejected
+    outright. Rows in the window are rejected together when they fingerprint
+    the same as what is stored; otherwise (e.g. a late-posted transaction)
+    they are deduped one by one, like rows outside the range. Transactions
+    deleted inside the range reset the mark, so the next import dedupes the
+    whole statement again."""
+
+    def __init__(
+        self,
+        marks_repository: SourceImportMarksRepository,
+        overlap_days: Optional[int] = None,
+    ):
+        self.marks_repository = marks_repository
+        self.overlap_days = overlap_days or int(os.getenv("IMPORT_OVERLAP_DAYS", "7"))
+
+    def partition(self, transactions: List[Row], source_id: int) -> ImportPartition:
+        mark = self.marks_repository.get(source_id)
+        if mark is None:
+            return ImportPartition(to_dedupe=list(transactions))
+
+        partition = ImportPartition()
+        window = []
+        for transaction in transactions:
+            if transaction.date < mark.low_water_mark:
+                partition.to_dedupe.append(transaction)
+            elif transaction.date < mark.overlap_start:
+                partition.rejected.append(transaction)
+            elif transaction.date <= mark.high_water_mark:
+                window.append(transaction)
+            else:
+                partition.to_dedupe.append(transaction)
+
+        if window and overlap_fingerprint(window) == mark.overlap_fingerprint:
+            partition.rejected.extend(window)
+        else:
+            partition.to_dedupe.extend(window)
+        return partition
+
+    def record(self, transactions: List[Row], source_id: int) -> None:
+        """Extends the source's mark with an imported statement's date range"""
+        if not transactions:
+            return
+        start = min(transaction.date for transaction in transactions)
+        end = max(transaction.date for transaction in transactions)
+
+        mark = self.marks_repository.get(source_id)
+        if mark is None or start > mark.high_water_mark:
+            # A gap may separate the ranges, so only the new one is known complete
+            low, high = start, end
+        elif end < mark.low_water_mark:
+            logger.debug(f"Statement is older than the imported range of {source_id}")
+            return
+        else:
+            low = min(start, mark.low_water_mark)
+            high = max(end, mark.high_water_mark)
+
+        overlap_start = max(low, high - timedelta(days=self.overlap_days - 1))
+        fingerprint = overlap_fingerprint(
+            self.marks_repository.window_rows(source_id, overlap_start, high)
+        )
+        self.marks_repository.save(source_id, low, high, overlap_start, fingerprint)
@@ -1,3 +1,8 @@
+from concurrent.futures import Executor
+from typing import Optional
+
+import pandas as pd
+
 from src.app.services.file_processing.file_type_detector import FileType
 from src.app.services.file_processing.parsers.statement_parser import StatementParser
 from src.app.services.file_processing.parsers.statement_parser_factory import (
@@ -5,6 +10,26 @@ from src.app.services.file_processing.parsers.statement_parser_factory import (
 )
 
 
+def _parse(file_type: FileType, file_content: bytes) -> pd.DataFrame:
+    return create_parser_func(file_type).parse(file_content)
+
+
+class ExecutorParser(StatementParser):
+    """Parses in an executor, e.g. a process pool so large files don't hold the GIL"""
+
+    def __init__(self, file_type: FileType, executor: Executor):
+        self.file_type = file_type
+        self.executor = executor
+
+    def parse(self, file_content: bytes) -> pd.DataFrame:
+        return self.executor.submit(_parse, self.file_type, file_content).result()
+
+
 class ParserFactory:
+    def __init__(self, executor: Optional[Executor] = None):
+        self.executor = executor
+
     def create_parser(self, file_type: FileType) -> StatementParser:
+        if self.executor is not None:
+            return ExecutorParser(file_type, self.executor)
         return create_parser_func(file_type)
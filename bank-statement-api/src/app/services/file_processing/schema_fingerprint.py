@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import FrozenSet, Iterable, List, Optional
+
+import pandas as pd
+
+from src.app.repositories.statement_schema_repository import StatementSchemaRepository
+from src.app.schemas import ColumnMapping, StatementSchemaDefinition
+from src.app.services.file_processing.file_type_detector import FileType
+
+logger = logging.getLogger("app")
+
+
+def statement_hash(columns: Iterable, file_type: FileType) -> str:
+    """Files with the same columns, in any order, share a schema"""
+    columns_str = ",".join(sorted(str(column) for column in columns))
+    hash_input = f"{columns_str}|{file_type.name}"
+    return hashlib.sha256(hash_input.encode()).hexdigest()
+
+
+def header_at(df: pd.DataFrame, header_row: int) -> List[str]:
+    """The column names of a parsed file, read like TransactionsCleaner does"""
+    header = df.columns if header_row == 0 else df.iloc[header_row - 1]
+    return [str(column) for column in header.tolist()]
+
+
+def normalize_header(name: str) -> str:
+    """Lowercase ASCII words, e.g. "Montante (€)" and "montante" match"""
+    text = unicodedata.normalize("NFKD", str(name))
+    text = text.encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def header_tokens(columns: Iterable[str]) -> FrozenSet[str]:
+    return frozenset(
+        token for column in columns for token in normalize_header(column).split()
+    )
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def remap_columns(
+    column_mapping: ColumnMapping, header: List[str]
+) -> Optional[ColumnMapping]:
+    """The mapping moved onto a drifted header, or None if a mapped column is gone"""
+    by_name = {}
+    for column in header:
+        by_name.setdefault(normalize_header(column), column)
+
+    mapped = {}
+    for field, column in column_mapping.model_dump().items():
+        if not column:
+            mapped[field] = column
+            continue
+        match = (
+            column
+            if column in header
+            else by_name.get(normalize_header(column)) or _closest(column, header)
+        )
+        if match is None:
+            return None
+        mapped[field] = match
+
+    targets = [column for column in mapped.values() if column]
+    if len(set(targets)) != len(targets):
+        return None
+    return ColumnMapping(**mapped)
+
+
+def _closest(column: str, header: List[str]) -> Optional[str]:
+    # e.g. "Amount" -> "Amount (EUR)"; a tie means there is no telling which
+    tokens = header_tokens([column])
+    scores = sorted(
+        (
+            (jaccard(tokens, header_tokens([candidate])), candidate)
+            for candidate in header
+        ),
+        reverse=True,
+    )
+    if not scores or scores[0][0] < 0.5:
+        return None
+    if len(scores) > 1 and scores[1][0] == scores[0][0]:
+        return None
+    return scores[0][1]
+
+
+@dataclass
+class SimilarSchema:
+    # The stored schema, moved onto the new file's header
+    schema: StatementSchemaDefinition
+    similarity: float
+
+
+class SchemaSimilarityIndex:
+    """Finds the stored layout whose header is closest to a new file's.
+
+    Headers are compared as sets of normalized words (Jaccard), so reordered,
+    renamed or extra columns still match when most of the header is the same.
+    A match is only used if every mapped column can be found in the new
+    header. There are few layouts per installation, so all of them are
+    compared on each miss of the exact statement_hash lookup."""
+
+    def __init__(
+        self,
+        statement_schema_repository: StatementSchemaRepository,
+        threshold: Optional[float] = None,
+    ):
+        self.statement_schema_repository = statement_schema_repository
+        self.threshold = threshold or float(
+            os.getenv("SCHEMA_SIMILARITY_THRESHOLD", "0.8")
+        )
+
+    def find_similar(
+        self, df: pd.DataFrame, file_type: FileType
+    ) -> Optional[SimilarSchema]:
+        best: Optional[SimilarSchema] = None
+        for schema_data in self.statement_schema_repository.list_schema_data():
+            known = StatementSchemaDefinition.model_validate(schema_data)
+            if (
+                known.file_type != file_type.name
+                or not known.column_names
+                or known.header_row > len(df)
+            ):
+                continue
+
+            header = header_at(df, known.header_row)
+            similarity = jaccard(
+                header_tokens(known.column_names), header_tokens(header)
+            )
+            if similarity < self.threshold or (
+                best is not None and similarity <= best.similarity
+            ):
+                continue
+
+            column_mapping = remap_columns(known.column_mapping, header)
+            if column_mapping is None:
+                logger.debug(f"Schema {known.id} is similar but a column is missing")
+                continue
+            best = SimilarSchema(
+                schema=known.model_copy(
+                    update={"column_mapping": column_mapping, "column_names": header}
+                ),
+                similarity=similarity,
+            )
+        return best
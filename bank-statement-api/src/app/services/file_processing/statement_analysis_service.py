@@ -1,12 +1,14 @@
-import hashlib
 import json
 import logging
 import uuid
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import pandas as pd
 from fastapi.encoders import jsonable_encoder
 
+from src.app.logging.utils import log_payload
+from src.app.observability.tracing import Tracer
+from src.app.observability.tracing import tracer as default_tracer
 from src.app.repositories.statement_repository import StatementRepository
 from src.app.repositories.statement_schema_repository import StatementSchemaRepository
 from src.app.schemas import (
@@ -15,11 +17,19 @@ from src.app.schemas import (
     StatementSchemaDefinition,
 )
 from src.app.services.file_processing.column_normalizer import ColumnNormalizer
+from src.app.services.file_processing.conversion_model import ConversionModel
 from src.app.services.file_processing.file_type_detector import (
     FileType,
     FileTypeDetector,
 )
 from src.app.services.file_processing.parsers.parser_factory import ParserFactory
+from src.app.services.file_processing.schema_fingerprint import (
+    SchemaSimilarityIndex,
+    header_at,
+)
+from src.app.services.file_processing.schema_fingerprint import (
+    statement_hash as schema_statement_hash,
+)
 from src.app.services.file_processing.statement_statistics_calculator import (
     StatementStatisticsCalculator,
 )
@@ -28,6 +38,7 @@ from src.app.services.file_processing.transactions_builder import (
     TransactionsBuilder,
 )
 from src.app.services.file_processing.transactions_cleaner import TransactionsCleaner
+from src.app.storage.blob_store import BlobStore
 
 logger_content = logging.getLogger("app.llm.big")
 logger = logging.getLogger("app")
@@ -44,6 +55,8 @@ class StatementAnalysisService:
         statistics_calculator: StatementStatisticsCalculator,
         statement_repository: StatementRepository,
         statement_schema_repository: StatementSchemaRepository,
+        tracer: Optional[Tracer] = None,
+        schema_index: Optional[SchemaSimilarityIndex] = None,
     ):
         self.file_type_detector = file_type_detector
         self.parser_factory = parser_factory
@@ -53,120 +66,217 @@ class StatementAnalysisService:
         self.statistics_calculator = statistics_calculator
         self.statement_repository = statement_repository
         self.statement_schema_repository = statement_schema_repository
+        self.tracer = tracer or default_tracer
+        self.schema_index = schema_index or SchemaSimilarityIndex(
+            statement_schema_repository
+        )
 
     def analyze_statement(
         self, file_content: bytes, file_name: str
+    ) -> StatementAnalysisResponse:
+        with self.tracer.span("analyze", bytes=len(file_content)):
+            return self._analyze_statement(file_content, file_name)
+
+    def _analyze_statement(
+        self, file_content: bytes, file_name: str
     ) -> StatementAnalysisResponse:
         try:
-            statement_id = self.statement_repository.save(file_content, file_name)
+            with self.tracer.span("analyze.lookup_previous") as span:
+                previous = self.previous_analysis(file_content)
+                span.set("hit", previous is not None)
+            if previous is not None:
+                logger.info(
+                    f"{file_name} was analyzed before as {previous.statement_id}"
+                )
+                return previous
+
+            with self.tracer.span("analyze.save_statement", bytes=len(file_content)):
+                statement_id = self.statement_repository.save(file_content, file_name)
 
             file_type = self.file_type_detector.detect_file_type(file_name)
-            parser = self.parser_factory.create_parser(file_type)
-            df = parser.parse(file_content)
+            with self.tracer.span("analyze.parse", bytes=len(file_content)) as span:
+                parser = self.parser_factory.create_parser(file_type)
+                df = parser.parse(file_content)
+                span.set("rows", len(df))
 
-            conversion_model = self.column_normalizer.normalize_columns(df)
+            statement_schema = self.find_schema(df, file_type)
+            if statement_schema is None:
+                conversion_model = self.normalize_columns(df)
+                statement_schema = self.create_schema(df, file_type, conversion_model)
+            else:
+                conversion_model = self.conversion_model(statement_schema)
 
-            logger_content.debug(
-                json.dumps(jsonable_encoder(conversion_model)),
-                extra={
-                    "prefix": "statement_analysis_service.conversion_model",
-                    "ext": "json",
-                },
+            with self.tracer.span("analyze.clean") as span:
+                cleaned_df = self.transaction_cleaner.clean(df, conversion_model)
+                span.set("rows", len(cleaned_df))
+            log_payload(
+                logger_content,
+                lambda: cleaned_df.to_csv(index=False),
+                prefix="statement_analysis_service.cleaned_df",
+                ext="csv",
             )
 
-            statement_hash = self._calculate_statement_hash(
-                df.columns.tolist(), file_type
-            )
+            with self.tracer.span("analyze.build") as span:
+                transactions = self.transactions_builder.build_transactions(cleaned_df)
+                span.set("rows", len(transactions))
+
+            return self.build_response(statement_id, statement_schema, df, transactions)
+
+        except Exception as e:
+            logger.error(f"Error analyzing file: {str(e)}")
+            raise ValueError(f"Error analyzing file: {str(e)}")
+
+    def normalize_columns(self, df: pd.DataFrame) -> ConversionModel:
+        with self.tracer.span("analyze.llm_normalize"):
+            conversion_model = self.column_normalizer.normalize_columns(df)
+
+        log_payload(
+            logger_content,
+            lambda: json.dumps(jsonable_encoder(conversion_model)),
+            prefix="statement_analysis_service.conversion_model",
+            ext="json",
+        )
+        return conversion_model
+
+    def find_schema(
+        self, df: pd.DataFrame, file_type: FileType
+    ) -> Optional[StatementSchemaDefinition]:
+        """The stored schema for these columns, else one adapted from a stored
+        schema for a similar header (saved for these columns), else None"""
+        statement_hash = self.statement_hash(df, file_type)
 
+        with self.tracer.span("analyze.schema_lookup") as span:
             existing_schema = self.statement_schema_repository.find_by_statement_hash(
                 statement_hash
             )
-            source_id = None
+            span.set("hit", existing_schema is not None)
+        if existing_schema:
+            return StatementSchemaDefinition.model_validate(existing_schema.schema_data)
 
-            if existing_schema:
-                statement_schema = StatementSchemaDefinition.model_validate(
-                    existing_schema.schema_data
-                )
-                source_id = statement_schema.source_id
-            else:
-                column_names = (
-                    df.columns.tolist()
-                    if conversion_model.header_row == 0
-                    else df.iloc[conversion_model.header_row - 1].tolist()
-                )
-                logger.debug(
-                    column_names,
-                    extra={
-                        "prefix": "statement_analysis_service.column_names",
-                    },
-                )
+        with self.tracer.span("analyze.schema_similarity") as span:
+            similar = self.schema_index.find_similar(df, file_type)
+            span.set("hit", similar is not None)
+        if similar is None:
+            return None
 
-                column_names = [str(col) for col in column_names]
-
-                schema_id = str(uuid.uuid4())
-                statement_schema = StatementSchemaDefinition(
-                    id=schema_id,
-                    source_id=source_id,
-                    file_type=file_type.name,
-                    column_mapping=ColumnMapping(**conversion_model.column_map),
-                    start_row=conversion_model.start_row,
-                    header_row=conversion_model.header_row,
-                    column_names=column_names,
-                )
+        logger.info(
+            f"Reusing schema {similar.schema.id} for a header "
+            f"{similar.similarity:.0%} similar to its own"
+        )
+        statement_schema = similar.schema.model_copy(update={"id": str(uuid.uuid4())})
+        saved_id = self._save_schema(statement_hash, statement_schema)
+        return statement_schema.model_copy(update={"id": saved_id})
 
-                self.statement_schema_repository.save(
-                    {
-                        "id": schema_id,
-                        "statement_hash": statement_hash,
-                        "schema_data": statement_schema.model_dump(),
-                    }
-                )
+    def create_schema(
+        self, df: pd.DataFrame, file_type: FileType, conversion_model: ConversionModel
+    ) -> StatementSchemaDefinition:
+        """A new schema from the LLM mapping, saved for these columns"""
+        column_names = header_at(df, conversion_model.header_row)
+        logger.debug(
+            column_names,
+            extra={
+                "prefix": "statement_analysis_service.column_names",
+            },
+        )
+
+        statement_schema = StatementSchemaDefinition(
+            id=str(uuid.uuid4()),
+            source_id=None,
+            file_type=file_type.name,
+            column_mapping=ColumnMapping(**conversion_model.column_map),
+            start_row=conversion_model.start_row,
+            header_row=conversion_model.header_row,
+            column_names=column_names,
+        )
+
+        saved_id = self._save_schema(
+            self.statement_hash(df, file_type), statement_schema
+        )
+        return statement_schema.model_copy(update={"id": saved_id})
 
-            cleaned_df = self.transaction_cleaner.clean(df, conversion_model)
-            logger_content.debug(
-                cleaned_df.to_csv(index=False),
-                extra={"prefix": "statement_analysis_service.cleaned_df", "ext": "csv"},
+    def _save_schema(
+        self, statement_hash: str, statement_schema: StatementSchemaDefinition
+    ) -> str:
+        """The id the schema is stored under, which is another analysis's if
+        that saved the same columns first"""
+        with self.tracer.span("analyze.schema_save"):
+            return self.statement_schema_repository.save(
+                {
+                    "id": statement_schema.id,
+                    "statement_hash": statement_hash,
+                    "schema_data": statement_schema.model_dump(),
+                }
             )
 
-            transactions = self.transactions_builder.build_transactions(cleaned_df)
+    @staticmethod
+    def conversion_model(
+        statement_schema: StatementSchemaDefinition,
+    ) -> ConversionModel:
+        return ConversionModel(
+            column_map=statement_schema.column_mapping.model_dump(),
+            header_row=statement_schema.header_row,
+            start_row=statement_schema.start_row,
+        )
 
+    def build_response(
+        self,
+        statement_id: str,
+        statement_schema: StatementSchemaDefinition,
+        df: pd.DataFrame,
+        transactions: List[StatementTransaction],
+    ) -> StatementAnalysisResponse:
+        """Statistics and preview for a parsed file, stored for replay"""
+        with self.tracer.span("analyze.statistics", rows=len(transactions)):
             statistics = self.statistics_calculator.calc_statistics(transactions)
 
-            preview_df = pd.DataFrame(
-                [df.columns.tolist()] + df.iloc[:9].values.tolist()
-            )
+        preview_df = pd.DataFrame([df.columns.tolist()] + df.iloc[:9].values.tolist())
 
-            preview_rows = []
-            for _, row in preview_df.iterrows():
-                row_values = []
-                for col in preview_df.columns:
-                    value = row[col]
-                    if pd.isna(value):
-                        row_values.append("")
-                    else:
-                        row_values.append(str(value))
-                preview_rows.append(row_values)
-
-            response = StatementAnalysisResponse(
-                statementSchema=statement_schema,
-                statementId=statement_id,
-                totalTransactions=statistics.total_transactions,
-                totalAmount=float(statistics.total_amount),
-                dateRangeStart=statistics.date_range_start,
-                dateRangeEnd=statistics.date_range_end,
-                preview_rows=preview_rows,
-            )
+        preview_rows = []
+        for _, row in preview_df.iterrows():
+            row_values = []
+            for col in preview_df.columns:
+                value = row[col]
+                if pd.isna(value):
+                    row_values.append("")
+                else:
+                    row_values.append(str(value))
+            preview_rows.append(row_values)
 
-            return response
+        response = StatementAnalysisResponse(
+            statementSchema=statement_schema,
+            statementId=statement_id,
+            totalTransactions=statistics.total_transactions,
+            totalAmount=float(statistics.total_amount),
+            dateRangeStart=statistics.date_range_start,
+            dateRangeEnd=statistics.date_range_end,
+            preview_rows=preview_rows,
+        )
 
-        except Exception as e:
-            logger.error(f"Error analyzing file: {str(e)}")
-            raise ValueError(f"Error analyzing file: {str(e)}")
+        self.statement_repository.save_analysis(
+            statement_id, jsonable_encoder(response)
+        )
+
+        return response
+
+    def previous_analysis(
+        self, file_content: bytes
+    ) -> Optional[StatementAnalysisResponse]:
+        statement = self.statement_repository.find_analyzed(
+            BlobStore.hash(file_content)
+        )
+        if statement is None:
+            return None
+
+        response = StatementAnalysisResponse.model_validate(statement.analysis)
+        # The schema may have been corrected when the file was imported
+        if statement.import_result:
+            response.statement_schema = StatementSchemaDefinition.model_validate(
+                statement.import_result["statement_schema"]
+            )
+        return response
 
-    def _calculate_statement_hash(self, columns: List[str], file_type: FileType) -> str:
-        columns_str = ",".join(sorted(columns))
-        hash_input = f"{columns_str}|{file_type.name}"
-        return hashlib.sha256(hash_input.encode()).hexdigest()
+    def statement_hash(self, df: pd.DataFrame, file_type: FileType) -> str:
+        return schema_statement_hash(df.columns, file_type)
 
     def _prepare_preview_rows(
         self, transactions: List[StatementTransaction]
@@ -1,22 +1,37 @@
-import hashlib
 import json
 import logging
-from typing import List, Optional
+import os
+import uuid
+from typing import Callable, List, Optional
 
 from fastapi.encoders import jsonable_encoder
 
+from src.app.common.fingerprint import normalize_description, statement_fingerprints
+from src.app.logging.utils import log_payload
+from src.app.models import Transaction
+from src.app.observability.tracing import Tracer
+from src.app.observability.tracing import tracer as default_tracer
 from src.app.repositories.statement_repository import StatementRepository
 from src.app.repositories.statement_schema_repository import StatementSchemaRepository
 from src.app.repositories.transactions_repository import TransactionsRepository
 from src.app.schemas import (
     ColumnMapping,
     FileUploadResponse,
+    StatementSchemaDefinition,
     TransactionCreate,
     UploadFileSpec,
 )
 from src.app.services.file_processing.conversion_model import ConversionModel
 from src.app.services.file_processing.file_type_detector import FileType
+from src.app.services.file_processing.incremental_import import (
+    ImportPartition,
+    IncrementalImport,
+)
 from src.app.services.file_processing.parsers.parser_factory import ParserFactory
+from src.app.services.file_processing.schema_fingerprint import (
+    header_at,
+    statement_hash,
+)
 from src.app.services.file_processing.transactions_builder import (
     StatementTransaction,
     TransactionsBuilder,
@@ -26,10 +41,11 @@ from src.app.services.file_processing.transactions_cleaner import TransactionsCl
 logger_content = logging.getLogger("app.llm.big")
 logger = logging.getLogger("app")
 
+# Rows per INSERT; progress is reported after each one
+INSERT_BATCH_SIZE = int(os.getenv("UPLOAD_INSERT_BATCH_SIZE", "1000"))
 
-def _calculate_statement_hash(column_names: list[str], file_type: str) -> str:
-    joined = ",".join(column_names) + f"|{file_type}"
-    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+# Called with the stage an upload reached and the counts known so far
+UploadProgress = Callable[..., None]
 
 
 class StatementUploadService:
@@ -41,6 +57,8 @@ class StatementUploadService:
         statement_repository: StatementRepository,
         transactions_repository: TransactionsRepository,
         statement_schema_repository: StatementSchemaRepository,
+        tracer: Optional[Tracer] = None,
+        incremental_import: Optional[IncrementalImport] = None,
     ):
         self.parser_factory = parser_factory
         self.transaction_cleaner = transaction_cleaner
@@ -48,21 +66,37 @@ class StatementUploadService:
         self.statement_repository = statement_repository
         self.transactions_repository = transactions_repository
         self.statement_schema_repository = statement_schema_repository
-
-    def upload_statement(self, spec: UploadFileSpec) -> FileUploadResponse:
+        self.tracer = tracer or default_tracer
+        self.incremental_import = incremental_import
+
+    def upload_statement(
+        self, spec: UploadFileSpec, progress: Optional[UploadProgress] = None
+    ) -> FileUploadResponse:
+        with self.tracer.span("upload"):
+            return self._upload_statement(spec, progress or _ignore_progress)
+
+    def _upload_statement(
+        self, spec: UploadFileSpec, progress: UploadProgress
+    ) -> FileUploadResponse:
         try:
-            logger_content.debug(
-                json.dumps(jsonable_encoder(spec.statement_schema)),
-                extra={
-                    "prefix": "statement_upload_service.upload_statement.statement_schema",
-                    "ext": "json",
-                },
+            log_payload(
+                logger_content,
+                lambda: json.dumps(jsonable_encoder(spec.statement_schema)),
+                prefix="statement_upload_service.upload_statement.statement_schema",
+                ext="json",
             )
-            statement = self.statement_repository.get_by_id(spec.statement_id)
-            if not statement:
-                raise ValueError(f"Statement with ID {spec.statement_id} not found")
-
-            file_content = statement["content"]
+            with self.tracer.span("upload.lookup_previous") as span:
+                previous = self._previous_import(spec)
+                span.set("hit", previous is not None)
+            if previous is not None:
+                logger.info(f"Statement {spec.statement_id} was imported before")
+                return previous
+
+            with self.tracer.span("upload.fetch_statement") as span:
+                file_content = self.statement_repository.read_content(spec.statement_id)
+                if file_content is None:
+                    raise ValueError(f"Statement with ID {spec.statement_id} not found")
+                span.set("bytes", len(file_content))
 
             file_type_str = spec.statement_schema.file_type
             if file_type_str == "CSV":
@@ -74,8 +108,11 @@ class StatementUploadService:
             else:
                 file_type = FileType.UNKNOWN
 
-            parser = self.parser_factory.create_parser(file_type)
-            df = parser.parse(file_content)
+            progress("parsing")
+            with self.tracer.span("upload.parse", bytes=len(file_content)) as span:
+                parser = self.parser_factory.create_parser(file_type)
+                df = parser.parse(file_content)
+                span.set("rows", len(df))
 
             conversion_model = self._create_conversion_model(
                 spec.statement_schema.column_mapping,
@@ -83,74 +120,79 @@ class StatementUploadService:
                 spec.statement_schema.header_row,
             )
 
-            logger_content.debug(
-                json.dumps(conversion_model.__dict__),
-                extra={
-                    "prefix": "statement_upload_service.upload_statement.conversion_model",
-                    "ext": "json",
-                },
+            log_payload(
+                logger_content,
+                lambda: json.dumps(conversion_model.__dict__),
+                prefix="statement_upload_service.upload_statement.conversion_model",
+                ext="json",
             )
 
-            cleaned_df = self.transaction_cleaner.clean(df, conversion_model)
+            progress("cleaning")
+            with self.tracer.span("upload.clean") as span:
+                cleaned_df = self.transaction_cleaner.clean(df, conversion_model)
+                span.set("rows", len(cleaned_df))
 
-            logger_content.debug(
-                cleaned_df.to_csv(index=False),
-                extra={
-                    "prefix": "statement_upload_service.upload_statement.cleaned_df",
-                    "ext": "csv",
-                },
+            log_payload(
+                logger_content,
+                lambda: cleaned_df.to_csv(index=False),
+                prefix="statement_upload_service.upload_statement.cleaned_df",
+                ext="csv",
             )
 
-            transactions = self.transactions_builder.build_transactions(cleaned_df)
+            with self.tracer.span("upload.build") as span:
+                transactions = self.transactions_builder.build_transactions(cleaned_df)
+                span.set("rows", len(transactions))
 
-            logger_content.debug(
-                json.dumps(jsonable_encoder(transactions)),
-                extra={
-                    "prefix": "statement_upload_service.upload_statement.transactions",
-                    "ext": "json",
-                },
+            log_payload(
+                logger_content,
+                lambda: json.dumps(jsonable_encoder(transactions)),
+                prefix="statement_upload_service.upload_statement.transactions",
+                ext="json",
             )
 
-            duplicates = self.transactions_repository.find_duplicates(
-                transactions, spec.statement_schema.source_id
-            )
-            unique_transactions = [t for t in transactions if t not in duplicates]
-
+            progress("deduplicating", rows_parsed=len(transactions))
+            source_id = spec.statement_schema.source_id
             transaction_creates = self._create_transaction_models(
-                unique_transactions, spec.statement_schema.source_id
-            )
-            created_transactions = self.transactions_repository.create_many(
-                transaction_creates
-            )
-
-            logger_content.debug(
-                jsonable_encoder(spec.statement_schema),
-                extra={
-                    "prefix": "statement_upload_service.upload_statement.statement_schema",
-                    "ext": "json",
-                },
-            )
-
-            column_names = cleaned_df.columns.tolist()
-            schema_data = {
-                "id": spec.statement_schema.id,
-                "statement_hash": _calculate_statement_hash(
-                    column_names,
-                    spec.statement_schema.file_type,
-                ),
-                "schema_data": jsonable_encoder(spec.statement_schema),
-            }
-
-            # Update the schema
-            self.statement_schema_repository.update(
-                spec.statement_schema.id, schema_data
+                transactions, source_id, spec.statement_id
             )
+            with self.tracer.span("upload.dedupe", rows=len(transactions)) as span:
+                partition = self._partition(transaction_creates, source_id)
+                span.set("rejected", len(partition.rejected))
+
+            # Rows whose fingerprint is already stored are skipped by the insert
+            progress("inserting", duplicates=len(partition.rejected))
+            with self.tracer.span("upload.insert", rows=len(partition.to_dedupe)):
+                created_transactions = self._insert(partition, progress)
+                if self.incremental_import and source_id is not None:
+                    self.incremental_import.record(transaction_creates, source_id)
+            skipped_duplicates = len(transaction_creates) - len(created_transactions)
+
+            with self.tracer.span("upload.schema_update"):
+                self._save_schema(
+                    statement_hash(df.columns, file_type),
+                    spec.statement_schema.model_copy(
+                        update={
+                            "column_names": header_at(
+                                df, spec.statement_schema.header_row
+                            )
+                        }
+                    ),
+                )
 
             response = FileUploadResponse(
                 message="File processed successfully",
-                transactions_processed=len(unique_transactions),
+                transactions_processed=len(created_transactions),
                 transactions=created_transactions,
-                skipped_duplicates=len(duplicates),
+                skipped_duplicates=skipped_duplicates,
+            )
+
+            self.statement_repository.save_import_result(
+                spec.statement_id,
+                {
+                    "statement_schema": jsonable_encoder(spec.statement_schema),
+                    "transactions_processed": response.transactions_processed,
+                    "skipped_duplicates": response.skipped_duplicates,
+                },
             )
 
             return response
@@ -159,6 +201,70 @@ class StatementUploadService:
             logger.error(f"Error uploading file: {str(e)}")
             raise ValueError(f"Error uploading file: {str(e)}")
 
+    def _insert(
+        self, partition: ImportPartition, progress: UploadProgress
+    ) -> List[Transaction]:
+        created: List[Transaction] = []
+        rows = partition.to_dedupe
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            batch = rows[start : start + INSERT_BATCH_SIZE]
+            created.extend(self.transactions_repository.insert_new(batch))
+            checked = start + len(batch)
+            progress(
+                "inserting",
+                rows_inserted=len(created),
+                duplicates=len(partition.rejected) + checked - len(created),
+            )
+        return created
+
+    def _save_schema(
+        self, statement_hash: str, statement_schema: StatementSchemaDefinition
+    ) -> None:
+        """Keeps the schema, as corrected by the user, for files with these columns.
+
+        Under the same hash as the analysis looks up; the schema the file was
+        analyzed with may belong to a similar layout, which is left alone."""
+        existing = self.statement_schema_repository.find_by_statement_hash(
+            statement_hash
+        )
+        schema_id = existing.id if existing is not None else str(uuid.uuid4())
+        schema_data = {
+            "id": schema_id,
+            "statement_hash": statement_hash,
+            "schema_data": jsonable_encoder(
+                statement_schema.model_copy(update={"id": schema_id})
+            ),
+        }
+        if existing is not None:
+            self.statement_schema_repository.update(schema_id, schema_data)
+        else:
+            self.statement_schema_repository.save(schema_data)
+
+    def _partition(
+        self, transactions: List[TransactionCreate], source_id: Optional[int]
+    ) -> ImportPartition:
+        if self.incremental_import is None or source_id is None:
+            return ImportPartition(to_dedupe=transactions)
+        return self.incremental_import.partition(transactions, source_id)
+
+    def _previous_import(self, spec: UploadFileSpec) -> Optional[FileUploadResponse]:
+        """The stored result, if this statement was imported with the same schema"""
+        import_result = self.statement_repository.get_import_result(spec.statement_id)
+        if not import_result or import_result["statement_schema"] != jsonable_encoder(
+            spec.statement_schema
+        ):
+            return None
+
+        return FileUploadResponse(
+            message="File was already imported",
+            transactions_processed=import_result["transactions_processed"],
+            transactions=self.transactions_repository.get_by_statement_id(
+                spec.statement_id
+            ),
+            skipped_duplicates=import_result["skipped_duplicates"],
+            already_imported=True,
+        )
+
     def _determine_file_type(self, file_name: str) -> FileType:
         extension = file_name.split(".")[-1].lower()
         if extension == "csv":
@@ -179,10 +285,15 @@ class StatementUploadService:
         )
 
     def _create_transaction_models(
-        self, transactions: List[StatementTransaction], source_id: Optional[int] = None
+        self,
+        transactions: List[StatementTransaction],
+        source_id: Optional[int] = None,
+        statement_id: Optional[str] = None,
     ) -> List[TransactionCreate]:
+        """One model per row; transactions must be the whole statement, in order"""
         actual_source_id = source_id if source_id is not None else 1
 
+        fingerprints = statement_fingerprints(transactions, actual_source_id)
         return [
             TransactionCreate(
                 date=transaction.date,
@@ -195,18 +306,15 @@ class StatementUploadService:
                 normalized_description=self._normalize_description(
                     transaction.description
                 ),
+                statement_id=statement_id,
+                fingerprint=fingerprint,
             )
-            for transaction in transactions
+            for transaction, fingerprint in zip(transactions, fingerprints)
         ]
 
     def _normalize_description(self, description: str) -> str:
-        import re
-
-        if not description:
-            return ""
+        return normalize_description(description)
 
-        description = str(description).lower()
-        description = re.sub(r"[^\w\s]", " ", description)
-        description = re.sub(r"\s+", " ", description).strip()
 
-        return description
+def _ignore_progress(stage: str, **counts: int) -> None:
+    pass
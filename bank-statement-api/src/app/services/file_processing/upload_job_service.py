@@ -0,0 +1,134 @@
+import logging
+from concurrent.futures import Executor, Future
+from contextlib import nullcontext
+from functools import partial
+from typing import Any, Callable, ContextManager, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from src.app.repositories.upload_jobs_repository import UploadJobsRepository
+from src.app.schemas import FileUploadResponse, UploadFileSpec, UploadJobResult
+from src.app.services.file_processing.statement_upload_service import (
+    StatementUploadService,
+)
+
+logger = logging.getLogger("app")
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class UploadJobService:
+    """Runs statement uploads in the background, recording their progress.
+
+    Jobs are handed to enqueue (e.g. a Celery task) when given, otherwise to
+    executor; with neither they run before submit returns. Each run gets its
+    own session from scope, as it outlives the request that submitted it."""
+
+    def __init__(
+        self,
+        jobs_repository: UploadJobsRepository,
+        upload_service: StatementUploadService,
+        executor: Optional[Executor] = None,
+        enqueue: Optional[Callable[[str], Any]] = None,
+        scope: Optional[Callable[[], ContextManager]] = None,
+        schedule_categorization: Optional[Callable[[int], str]] = None,
+    ):
+        self.jobs_repository = jobs_repository
+        self.upload_service = upload_service
+        self.executor = executor
+        self.enqueue = enqueue
+        self.scope = scope or nullcontext
+        self.schedule_categorization = schedule_categorization
+        self.backend = "celery" if enqueue is not None else "thread"
+
+    def submit(self, spec: UploadFileSpec, auto_categorize: bool = True) -> str:
+        job_id = self.jobs_repository.create(
+            spec.statement_id,
+            jsonable_encoder(spec),
+            auto_categorize,
+            backend=self.backend,
+        )
+        if self.enqueue is not None:
+            self.enqueue(job_id)
+        elif self.executor is not None:
+            future = self.executor.submit(self._run_in_scope, job_id)
+            future.add_done_callback(partial(self._on_done, job_id))
+        else:
+            self.run(job_id)
+        return job_id
+
+    def _run_in_scope(self, job_id: str) -> None:
+        with self.scope():
+            self.run(job_id)
+
+    def _on_done(self, job_id: str, future: Future) -> None:
+        # Shutting the executor down cancels the jobs that had not started
+        if future.cancelled():
+            with self.scope():
+                self.jobs_repository.update(
+                    job_id, status="failed", error="Cancelled when the server stopped"
+                )
+
+    def fail_stale(self, idle_seconds: float) -> int:
+        """Fails thread jobs left unfinished by an API process that stopped
+        without warning; Celery jobs are left to the broker and workers"""
+        if self.backend != "thread":
+            return 0
+        count = self.jobs_repository.fail_stale(
+            "thread", idle_seconds, "Abandoned when the server stopped"
+        )
+        if count:
+            logger.warning(f"Marked {count} abandoned upload jobs as failed")
+        return count
+
+    def run(self, job_id: str) -> None:
+        job = self.jobs_repository.get(job_id)
+        if job is None:
+            logger.error(f"Upload job {job_id} not found")
+            return
+        spec = UploadFileSpec.model_validate(job.spec)
+        auto_categorize = job.auto_categorize
+
+        def progress(stage: str, **counts: int) -> None:
+            self.jobs_repository.update(job_id, stage=stage, **counts)
+
+        self.jobs_repository.update(job_id, status="running")
+        try:
+            response = self.upload_service.upload_statement(spec, progress)
+        except Exception as e:
+            logger.error(f"Upload job {job_id} failed: {str(e)}")
+            # The upload may have left the shared session in a failed transaction
+            self.jobs_repository.rollback()
+            self.jobs_repository.update(job_id, status="failed", error=str(e))
+            return
+
+        if (
+            auto_categorize
+            and self.schedule_categorization
+            and response.transactions_processed > 0
+            and not response.already_imported
+        ):
+            self._schedule_categorization(response)
+
+        self.jobs_repository.update(
+            job_id,
+            status="succeeded",
+            stage=None,
+            rows_inserted=response.transactions_processed,
+            duplicates=response.skipped_duplicates,
+            result=jsonable_encoder(
+                UploadJobResult.model_validate(response.model_dump())
+            ),
+        )
+
+    def _schedule_categorization(self, response: FileUploadResponse) -> None:
+        # As for synchronous uploads, the safety net picks up what this misses
+        try:
+            response.categorization_task_id = self.schedule_categorization(
+                response.transactions_processed
+            )
+            response.message = (
+                "File processed successfully and categorization triggered"
+            )
+        except Exception:
+            logger.exception("Failed to schedule categorization")
@@ -1,46 +1,97 @@
 import asyncio
 import inspect
 import logging
+import time
+from dataclasses import dataclass, replace
+from typing import List, Optional, Set
 
+from ..ai.llm_client import LLMRateLimitError
 from ..logging.utils import log_exception
+from ..observability.metrics import (
+    CATEGORIZATION_RATE_LIMIT_BACKOFFS,
+    CATEGORIZED_TRANSACTIONS,
+)
 from ..repositories.categories_repository import CategoriesRepository
 from ..repositories.transactions_repository import TransactionsRepository
 from .categorizers.transaction_categorizer import (
     CategorisationData,
+    CategorizationResult,
     TransactionCategorizer,
 )
 
 logger = logging.getLogger("app")
 
 
+@dataclass
+class RateLimitBackoff:
+    """Exponential backoff while the LLM keeps rate limiting us"""
+
+    initial_seconds: float = 1.0
+    max_seconds: float = 60.0
+    max_retries: int = 5
+    retries: int = 0
+
+    def next_delay(self, retry_after: Optional[float] = None) -> Optional[float]:
+        if self.retries >= self.max_retries:
+            return None
+        delay = retry_after or self.initial_seconds * 2**self.retries
+        self.retries += 1
+        return min(delay, self.max_seconds)
+
+    def reset(self):
+        self.retries = 0
+
+
+@dataclass
+class DrainResult:
+    categorized: int = 0
+    # Rows the categorizer had no answer for; retried by a later drain
+    unresolved: int = 0
+    rate_limited: bool = False
+
+
 class TransactionCategorizationService:
     def __init__(
         self,
         categories_repository: CategoriesRepository,
         transactions_repository: TransactionsRepository,
         categorizer: TransactionCategorizer,
+        backoff: Optional[RateLimitBackoff] = None,
     ):
         self.categories_repository = categories_repository
         self.transactions_repository = transactions_repository
         self.categorizer = categorizer
+        self.backoff = backoff or RateLimitBackoff()
         self.is_async_categorizer = inspect.iscoroutinefunction(
             categorizer.categorize_transaction
         )
 
     async def categorize_pending_transactions(self, batch_size: int = 10) -> int:
-        categorized_count = 0
+        return (await self.drain(batch_size)).categorized
+
+    async def drain(
+        self, batch_size: int = 10, max_seconds: Optional[float] = None
+    ) -> DrainResult:
+        """Categorize pending transactions batch by batch until none are left.
+
+        Stops early once max_seconds have passed or the LLM is still rate
+        limiting after the backoff retries; the rest stays pending. Rows
+        without an answer stay pending too, skipped until the next drain."""
+        result = DrainResult()
+        unresolved_ids: Set[int] = set()
+        backoff = replace(self.backoff, retries=0)
+        started = time.monotonic()
         logger.debug("Starting categorization process...")
-        while True:
-            await asyncio.sleep(1)
+        while max_seconds is None or time.monotonic() - started < max_seconds:
             pending_transactions = (
-                self.transactions_repository.get_uncategorized_transactions(batch_size)
+                self.transactions_repository.get_uncategorized_transactions(
+                    batch_size, exclude_ids=unresolved_ids
+                )
             )
             logger.debug(f"Found {len(pending_transactions)} pending transactions")
             if not pending_transactions:
                 break
 
-            categorized_count += len(pending_transactions)
-
             categorized_transactions = [
                 CategorisationData(
                     transaction_id=transaction.id,
@@ -49,35 +100,67 @@ class TransactionCategorizationService:
                 )
                 for transaction in pending_transactions
             ]
-            results = await self.categorizer.categorize_transaction(
-                categorized_transactions
-            )
-            for result in results:
-                try:
-                    sub_category_id = result.sub_category_id
-                    logger.debug(
-                        f"Categorizing transaction {result.transaction_id} with sub_category_id {sub_category_id}"
-                    )
-                    category_id = self.categories_repository.get_parent_category_id(
-                        sub_category_id
-                    )
-                    logger.debug(f"Found parent category_id {category_id}")
-                    self.transactions_repository.update_transaction_category(
-                        transaction_id=result.transaction_id,
-                        category_id=category_id,
-                        sub_category_id=sub_category_id,
-                        status="categorized",
-                    )
-                    logger.debug(f"Categorized transaction {result.transaction_id}")
-                    categorized_count += 1
-                except Exception:
-                    self.transactions_repository.update_transaction_category(
-                        transaction_id=result.transaction_id,
-                        category_id=None,
-                        sub_category_id=None,
-                        status="failed",
-                    )
-                    log_exception(
-                        f"Failed to categorize transaction {result.transaction_id}"
-                    )
+            try:
+                results = await self.categorizer.categorize_transaction(
+                    categorized_transactions
+                )
+            except LLMRateLimitError as e:
+                delay = backoff.next_delay(e.retry_after)
+                if delay is None:
+                    logger.warning("LLM still rate limited, stopping categorization")
+                    result.rate_limited = True
+                    break
+                CATEGORIZATION_RATE_LIMIT_BACKOFFS.inc()
+                logger.info(f"LLM rate limited, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            backoff.reset()
+            result.categorized += self._apply_results(results)
+
+            # Partial or malformed answers, or rows no stage matched
+            resolved_ids = {r.transaction_id for r in results}
+            unresolved = [
+                t.id for t in pending_transactions if t.id not in resolved_ids
+            ]
+            if unresolved:
+                self.transactions_repository.record_unresolved(unresolved)
+                CATEGORIZED_TRANSACTIONS.labels("unresolved").inc(len(unresolved))
+                unresolved_ids.update(unresolved)
+                result.unresolved += len(unresolved)
+        return result
+
+    def _apply_results(self, results: List[CategorizationResult]) -> int:
+        categorized_count = 0
+        for result in results:
+            try:
+                sub_category_id = result.sub_category_id
+                logger.debug(
+                    f"Categorizing transaction {result.transaction_id} with sub_category_id {sub_category_id}"
+                )
+                category_id = self.categories_repository.get_parent_category_id(
+                    sub_category_id
+                )
+                logger.debug(f"Found parent category_id {category_id}")
+                self.transactions_repository.update_transaction_category(
+                    transaction_id=result.transaction_id,
+                    category_id=category_id,
+                    sub_category_id=sub_category_id,
+                    status="categorized",
+                )
+                logger.debug(f"Categorized transaction {result.transaction_id}")
+                CATEGORIZED_TRANSACTIONS.labels("categorized").inc()
+                categorized_count += 1
+            except Exception:
+                self.transactions_repository.update_transaction_category(
+                    transaction_id=result.transaction_id,
+                    category_id=None,
+                    sub_category_id=None,
+                    status="failed",
+                )
+                CATEGORIZED_TRANSACTIONS.labels("failed").inc()
+                log_exception(
+                    f"Failed to categorize transaction {result.transaction_id}"
+                )
+
         return categorized_count
@@ -0,0 +1,161 @@
+import csv
+import io
+import json
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Literal
+
+from ..repositories.transactions_repository import (
+    EXPORT_COLUMNS,
+    TransactionsFilter,
+    TransactionsRepository,
+)
+
+ExportFormat = Literal["csv", "ndjson", "parquet"]
+
+
+@dataclass(frozen=True)
+class ExportFormatSpec:
+    media_type: str
+    extension: str
+
+
+EXPORT_FORMATS: Dict[str, ExportFormatSpec] = {
+    "csv": ExportFormatSpec("text/csv", "csv"),
+    "ndjson": ExportFormatSpec("application/x-ndjson", "ndjson"),
+    "parquet": ExportFormatSpec("application/vnd.apache.parquet", "parquet"),
+}
+
+
+class ExportFormatUnavailable(Exception):
+    pass
+
+
+class TransactionsExporter:
+    """Streams filtered transactions as CSV, NDJSON or Parquet.
+
+    Rows come from a server-side cursor and are written out batch by batch,
+    so memory stays flat however many rows match."""
+
+    def __init__(
+        self, transactions_repository: TransactionsRepository, batch_size: int = 1000
+    ):
+        self.transactions_repository = transactions_repository
+        self.batch_size = batch_size
+
+    def export(
+        self, filter: TransactionsFilter, format: ExportFormat
+    ) -> Iterator[bytes]:
+        writer = self._writer(format)
+        rows = self.transactions_repository.stream_for_export(filter, self.batch_size)
+        return writer(_batches(rows, self.batch_size))
+
+    def _writer(
+        self, format: ExportFormat
+    ) -> Callable[[Iterable[List]], Iterator[bytes]]:
+        if format == "csv":
+            return _write_csv
+        if format == "ndjson":
+            return _write_ndjson
+        if format == "parquet":
+            # Checked before the response starts, so the client gets a clean error
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ExportFormatUnavailable(
+                    "Parquet export requires pyarrow (pip install '.[parquet]')"
+                )
+            return _write_parquet
+        raise ValueError(f"Unknown export format: {format}")
+
+
+def _batches(rows: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _write_csv(batches: Iterable[List]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _write_ndjson(batches: Iterable[List]) -> Iterator[bytes]:
+    for batch in batches:
+        lines = [
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=_json_default)
+            for row in batch
+        ]
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def _json_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return float(value)
+
+
+class _ChunkSink(io.RawIOBase):
+    """File object for the Parquet writer that hands back what it was given"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _write_parquet(batches: Iterable[List]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            ("id", pa.int64()),
+            ("date", pa.date32()),
+            ("description", pa.string()),
+            ("amount", pa.decimal128(12, 2)),
+            ("currency", pa.string()),
+            ("source", pa.string()),
+            ("category", pa.string()),
+            ("sub_category", pa.string()),
+            ("categorization_status", pa.string()),
+        ]
+    )
+    sink = _ChunkSink()
+    # One row group per batch, flushed to the client as soon as it is written
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in batches:
+            columns = [
+                pa.array(values, type=field.type)
+                for values, field in zip(zip(*batch), schema)
+            ]
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
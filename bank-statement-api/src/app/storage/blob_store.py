@@ -0,0 +1,230 @@
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import ContextManager, Iterator, Optional
+
+import zstandard
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..db import dialect_insert
+from ..models import StatementBlob
+
+logger = logging.getLogger("app")
+
+
+class BlobNotFound(Exception):
+    pass
+
+
+class BlobBackend(ABC):
+    """Stores compressed blobs under their SHA-256 hex digest"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def put(self, key: str, data: bytes, size: int) -> None:
+        pass
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        pass
+
+    @abstractmethod
+    def iter_chunks(self, key: str, chunk_size: int) -> Iterator[bytes]:
+        """The compressed blob, read chunk_size bytes at a time"""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def lock(self, key: str) -> ContextManager[None]:
+        """Held while statements start or stop referencing the blob; commit
+        the session before leaving it"""
+        pass
+
+
+class DatabaseBlobBackend(BlobBackend):
+    """Keeps blobs in the statement_blobs table, in the caller's transaction.
+
+    Postgres stores the bytea out of line (TOAST), so this behaves like a
+    large object store while staying transactional with the statement row."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def exists(self, key: str) -> bool:
+        return (
+            self.db.query(StatementBlob.sha256)
+            .filter(StatementBlob.sha256 == key)
+            .first()
+            is not None
+        )
+
+    def put(self, key: str, data: bytes, size: int) -> None:
+        # A concurrent upload of the same file may have stored it already
+        self.db.execute(
+            dialect_insert(self.db, StatementBlob)
+            .values(sha256=key, size=size, compressed_size=len(data), data=data)
+            .on_conflict_do_nothing(index_elements=["sha256"])
+        )
+
+    def get(self, key: str) -> bytes:
+        row = (
+            self.db.query(StatementBlob.data)
+            .filter(StatementBlob.sha256 == key)
+            .first()
+        )
+        if row is None:
+            raise BlobNotFound(key)
+        return row.data
+
+    def iter_chunks(self, key: str, chunk_size: int) -> Iterator[bytes]:
+        compressed_size = (
+            self.db.query(StatementBlob.compressed_size)
+            .filter(StatementBlob.sha256 == key)
+            .scalar()
+        )
+        if compressed_size is None:
+            raise BlobNotFound(key)
+        # substr is 1-based and works on blobs (sqlite) and bytea (Postgres)
+        for offset in range(1, compressed_size + 1, chunk_size):
+            yield (
+                self.db.query(func.substr(StatementBlob.data, offset, chunk_size))
+                .filter(StatementBlob.sha256 == key)
+                .scalar()
+            )
+
+    def delete(self, key: str) -> None:
+        self.db.query(StatementBlob).filter(StatementBlob.sha256 == key).delete()
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        # The row lock lasts until the caller's transaction ends
+        self.db.query(StatementBlob.sha256).filter(
+            StatementBlob.sha256 == key
+        ).with_for_update().first()
+        yield
+
+
+class FilesystemBlobBackend(BlobBackend):
+    """Keeps blobs as files under root, fanned out by the first hash bytes"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / f"{key}.zst"
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def put(self, key: str, data: bytes, size: int) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a reader never sees a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, key: str) -> bytes:
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            raise BlobNotFound(key)
+
+    def iter_chunks(self, key: str, chunk_size: int) -> Iterator[bytes]:
+        try:
+            file = self._path(key).open("rb")
+        except FileNotFoundError:
+            raise BlobNotFound(key)
+        with file:
+            while chunk := file.read(chunk_size):
+                yield chunk
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        # One lock file per top-level directory, shared by the API processes
+        path = self.root / key[:2] / ".lock"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            yield
+
+
+@dataclass
+class StoredBlob:
+    sha256: str
+    size: int
+    already_stored: bool
+
+
+class BlobStore:
+    """Content-addressed, zstd-compressed storage for uploaded statements"""
+
+    def __init__(self, backend: BlobBackend, compression_level: int = 3):
+        self.backend = backend
+        self.compression_level = compression_level
+
+    @staticmethod
+    def hash(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    def put(self, content: bytes) -> StoredBlob:
+        key = self.hash(content)
+        if self.backend.exists(key):
+            logger.debug(f"Blob {key} already stored")
+            return StoredBlob(key, len(content), already_stored=True)
+
+        compressed = zstandard.ZstdCompressor(level=self.compression_level).compress(
+            content
+        )
+        self.backend.put(key, compressed, len(content))
+        return StoredBlob(key, len(content), already_stored=False)
+
+    def get(self, key: str) -> bytes:
+        return zstandard.ZstdDecompressor().decompress(self.backend.get(key))
+
+    def iter_content(self, key: str, chunk_size: int) -> Iterator[bytes]:
+        """Decompresses while reading, without holding the whole blob"""
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+        for chunk in self.backend.iter_chunks(key, chunk_size):
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(key)
+
+    def lock(self, key: str) -> ContextManager[None]:
+        return self.backend.lock(key)
+
+
+def create_blob_store(db: Session, backend: Optional[str] = None) -> BlobStore:
+    """STATEMENT_STORE=database (default) or filesystem (STATEMENT_STORE_PATH)"""
+    backend = backend or os.getenv("STATEMENT_STORE", "database")
+    if backend == "database":
+        return BlobStore(DatabaseBlobBackend(db))
+    if backend == "filesystem":
+        return BlobStore(
+            FilesystemBlobBackend(os.getenv("STATEMENT_STORE_PATH", "statement_blobs"))
+        )
+    raise ValueError(f"Unknown statement store: {backend}")
@@ -1,44 +1,173 @@
 import asyncio
+import logging
+import os
+import uuid
+from typing import Optional
+
+from celery.signals import worker_process_init
+from sqlalchemy.orm import scoped_session
 
 from ..ai.gemini_ai import GeminiAI
-from ..celery_app import celery_app
-from ..db import get_db
+from ..ai.llm_client import LLMClient
+from ..celery_app import REDIS_URL, celery_app
+from ..db import RequestSession, engine, session_scope
 from ..repositories.categories_repository import CategoriesRepository
 from ..repositories.transactions_repository import TransactionsRepository
-from ..services.categorizers.existing_transactions_categorizer import (
-    ExistingTransactionsCategorizer,
-)
-from ..services.categorizers.llm_transaction_categorizer import (
-    LLMTransactionCategorizer,
-)
+from ..services.categorizers.factory import create_categorizer
+from ..services.categorizers.transaction_categorizer import TransactionCategorizer
 from ..services.transaction_categorization_service import (
+    DrainResult,
     TransactionCategorizationService,
 )
 
+logger = logging.getLogger("app")
+
+# Upper bound for one task, so a huge backlog doesn't pin a worker forever;
+# whatever is left is handed to a follow-up task
+DRAIN_MAX_SECONDS = float(os.getenv("CATEGORIZATION_DRAIN_MAX_SECONDS", "240"))
+RATE_LIMITED_COUNTDOWN_SECONDS = int(
+    os.getenv("CATEGORIZATION_RATE_LIMITED_COUNTDOWN_SECONDS", "60")
+)
+MIN_BATCH_SIZE = int(os.getenv("CATEGORIZATION_MIN_BATCH_SIZE", "10"))
+MAX_BATCH_SIZE = int(os.getenv("CATEGORIZATION_MAX_BATCH_SIZE", "100"))
+
+
+class DrainLock:
+    """Lets a single task drain the pending backlog at a time.
+
+    Uploads can enqueue many tasks in a burst; without the lock they would all
+    fetch the same pending rows and send them to the LLM again."""
+
+    key = "categorization:drain-lock"
+
+    def __init__(self, client=None, ttl_seconds: Optional[int] = None):
+        self._client = client
+        # Expires on its own if the worker dies while holding it
+        self.ttl_seconds = ttl_seconds or int(DRAIN_MAX_SECONDS * 2)
+        self.token = uuid.uuid4().hex
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(REDIS_URL)
+        return self._client
+
+    def acquire(self) -> bool:
+        return bool(self.client.set(self.key, self.token, nx=True, ex=self.ttl_seconds))
+
+    def release(self):
+        current = self.client.get(self.key)
+        if current is not None and current.decode() == self.token:
+            self.client.delete(self.key)
+
+
+class CategorizationWorker:
+    """Categorization components kept for the lifetime of a worker process.
+
+    Repositories go through a scoped session, so each run gets its own Session
+    that is closed when the run ends. Categorizer rules are only rebuilt when
+    the categories change."""
+
+    def __init__(
+        self,
+        session: scoped_session = RequestSession,
+        llm_client: Optional[LLMClient] = None,
+        categorizer: Optional[TransactionCategorizer] = None,
+    ):
+        self.session = session
+        self.categories_repository = CategoriesRepository(session)
+        self.transactions_repository = TransactionsRepository(session)
+        self.categorizer = categorizer or create_categorizer(
+            categories_repository=self.categories_repository,
+            transactions_repository=self.transactions_repository,
+            llm_client=llm_client or GeminiAI(),
+        )
+        self.service = TransactionCategorizationService(
+            self.categories_repository,
+            self.transactions_repository,
+            self.categorizer,
+        )
+        # Async LLM clients bind to the loop they first run on, so keep one
+        self.loop = asyncio.new_event_loop()
+        self.categories_version: Optional[str] = None
+
+    def refresh_if_categories_changed(self):
+        version = self.categories_repository.get_version()
+        if version != self.categories_version:
+            logger.info("Categories changed, refreshing categorizer rules")
+            self.categorizer.refresh_rules()
+            self.categories_version = version
+
+    def run(self, batch_size: int, max_seconds: Optional[float] = None) -> DrainResult:
+        with session_scope(self.session):
+            self.refresh_if_categories_changed()
+            return self.loop.run_until_complete(
+                self.service.drain(batch_size, max_seconds)
+            )
+
+    def has_pending(self) -> bool:
+        with session_scope(self.session):
+            return self.transactions_repository.count_pending() > 0
+
+
+_worker: Optional[CategorizationWorker] = None
+
+
+def get_worker() -> CategorizationWorker:
+    # worker_process_init only fires for prefork children; solo and eager
+    # runs build the worker on first use
+    global _worker
+    if _worker is None:
+        _worker = CategorizationWorker()
+    return _worker
+
+
+@worker_process_init.connect(weak=False)
+def init_worker_process(**kwargs):
+    global _worker
+    # Pooled connections inherited from the parent must not be shared after fork
+    engine.dispose(close=False)
+    _worker = CategorizationWorker()
+
 
 @celery_app.task(name="src.app.tasks.categorization.categorize_pending_transactions")
 def categorize_pending_transactions(batch_size: int = 10):
-    db = next(get_db())
+    return drain_pending_transactions(batch_size)
 
-    llm_client = GeminiAI()
-    groq_categorizer = LLMTransactionCategorizer(
-        CategoriesRepository(db),
-        llm_client,
-    )
 
-    categorizer = ExistingTransactionsCategorizer(
-        transactions_repository=TransactionsRepository(db),
-        fallback_categorizer=groq_categorizer,
-    )
+def drain_pending_transactions(
+    batch_size: int, lock: Optional[DrainLock] = None
+) -> int:
+    lock = lock or DrainLock()
+    if not lock.acquire():
+        logger.debug("Another task is draining the categorization backlog")
+        return 0
 
-    service = TransactionCategorizationService(
-        CategoriesRepository(db),
-        TransactionsRepository(db),
-        categorizer,
-    )
+    worker = get_worker()
+    try:
+        result = worker.run(batch_size, DRAIN_MAX_SECONDS)
+    finally:
+        lock.release()
 
-    return asyncio.run(service.categorize_pending_transactions(batch_size))
+    if worker.has_pending():
+        # Out of time or rate limited: hand over instead of holding the worker.
+        # Unresolved rows are pending too; give whatever failed them time to pass
+        countdown = (
+            RATE_LIMITED_COUNTDOWN_SECONDS
+            if result.rate_limited or result.unresolved
+            else 0
+        )
+        categorize_pending_transactions.apply_async((batch_size,), countdown=countdown)
+    return result.categorized
 
 
 def manually_trigger_categorization(batch_size: int = 10):
     return categorize_pending_transactions.delay(batch_size)
+
+
+def schedule_categorization(transactions_count: int) -> str:
+    """Enqueues categorization for rows an upload just inserted"""
+    batch_size = max(MIN_BATCH_SIZE, min(transactions_count, MAX_BATCH_SIZE))
+    return manually_trigger_categorization(batch_size).id
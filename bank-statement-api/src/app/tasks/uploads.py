@@ -0,0 +1,66 @@
+import os
+from typing import Optional
+
+from ..celery_app import celery_app
+from ..db import RequestSession, session_scope
+from ..repositories.source_import_marks_repository import SourceImportMarksRepository
+from ..repositories.statement_repository import StatementRepository
+from ..repositories.statement_schema_repository import StatementSchemaRepository
+from ..repositories.transactions_repository import TransactionsRepository
+from ..repositories.upload_jobs_repository import UploadJobsRepository
+from ..services.file_processing.incremental_import import IncrementalImport
+from ..services.file_processing.parsers.parser_factory import ParserFactory
+from ..services.file_processing.statement_upload_service import StatementUploadService
+from ..services.file_processing.transactions_builder import TransactionsBuilder
+from ..services.file_processing.transactions_cleaner import TransactionsCleaner
+from ..services.file_processing.upload_job_service import UploadJobService
+
+
+def create_upload_job_service() -> UploadJobService:
+    """The worker side of UploadJobService; it runs jobs, never submits them"""
+    session = RequestSession
+    upload_service = StatementUploadService(
+        parser_factory=ParserFactory(),
+        transaction_cleaner=TransactionsCleaner(),
+        transactions_builder=TransactionsBuilder(),
+        statement_repository=StatementRepository(session),
+        transactions_repository=TransactionsRepository(session),
+        statement_schema_repository=StatementSchemaRepository(session),
+        incremental_import=IncrementalImport(SourceImportMarksRepository(session)),
+    )
+    categorize_on_upload = os.getenv("CATEGORIZE_ON_UPLOAD", "true").lower() == "true"
+    return UploadJobService(
+        UploadJobsRepository(session),
+        upload_service,
+        scope=lambda: session_scope(session),
+        schedule_categorization=(
+            schedule_categorization if categorize_on_upload else None
+        ),
+    )
+
+
+def schedule_categorization(transactions_count: int) -> str:
+    from .categorization import schedule_categorization
+
+    return schedule_categorization(transactions_count)
+
+
+_service: Optional[UploadJobService] = None
+
+
+def get_service() -> UploadJobService:
+    global _service
+    if _service is None:
+        _service = create_upload_job_service()
+    return _service
+
+
+@celery_app.task(name="src.app.tasks.uploads.run_upload_job")
+def run_upload_job(job_id: str):
+    service = get_service()
+    with service.scope():
+        service.run(job_id)
+
+
+def enqueue_upload_job(job_id: str) -> str:
+    return run_upload_job.delay(job_id).id
@@ -0,0 +1,81 @@
+from datetime import date
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from src.app.common.fast_json import RowSerializer
+from src.app.models import Category, Source
+from src.app.repositories.categories_repository import CategoriesRepository
+from src.app.repositories.sources_repository import SourcesRepository
+from src.app.repositories.transactions_repository import (
+    TransactionsFilter,
+    TransactionsRepository,
+)
+from src.app.schemas import Category as CategorySchema
+from src.app.schemas import Source as SourceSchema
+from src.app.schemas import Transaction as TransactionSchema
+from src.app.schemas import TransactionCreate
+from tests.conftest import create_test_db
+
+
+def pydantic_json(schema, objects) -> bytes:
+    """What FastAPI renders for response_model=List[schema]"""
+    adapter = TypeAdapter(List[schema])
+    content = adapter.dump_python(
+        adapter.validate_python(objects), mode="json", by_alias=True
+    )
+    return JSONResponse(content).body
+
+
+def create_session():
+    session = create_test_db()
+    session.add(Source(id=1, name="Banco", description=None))
+    session.add(Source(id=2, name="Caixa – conta à ordem", description="poupança"))
+    session.add(Category(id=1, category_name="Food"))
+    session.add(Category(id=2, category_name="Café", parent_category_id=1))
+    session.commit()
+    TransactionsRepository(session).create_many(
+        [
+            TransactionCreate(
+                date=date(2024, 3, 1),
+                description="Pingo Doce – Lisboa",
+                amount=-12.3,
+                source_id=2,
+                category_id=1,
+                sub_category_id=2,
+                categorization_status="categorized",
+                normalized_description="pingo doce lisboa",
+            ),
+            TransactionCreate(
+                date=date(2024, 3, 2),
+                description="Salary",
+                amount=2500,
+                source_id=1,
+            ),
+        ]
+    )
+    return session
+
+
+def test_transactions_match_the_response_model():
+    repository = TransactionsRepository(create_session())
+    filter = TransactionsFilter()
+
+    expected = pydantic_json(TransactionSchema, repository.get_all(filter))
+    actual = RowSerializer(TransactionSchema).dumps(repository.get_all_rows(filter))
+
+    assert actual == expected
+
+
+def test_categories_and_sources_match_the_response_model():
+    session = create_session()
+    categories = CategoriesRepository(session)
+    sources = SourcesRepository(session)
+
+    assert RowSerializer(CategorySchema).dumps(
+        categories.get_all_rows()
+    ) == pydantic_json(CategorySchema, categories.get_all())
+    assert RowSerializer(SourceSchema).dumps(sources.get_all_rows()) == pydantic_json(
+        SourceSchema, sources.get_all()
+    )
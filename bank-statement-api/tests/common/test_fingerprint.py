@@ -0,0 +1,28 @@
+from datetime import date
+from decimal import Decimal
+
+from src.app.common.fingerprint import (
+    normalize_description,
+    occurrences,
+    transaction_fingerprint,
+)
+
+
+def test_repeated_charges_are_numbered_in_order():
+    keys = [("coffee", -2), ("rent", -800), ("coffee", -2), ("coffee", -2)]
+
+    assert occurrences(keys) == [0, 0, 1, 2]
+
+
+def test_fingerprint_normalizes_amount_and_description():
+    day = date(2024, 1, 3)
+
+    assert transaction_fingerprint(
+        1, day, Decimal("-2.5"), normalize_description("COFFEE, Lisbon"), 0
+    ) == transaction_fingerprint(1, day, -2.50, "coffee lisbon", 0)
+    assert transaction_fingerprint(1, day, -2.5, "coffee", 0) != (
+        transaction_fingerprint(1, day, -2.5, "coffee", 1)
+    )
+    assert transaction_fingerprint(1, day, -2.5, "coffee", 0) != (
+        transaction_fingerprint(2, day, -2.5, "coffee", 0)
+    )
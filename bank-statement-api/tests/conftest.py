@@ -39,12 +39,14 @@ def create_app(
     sources_repository=MagicMock(),
     transactions_repository=MagicMock(),
     categorizer=MagicMock(),
+    statement_repository=None,
 ):
     return App(
         db_session=db_session,
         categories_repository=categories_repository,
         sources_repository=sources_repository,
         transactions_repository=transactions_repository,
+        statement_repository=statement_repository,
         categorizer=categorizer,
     )
 
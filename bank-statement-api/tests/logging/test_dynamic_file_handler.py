@@ -0,0 +1,84 @@
+import logging
+import os
+import time
+
+from src.app.logging.config import move_handlers_to_background
+from src.app.logging.dynamic_file_handler import DynamicContentFileHandler
+
+
+def make_record(message, prefix="test", ext="json"):
+    record = logging.LogRecord("app.llm.big", logging.DEBUG, "", 0, message, (), None)
+    record.prefix = prefix
+    record.ext = ext
+    return record
+
+
+def test_appends_records_to_a_single_archive(tmp_path):
+    handler = DynamicContentFileHandler(
+        directory=str(tmp_path), cleanup_interval_seconds=0
+    )
+
+    handler.emit(make_record('{"a": 1}', prefix="first"))
+    handler.emit(make_record("a,b", prefix="second", ext="csv"))
+    handler.close()
+
+    assert os.listdir(tmp_path) == ["payloads.log"]
+    content = (tmp_path / "payloads.log").read_text()
+    assert 'first.json =====\n{"a": 1}' in content
+    assert "second.csv =====\na,b" in content
+
+
+def test_rotates_when_archive_exceeds_max_bytes(tmp_path):
+    handler = DynamicContentFileHandler(
+        directory=str(tmp_path),
+        max_bytes=100,
+        backup_count=2,
+        cleanup_interval_seconds=0,
+    )
+
+    for _ in range(10):
+        handler.emit(make_record("x" * 80))
+    handler.close()
+
+    assert sorted(os.listdir(tmp_path)) == [
+        "payloads.log",
+        "payloads.log.1",
+        "payloads.log.2",
+    ]
+
+
+def test_delete_old_files_keeps_recent_and_current_files(tmp_path):
+    handler = DynamicContentFileHandler(
+        directory=str(tmp_path), max_age_days=1, cleanup_interval_seconds=0
+    )
+    handler.emit(make_record("current"))
+
+    old_file = tmp_path / "20240101_old.json"
+    old_file.write_text("old")
+    two_days_ago = time.time() - 2 * 24 * 3600
+    os.utime(old_file, (two_days_ago, two_days_ago))
+    recent_file = tmp_path / "recent.json"
+    recent_file.write_text("recent")
+
+    handler.delete_old_files()
+    handler.close()
+
+    assert sorted(os.listdir(tmp_path)) == ["payloads.log", "recent.json"]
+
+
+def test_background_logger_writes_on_listener_thread(tmp_path):
+    logger = logging.getLogger("tests.background")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = DynamicContentFileHandler(
+        directory=str(tmp_path), cleanup_interval_seconds=0
+    )
+    logger.addHandler(handler)
+
+    listener = move_handlers_to_background("tests.background")
+    logger.debug("payload", extra={"prefix": "background"})
+    listener.stop()
+    handler.close()
+
+    assert logger.handlers[0] is not handler
+    assert "background.log =====\npayload" in (tmp_path / "payloads.log").read_text()
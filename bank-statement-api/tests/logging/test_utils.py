@@ -0,0 +1,62 @@
+import logging
+from unittest.mock import MagicMock
+
+from src.app.logging.utils import LazyPayload, log_payload
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append((self.format(record), record.prefix, record.ext))
+
+
+def make_logger(name, level=logging.DEBUG):
+    logger = logging.getLogger(name)
+    logger.handlers = []
+    logger.propagate = False
+    logger.setLevel(level)
+    handler = CollectingHandler()
+    logger.addHandler(handler)
+    return logger, handler
+
+
+def test_payload_is_not_built_when_logger_is_disabled():
+    logger, handler = make_logger("tests.payload.disabled", logging.INFO)
+    build = MagicMock(return_value="payload")
+
+    log_payload(logger, build, prefix="disabled")
+
+    build.assert_not_called()
+    assert handler.messages == []
+
+
+def test_payload_is_built_when_the_record_is_formatted():
+    logger, handler = make_logger("tests.payload.enabled")
+    build = MagicMock(return_value='{"a": 1}')
+
+    log_payload(logger, build, prefix="enabled", ext="json")
+
+    build.assert_called_once()
+    assert handler.messages == [('{"a": 1}', "enabled", "json")]
+
+
+def test_payload_is_skipped_when_not_sampled():
+    logger, handler = make_logger("tests.payload.sampled")
+    build = MagicMock(return_value="payload")
+
+    log_payload(logger, build, prefix="sampled", sample_rate=0.0)
+
+    build.assert_not_called()
+    assert handler.messages == []
+
+
+def test_lazy_payload_is_capped_and_built_once():
+    build = MagicMock(return_value="x" * 20)
+    payload = LazyPayload(build, max_chars=5)
+
+    assert str(payload) == "xxxxx\n... [15 chars truncated]"
+    assert str(payload) == "xxxxx\n... [15 chars truncated]"
+    build.assert_called_once()
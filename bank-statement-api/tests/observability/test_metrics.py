@@ -0,0 +1,77 @@
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+from sqlalchemy import exc as sa_exc
+
+from src.app.observability.metrics import (
+    InstrumentedQueuePool,
+    instrument_engine,
+    instrument_tracer,
+    track_llm_call,
+)
+from src.app.observability.tracing import InMemorySpanCollector, Tracer
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_track_llm_call_records_latency_tokens_and_errors():
+    calls_before = sample("llm_request_duration_seconds_count", provider="test")
+    tokens_before = sample("llm_tokens_total", provider="test", kind="prompt")
+    errors_before = sample("llm_errors_total", provider="test")
+
+    with track_llm_call("test") as call:
+        call.record_tokens(120, 30)
+    with pytest.raises(RuntimeError):
+        with track_llm_call("test"):
+            raise RuntimeError("rate limited")
+
+    assert sample("llm_request_duration_seconds_count", provider="test") == (
+        calls_before + 2
+    )
+    assert sample("llm_tokens_total", provider="test", kind="prompt") == (
+        tokens_before + 120
+    )
+    assert sample("llm_errors_total", provider="test") == errors_before + 1
+
+
+def test_instrumented_tracer_feeds_pipeline_histograms():
+    tracer = Tracer(collector=InMemorySpanCollector())
+    instrument_tracer(tracer)
+    instrument_tracer(tracer)
+    before = sample("pipeline_stage_duration_seconds_count", stage="test.stage")
+
+    with tracer.span("test.stage", rows=3):
+        pass
+
+    assert len(tracer.listeners) == 1
+    assert sample("pipeline_stage_duration_seconds_count", stage="test.stage") == (
+        before + 1
+    )
+    assert sample("pipeline_stage_rows_total", stage="test.stage") >= 3
+
+
+def test_instrumented_pool_records_checkouts_waits_and_timeouts():
+    engine = create_engine(
+        "sqlite://",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    instrument_engine(engine)
+    waits_before = sample("db_pool_wait_seconds_count")
+    checkouts_before = sample("db_pool_checkouts_total")
+    timeouts_before = sample("db_pool_timeouts_total")
+
+    with engine.connect():
+        assert sample("db_pool_checked_out_connections") == 1
+        with pytest.raises(sa_exc.TimeoutError):
+            engine.connect()
+
+    assert sample("db_pool_checked_out_connections") == 0
+    assert sample("db_pool_size") == 1
+    assert sample("db_pool_wait_seconds_count") == waits_before + 2
+    assert sample("db_pool_checkouts_total") == checkouts_before + 1
+    assert sample("db_pool_timeouts_total") == timeouts_before + 1
@@ -0,0 +1,43 @@
+import pytest
+
+from src.app.observability.tracing import InMemorySpanCollector, Tracer
+
+
+def test_span_records_duration_rows_and_bytes():
+    tracer = Tracer(collector=InMemorySpanCollector())
+
+    with tracer.span("upload.parse", bytes=1024) as span:
+        span.set("rows", 10)
+    with tracer.span("upload.parse", bytes=1024) as span:
+        span.set("rows", 5)
+
+    stats = tracer.collector.summary()["upload.parse"]
+    assert stats["count"] == 2
+    assert stats["rows"] == 15
+    assert stats["bytes"] == 2048
+    assert stats["max_ms"] >= 0
+
+
+def test_nested_spans_record_their_parent():
+    tracer = Tracer(collector=InMemorySpanCollector())
+
+    with tracer.span("upload"):
+        with tracer.span("upload.clean"):
+            pass
+
+    recent = tracer.collector.recent()
+    assert [(s["name"], s["parent"]) for s in recent] == [
+        ("upload.clean", "upload"),
+        ("upload", None),
+    ]
+
+
+def test_failed_span_is_counted_as_error():
+    tracer = Tracer(collector=InMemorySpanCollector())
+
+    with pytest.raises(ValueError):
+        with tracer.span("upload.insert"):
+            raise ValueError("boom")
+
+    assert tracer.collector.summary()["upload.insert"]["errors"] == 1
+    assert tracer.collector.recent()[0]["error"] == "ValueError: boom"
@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.app.db import Base
+from src.app.models import Source, SourceImportMark
+from src.app.repositories.source_import_marks_repository import (
+    SourceImportMarksRepository,
+)
+from tests.conftest import create_test_db
+
+SOURCE_IDS = range(1, 21)
+
+
+def test_save_replaces_the_mark():
+    session = create_test_db()
+    session.add(Source(id=1, name="bank"))
+    session.commit()
+    repository = SourceImportMarksRepository(session)
+
+    repository.save(1, date(2024, 1, 1), date(2024, 1, 31), date(2024, 1, 25), "a")
+    mark = repository.save(
+        1, date(2024, 1, 1), date(2024, 2, 29), date(2024, 2, 23), "b"
+    )
+
+    assert (mark.high_water_mark, mark.overlap_fingerprint) == (date(2024, 2, 29), "b")
+    assert session.query(SourceImportMark).count() == 1
+
+
+def test_concurrent_saves_of_a_new_mark_do_not_conflict(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'marks.db'}", connect_args={"timeout": 30}
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with Session() as session:
+        session.add_all(
+            [Source(id=source_id, name=f"bank {source_id}") for source_id in SOURCE_IDS]
+        )
+        session.commit()
+
+    def save(fingerprint):
+        with Session() as session:
+            repository = SourceImportMarksRepository(session)
+            for source_id in SOURCE_IDS:
+                repository.save(
+                    source_id,
+                    date(2024, 1, 1),
+                    date(2024, 1, 31),
+                    date(2024, 1, 25),
+                    fingerprint,
+                )
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(save, ["a", "b"]))
+
+    with Session() as session:
+        assert session.query(SourceImportMark).count() == len(SOURCE_IDS)
+    engine.dispose()
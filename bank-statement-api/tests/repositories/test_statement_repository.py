@@ -1,86 +1,121 @@
 import uuid
-from datetime import datetime
-from unittest.mock import MagicMock
-
-from sqlalchemy.orm import Session
-
-from src.app.models import Statement
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import text
+
+from src.app.models import (
+    Source,
+    Statement,
+    StatementBlob,
+    Transaction,
+    UploadJob,
+)
 from src.app.repositories.statement_repository import StatementRepository
+from src.app.repositories.upload_jobs_repository import UploadJobsRepository
+from src.app.storage.blob_store import (
+    BlobStore,
+    DatabaseBlobBackend,
+    FilesystemBlobBackend,
+)
+from tests.conftest import create_test_db
 
 
 class TestStatementRepository:
     def test_save_statement(self):
         # Arrange
-        # Mock session
-        session = MagicMock(spec=Session)
+        session = create_test_db()
+        repository = StatementRepository(
+            session, BlobStore(DatabaseBlobBackend(session))
+        )
+        file_content = b"test,file,content\n1,2,3"
 
-        # Create repository
-        repository = StatementRepository(session)
+        # Act
+        statement_id = repository.save(file_content, "test.csv")
 
-        # Test data
-        file_content = b"test,file,content\n1,2,3"
-        file_name = "test.csv"
+        # Assert
+        statement = session.query(Statement).filter_by(id=statement_id).one()
+        assert statement.file_name == "test.csv"
+        assert statement.content_hash == BlobStore.hash(file_content)
+        assert statement.size == len(file_content)
+        assert repository.read_content(statement_id) == file_content
+
+    def test_identical_uploads_share_one_blob(self):
+        # Arrange
+        session = create_test_db()
+        repository = StatementRepository(
+            session, BlobStore(DatabaseBlobBackend(session))
+        )
+        file_content = b"date,amount\n2024-01-01,10\n" * 100
 
         # Act
-        statement_id = repository.save(file_content, file_name)
+        first_id = repository.save(file_content, "january.csv")
+        second_id = repository.save(file_content, "january (1).csv")
 
         # Assert
-        assert isinstance(statement_id, str)
+        assert first_id != second_id
+        assert session.query(StatementBlob).count() == 1
+        blob = session.query(StatementBlob).one()
+        assert blob.compressed_size < blob.size
 
-        # Verify session interactions
-        session.add.assert_called_once()
-        session.commit.assert_called_once()
+    def test_delete_keeps_blob_while_referenced(self, tmp_path):
+        # Arrange
+        session = create_test_db()
+        backend = FilesystemBlobBackend(str(tmp_path))
+        repository = StatementRepository(session, BlobStore(backend))
+        file_content = b"a,b\n1,2\n"
+        first_id = repository.save(file_content, "a.csv")
+        second_id = repository.save(file_content, "b.csv")
+        content_hash = BlobStore.hash(file_content)
+
+        # Act / Assert
+        assert repository.delete(first_id)
+        assert backend.exists(content_hash)
+        assert repository.read_content(second_id) == file_content
+
+        assert repository.delete(second_id)
+        assert not backend.exists(content_hash)
+
+    def test_delete_keeps_blob_if_the_commit_fails(self, tmp_path):
+        # Arrange
+        session = create_test_db()
+        backend = FilesystemBlobBackend(str(tmp_path))
+        repository = StatementRepository(session, BlobStore(backend))
+        file_content = b"a,b\n1,2\n"
+        statement_id = repository.save(file_content, "a.csv")
+
+        # Act
+        with patch.object(session, "commit", side_effect=RuntimeError("db down")):
+            with pytest.raises(RuntimeError):
+                repository.delete(statement_id)
 
-        # Verify the statement was created with correct attributes
-        statement = session.add.call_args[0][0]
-        assert isinstance(statement, Statement)
-        assert statement.file_name == file_name
-        assert statement.content == file_content
-        assert statement.id is not None
+        # Assert
+        assert backend.exists(BlobStore.hash(file_content))
 
-    def test_get_by_id(self):
+    def test_delete_removes_the_statement_upload_jobs(self):
         # Arrange
-        # Mock session
-        session = MagicMock(spec=Session)
-
-        # Create mock statement
-        statement_id = str(uuid.uuid4())
-        mock_statement = MagicMock(spec=Statement)
-        mock_statement.id = statement_id
-        mock_statement.file_name = "test.csv"
-        mock_statement.content = b"test,file,content\n1,2,3"
-        mock_statement.created_at = datetime.now()
-
-        # Configure session to return the mock statement
-        session.query.return_value.filter.return_value.first.return_value = (
-            mock_statement
+        session = create_test_db()
+        session.execute(text("PRAGMA foreign_keys=ON"))
+        repository = StatementRepository(
+            session, BlobStore(DatabaseBlobBackend(session))
+        )
+        statement_id = repository.save(b"a,b\n1,2\n", "a.csv")
+        UploadJobsRepository(session).create(
+            statement_id, {"statementId": statement_id}
         )
-
-        # Create repository
-        repository = StatementRepository(session)
 
         # Act
-        result = repository.get_by_id(statement_id)
+        deleted = repository.delete(statement_id)
 
         # Assert
-        assert result is not None
-        assert result["id"] == statement_id
-        assert result["file_name"] == mock_statement.file_name
-        assert result["content"] == mock_statement.content
-
-        # Verify session interactions
-        session.query.assert_called_once_with(Statement)
-        session.query.return_value.filter.assert_called_once()
+        assert deleted
+        assert session.query(UploadJob).count() == 0
+        assert repository.get_by_id(statement_id) is None
 
     def test_get_by_id_not_found(self):
         # Arrange
-        # Mock session
-        session = MagicMock(spec=Session)
-
-        # Configure session to return None (statement not found)
-        session.query.return_value.filter.return_value.first.return_value = None
-
-        # Create repository
+        session = create_test_db()
         repository = StatementRepository(session)
 
         # Act
@@ -89,6 +124,77 @@ class TestStatementRepository:
         # Assert
         assert result is None
 
-        # Verify session interactions
-        session.query.assert_called_once_with(Statement)
-        session.query.return_value.filter.assert_called_once()
+    def test_get_by_id_returns_metadata_without_content(self):
+        # Arrange
+        session = create_test_db()
+        repository = StatementRepository(
+            session, BlobStore(DatabaseBlobBackend(session))
+        )
+        file_content = b"a,b\n1,2\n"
+        statement_id = repository.save(file_content, "a.csv")
+
+        # Act
+        statement = repository.get_by_id(statement_id)
+
+        # Assert
+        assert "content" not in statement
+        assert statement["size"] == len(file_content)
+        assert statement["content_hash"] == BlobStore.hash(file_content)
+
+    def test_iter_content_reads_in_chunks(self):
+        # Arrange
+        session = create_test_db()
+        repository = StatementRepository(
+            session, BlobStore(DatabaseBlobBackend(session))
+        )
+        file_content = bytes(range(256)) * 400
+        statement_id = repository.save(file_content, "a.csv")
+
+        # Act
+        chunks = list(repository.iter_content(statement_id, chunk_size=1024))
+
+        # Assert
+        assert b"".join(chunks) == file_content
+        assert repository.iter_content(str(uuid.uuid4())) is None
+        assert repository.read_content(str(uuid.uuid4())) is None
+
+    def test_list_metadata(self):
+        # Arrange
+        session = create_test_db()
+        repository = StatementRepository(
+            session, BlobStore(DatabaseBlobBackend(session))
+        )
+        source = Source(name="bank")
+        session.add(source)
+        session.commit()
+        imported_id = repository.save(b"a,b\n1,2\n", "imported.csv")
+        pending_id = repository.save(b"c,d\n3,4\n", "pending.csv")
+        session.add_all(
+            [
+                Transaction(
+                    date=day,
+                    description="coffee",
+                    amount=-2,
+                    source_id=source.id,
+                    statement_id=imported_id,
+                )
+                for day in (date(2024, 1, 31), date(2024, 1, 2), date(2024, 2, 5))
+            ]
+        )
+        session.commit()
+
+        # Act
+        rows = {row["id"]: row for row in repository.list_metadata()}
+
+        # Assert
+        imported = rows[imported_id]
+        assert imported["file_name"] == "imported.csv"
+        assert imported["size"] == 8
+        assert imported["row_count"] == 3
+        assert imported["start_date"] == date(2024, 1, 2)
+        assert imported["end_date"] == date(2024, 2, 5)
+        assert imported["source_id"] == source.id
+        pending = rows[pending_id]
+        assert pending["row_count"] == 0
+        assert pending["start_date"] is None
+        assert pending["source_id"] is None
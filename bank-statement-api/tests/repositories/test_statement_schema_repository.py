@@ -1,6 +1,7 @@
 import uuid
 from unittest.mock import MagicMock
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from src.app.models import StatementSchemaMapping
@@ -50,6 +51,21 @@ class TestStatementSchemaRepository:
         assert schema.schema_data == schema_data["schema_data"]
         assert schema.id is not None
 
+    def test_save_returns_existing_schema_when_hash_was_saved_concurrently(self):
+        session = MagicMock(spec=Session)
+        session.commit.side_effect = IntegrityError("INSERT", {}, Exception())
+        existing = MagicMock(spec=StatementSchemaMapping)
+        existing.id = "existing-id"
+        session.query.return_value.filter.return_value.first.return_value = existing
+        repository = StatementSchemaRepository(session)
+
+        schema_id = repository.save(
+            {"id": "new-id", "statement_hash": "abc123", "schema_data": {}}
+        )
+
+        assert schema_id == "existing-id"
+        session.rollback.assert_called_once()
+
     def test_find_by_statement_hash(self):
         # Arrange
         # Mock session
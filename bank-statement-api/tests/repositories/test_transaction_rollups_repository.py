@@ -0,0 +1,153 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.app.db import Base
+from src.app.models import Source, TransactionMonthlyRollup
+from src.app.repositories.transaction_rollups_repository import covers_whole_months
+from src.app.repositories.transactions_repository import (
+    TransactionsFilter,
+    TransactionsRepository,
+)
+from src.app.schemas import TransactionCreate
+from tests.conftest import create_test_db
+
+GROUP_BY = ["month", "source", "category", "sub_category"]
+
+
+def create_repository():
+    session = create_test_db()
+    session.add(Source(id=1, name="bank"))
+    session.commit()
+    return TransactionsRepository(session)
+
+
+def transaction(day, amount, category_id=None):
+    return TransactionCreate(
+        date=day,
+        description="t",
+        amount=amount,
+        source_id=1,
+        category_id=category_id,
+    )
+
+
+def rollups(repository):
+    return repository.rollups.aggregate(GROUP_BY)
+
+
+def test_rollups_follow_every_change():
+    repository = create_repository()
+    first, second, _ = repository.create_many(
+        [
+            transaction(date(2024, 1, 3), -10),
+            transaction(date(2024, 1, 9), 250),
+            transaction(date(2024, 2, 1), -4.5),
+        ]
+    )
+    repository.update_transaction_category(first.id, category_id=7)
+    second.category_id = 7
+    repository.update(second)
+    repository.delete(repository.get_by_id(3))
+
+    assert rollups(repository) == [
+        {
+            "month": "2024-01",
+            "source_id": 1,
+            "category_id": 7,
+            "sub_category_id": None,
+            "count": 2,
+            "total": 240,
+            "inflow": 250,
+            "outflow": 10,
+        }
+    ]
+    assert repository.db.query(TransactionMonthlyRollup).count() == 1
+
+
+def test_incremental_rollups_match_a_rebuild():
+    repository = create_repository()
+    created = repository.create_many(
+        [
+            transaction(date(2024, month, day), amount, category_id)
+            for month, day, amount, category_id in [
+                (1, 1, -10, None),
+                (1, 31, 20, 1),
+                (2, 15, -30, 2),
+                (3, 2, -5.25, None),
+                (3, 30, 1000, 1),
+            ]
+        ]
+    )
+    repository.update_transaction_category(created[0].id, category_id=2)
+    repository.update_transaction_category(created[3].id, category_id=1)
+    repository.delete(created[2])
+    incremental = rollups(repository)
+
+    repository.rollups.rebuild()
+
+    assert rollups(repository) == incremental
+
+
+def test_concurrent_sessions_add_to_the_same_rollup(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'rollups.db'}", connect_args={"timeout": 30}
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with Session() as session:
+        session.add(Source(id=1, name="bank"))
+        session.commit()
+
+    def add(amount):
+        with Session() as session:
+            repository = TransactionsRepository(session)
+            for day in range(1, 26):
+                repository.create(transaction(date(2024, 1, day), amount))
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(add, [-2, 3]))
+
+    with Session() as session:
+        repository = TransactionsRepository(session)
+        assert session.query(TransactionMonthlyRollup).count() == 1
+        assert rollups(repository) == [
+            {
+                "month": "2024-01",
+                "source_id": 1,
+                "category_id": None,
+                "sub_category_id": None,
+                "count": 50,
+                "total": 25,
+                "inflow": 75,
+                "outflow": 50,
+            }
+        ]
+    engine.dispose()
+
+
+def test_aggregate_scans_transactions_for_partial_months():
+    repository = create_repository()
+    repository.create_many(
+        [transaction(date(2024, 1, 5), -10), transaction(date(2024, 1, 20), -5)]
+    )
+
+    whole_month = repository.aggregate(
+        TransactionsFilter(start_date=date(2024, 1, 1), end_date=date(2024, 1, 31)),
+        ["month"],
+    )
+    partial_month = repository.aggregate(
+        TransactionsFilter(start_date=date(2024, 1, 10)), ["month"]
+    )
+
+    assert [row["count"] for row in whole_month] == [2]
+    assert [row["count"] for row in partial_month] == [1]
+
+
+def test_covers_whole_months():
+    assert covers_whole_months(None, None)
+    assert covers_whole_months(date(2024, 1, 1), date(2024, 2, 29))
+    assert not covers_whole_months(date(2024, 1, 2), None)
+    assert not covers_whole_months(None, date(2024, 2, 28))
@@ -0,0 +1,62 @@
+from datetime import date
+
+from src.app.common.fingerprint import transaction_fingerprint
+from src.app.models import Source, Transaction
+from src.app.repositories.transactions_repository import (
+    MAX_CATEGORIZATION_ATTEMPTS,
+    TransactionsRepository,
+)
+from src.app.schemas import TransactionCreate
+from tests.conftest import create_test_db
+
+
+def create_repository():
+    session = create_test_db()
+    session.add(Source(id=1, name="bank"))
+    session.commit()
+    return TransactionsRepository(session)
+
+
+def imported(day, amount, description, occurrence=0):
+    return TransactionCreate(
+        date=day,
+        description=description,
+        amount=amount,
+        source_id=1,
+        fingerprint=transaction_fingerprint(1, day, amount, description, occurrence),
+    )
+
+
+def test_insert_new_skips_stored_fingerprints():
+    repository = create_repository()
+    coffee = imported(date(2024, 1, 3), -2.5, "coffee")
+    second_coffee = imported(date(2024, 1, 3), -2.5, "coffee", occurrence=1)
+    rent = imported(date(2024, 1, 5), -800, "rent")
+
+    first = repository.insert_new([coffee, rent])
+    second = repository.insert_new([coffee, second_coffee, rent])
+
+    assert [t.description for t in first] == ["coffee", "rent"]
+    assert [t.fingerprint for t in second] == [second_coffee.fingerprint]
+    assert repository.db.query(Transaction).count() == 3
+    assert repository.rollups.aggregate(["month"])[0]["count"] == 3
+
+
+def test_unresolved_rows_are_retried_up_to_the_attempt_limit():
+    repository = create_repository()
+    coffee, rent = repository.insert_new(
+        [
+            imported(date(2024, 1, 3), -2.5, "coffee"),
+            imported(date(2024, 1, 5), -800, "rent"),
+        ]
+    )
+
+    assert repository.get_uncategorized_transactions(exclude_ids=[coffee.id]) == [rent]
+    for _ in range(MAX_CATEGORIZATION_ATTEMPTS - 1):
+        repository.record_unresolved([coffee.id])
+    assert repository.count_pending() == 2
+
+    repository.record_unresolved([coffee.id])
+
+    assert repository.get_uncategorized_transactions() == [rent]
+    assert repository.count_pending() == 1
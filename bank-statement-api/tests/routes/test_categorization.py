@@ -0,0 +1,44 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.app.models import Transaction
+from src.app.routes.categorization import CategorizationRouter
+from src.app.services.categorizers.transaction_categorizer import (
+    CategorizationResult,
+)
+
+
+def test_process_now_drains_off_the_event_loop_for_a_limited_time():
+    loops = []
+
+    def get_uncategorized_transactions(batch_size, exclude_ids=()):
+        loops.append(asyncio.get_running_loop())
+        return [Transaction(id=1, description="coffee")]
+
+    transactions_repository = MagicMock()
+    transactions_repository.get_uncategorized_transactions.side_effect = (
+        get_uncategorized_transactions
+    )
+    categorizer = MagicMock()
+    categorizer.categorize_transaction = AsyncMock(
+        return_value=[
+            CategorizationResult(transaction_id=1, sub_category_id=2, confidence=1.0)
+        ]
+    )
+    router = CategorizationRouter(
+        transactions_repository=transactions_repository,
+        categories_repository=MagicMock(),
+        categorizer=categorizer,
+        process_now_max_seconds=0.05,
+    )
+    app = FastAPI()
+    app.include_router(router.router)
+
+    response = TestClient(app).post("/categorization/process-now")
+
+    assert response.status_code == 200
+    assert response.json()["categorized_count"] == len(loops)
+    assert all(loop is router.loop for loop in loops)
@@ -0,0 +1,152 @@
+import json
+from unittest.mock import MagicMock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.app.routes.jobs import JobRouter
+
+UPLOAD_REQUEST = {
+    "statementId": "statement-1",
+    "statementSchema": {
+        "id": "schema-1",
+        "fileType": "CSV",
+        "columnMapping": {
+            "date": "Date",
+            "description": "Description",
+            "amount": "Amount",
+        },
+    },
+}
+
+
+def _job(status="running", **fields):
+    return {
+        "id": "job-1",
+        "statement_id": "statement-1",
+        "status": status,
+        "stage": None,
+        "rows_parsed": 0,
+        "rows_inserted": 0,
+        "duplicates": 0,
+        "result": None,
+        "error": None,
+        "created_at": None,
+        "updated_at": None,
+        **fields,
+    }
+
+
+def create_client(
+    jobs_repository,
+    upload_job_service=None,
+    statement_repository=None,
+    max_stream_seconds=None,
+):
+    router = JobRouter(
+        jobs_repository=jobs_repository,
+        upload_job_service=upload_job_service or MagicMock(),
+        statement_repository=statement_repository or MagicMock(),
+        poll_seconds=0.01,
+        max_stream_seconds=max_stream_seconds,
+    )
+    app = FastAPI()
+    app.include_router(router.router)
+    return TestClient(app)
+
+
+def test_submit_upload_returns_the_queued_job():
+    jobs_repository = MagicMock()
+    jobs_repository.get_status.return_value = _job("queued")
+    upload_job_service = MagicMock()
+    upload_job_service.submit.return_value = "job-1"
+    client = create_client(jobs_repository, upload_job_service)
+
+    response = client.post("/jobs/uploads?auto_categorize=false", json=UPLOAD_REQUEST)
+
+    assert response.status_code == 202
+    assert response.json()["id"] == "job-1"
+    assert response.json()["status"] == "queued"
+    spec, auto_categorize = upload_job_service.submit.call_args[0]
+    assert spec.statement_id == "statement-1"
+    assert auto_categorize is False
+
+
+def test_submit_upload_of_unknown_statement_is_not_found():
+    statement_repository = MagicMock()
+    statement_repository.get_by_id.return_value = None
+    upload_job_service = MagicMock()
+    client = create_client(MagicMock(), upload_job_service, statement_repository)
+
+    response = client.post("/jobs/uploads", json=UPLOAD_REQUEST)
+
+    assert response.status_code == 404
+    upload_job_service.submit.assert_not_called()
+
+
+def test_get_job():
+    jobs_repository = MagicMock()
+    jobs_repository.get_status.side_effect = [
+        _job(stage="inserting", rows_parsed=100, rows_inserted=40, duplicates=5),
+        None,
+    ]
+    client = create_client(jobs_repository)
+
+    response = client.get("/jobs/job-1")
+
+    assert response.status_code == 200
+    assert response.json()["stage"] == "inserting"
+    assert response.json()["rowsInserted"] == 40
+    assert client.get("/jobs/job-2").status_code == 404
+
+
+def test_job_events_stream_changes_until_the_job_finishes():
+    running = _job(stage="parsing")
+    inserting = _job(stage="inserting", rows_parsed=100, rows_inserted=50)
+    succeeded = _job(
+        "succeeded",
+        rows_parsed=100,
+        rows_inserted=90,
+        duplicates=10,
+        result={
+            "message": "File processed successfully",
+            "transactionsProcessed": 90,
+            "skippedDuplicates": 10,
+        },
+    )
+    jobs_repository = MagicMock()
+    jobs_repository.get_status.side_effect = [
+        running,
+        running,
+        inserting,
+        succeeded,
+    ]
+    client = create_client(jobs_repository)
+
+    with client.stream("GET", "/jobs/job-1/events") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [
+            json.loads(line[len("data: ") :])
+            for line in response.iter_lines()
+            if line.startswith("data: ")
+        ]
+
+    assert [(event["status"], event["stage"]) for event in events] == [
+        ("running", "parsing"),
+        ("running", "inserting"),
+        ("succeeded", None),
+    ]
+    assert events[-1]["result"]["transactionsProcessed"] == 90
+
+
+def test_job_events_stream_ends_for_a_job_that_never_finishes():
+    jobs_repository = MagicMock()
+    jobs_repository.get_status.return_value = _job("queued")
+    client = create_client(jobs_repository, max_stream_seconds=0.05)
+
+    with client.stream("GET", "/jobs/job-1/events") as response:
+        events = [line for line in response.iter_lines() if line.startswith("data: ")]
+
+    assert len(events) == 1
+    assert jobs_repository.get_status.call_count <= 7
@@ -0,0 +1,33 @@
+from fastapi.testclient import TestClient
+
+from src.app.repositories.transactions_repository import TransactionsRepository
+from tests.conftest import create_app, db_session
+
+
+def test_get_metrics_returns_prometheus_exposition():
+    app_instance = create_app(
+        db_session=db_session,
+        transactions_repository=TransactionsRepository(db_session),
+    )
+    client = TestClient(app_instance.app)
+
+    client.get("/")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/"' in (
+        response.text
+    )
+    assert "categorization_pending_transactions" in response.text
+    assert "db_queries_total" in response.text
+
+
+def test_get_pipeline_metrics_returns_span_summary():
+    app_instance = create_app(db_session=db_session)
+    client = TestClient(app_instance.app)
+
+    response = client.get("/metrics/pipeline")
+
+    assert response.status_code == 200
+    assert "spans" in response.json()
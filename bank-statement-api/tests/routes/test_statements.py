@@ -0,0 +1,72 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+from src.app.repositories.statement_repository import StatementRepository
+from src.app.storage.blob_store import BlobStore, DatabaseBlobBackend
+from tests.conftest import create_app, db_session
+
+
+def _client(statement_repository: StatementRepository) -> TestClient:
+    app_instance = create_app(
+        db_session=db_session, statement_repository=statement_repository
+    )
+    return TestClient(app_instance.app)
+
+
+def test_get_statements_lists_metadata():
+    statement_repository = StatementRepository(
+        db_session, BlobStore(DatabaseBlobBackend(db_session))
+    )
+    statement_id = statement_repository.save(b"a,b\n1,2\n", "history.csv")
+    client = _client(statement_repository)
+
+    response = client.get("/statements", params={"limit": 1000})
+
+    assert response.status_code == 200
+    statement = next(s for s in response.json() if s["id"] == statement_id)
+    assert statement["fileName"] == "history.csv"
+    assert statement["size"] == 8
+    assert statement["rowCount"] == 0
+    assert "content" not in statement
+
+
+def test_get_statement_content():
+    statement_repository = StatementRepository(
+        db_session, BlobStore(DatabaseBlobBackend(db_session))
+    )
+    file_content = b"date,amount\n2024-01-01,10\n" * 100
+    statement_id = statement_repository.save(file_content, "january.csv")
+    client = _client(statement_repository)
+
+    response = client.get(f"/statements/{statement_id}/content")
+
+    assert response.status_code == 200
+    assert response.content == file_content
+    assert 'filename="january.csv"' in response.headers["content-disposition"]
+
+
+def test_get_statement_content_with_a_non_ascii_file_name():
+    statement_repository = StatementRepository(
+        db_session, BlobStore(DatabaseBlobBackend(db_session))
+    )
+    statement_id = statement_repository.save(
+        b"a,b\n1,2\n", "extrato “março” 💶\r\n\\.csv"
+    )
+    client = _client(statement_repository)
+
+    response = client.get(f"/statements/{statement_id}/content")
+
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == (
+        'attachment; filename="extrato marco .csv"; '
+        "filename*=UTF-8''extrato%20%E2%80%9Cmar%C3%A7o%E2%80%9D%20%F0%9F%92%B6.csv"
+    )
+
+
+def test_get_statement_content_not_found():
+    client = _client(StatementRepository(db_session))
+
+    response = client.get(f"/statements/{uuid.uuid4()}/content")
+
+    assert response.status_code == 404
@@ -1,10 +1,24 @@
+import asyncio
+import json
+import threading
+import time
 from datetime import date
+from unittest.mock import MagicMock
 
+import httpx
+import pytest
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from src.app.repositories.categories_repository import CategoriesRepository
 from src.app.repositories.sources_repository import SourcesRepository
 from src.app.repositories.transactions_repository import TransactionsRepository
+from src.app.routes.transactions import TransactionRouter
+from src.app.schemas import (
+    BatchAnalysisResponse,
+    BatchFileAnalysis,
+    FileUploadResponse,
+)
 from tests.conftest import (
     create_app,
     db_session,
@@ -81,6 +95,65 @@ def test_get_transactions_with_filters():
     assert not any(t["description"] == transaction2.description for t in transactions)
 
 
+def test_aggregate_transactions():
+    transactions_repository = TransactionsRepository(db_session)
+    sources_repository = SourcesRepository(db_session)
+    source = sources_repository.create(random_source())
+
+    for day, amount, category_id in [
+        (date(2023, 1, 5), -10, 1),
+        (date(2023, 1, 20), -5.5, 1),
+        (date(2023, 1, 25), 100, None),
+        (date(2023, 2, 3), -20, 1),
+        (date(2024, 1, 1), -1, 1),
+    ]:
+        transaction = random_transaction_create(source.id)
+        transaction.date = day
+        transaction.amount = amount
+        transaction.category_id = category_id
+        transactions_repository.create(transaction)
+
+    app_instance = create_app(
+        db_session=db_session,
+        transactions_repository=transactions_repository,
+        sources_repository=sources_repository,
+    )
+    client = TestClient(app_instance.app)
+
+    response = client.get(
+        "/transactions/aggregate?group_by=month&group_by=category"
+        f"&source_id={source.id}&end_date=2023-12-31"
+    )
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "month": "2023-01",
+            "categoryId": None,
+            "count": 1,
+            "total": 100.0,
+            "inflow": 100.0,
+            "outflow": 0.0,
+        },
+        {
+            "month": "2023-01",
+            "categoryId": 1,
+            "count": 2,
+            "total": -15.5,
+            "inflow": 0.0,
+            "outflow": 15.5,
+        },
+        {
+            "month": "2023-02",
+            "categoryId": 1,
+            "count": 1,
+            "total": -20.0,
+            "inflow": 0.0,
+            "outflow": 20.0,
+        },
+    ]
+
+
 def test_get_transaction():
     transactions_repository = TransactionsRepository(db_session)
     sources_repository = SourcesRepository(db_session)
@@ -174,3 +247,180 @@ def test_categorize_transaction_not_found():
 
     assert response.status_code == 404
     assert "not found" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_reads_stay_responsive_during_upload():
+    upload_started = threading.Event()
+
+    def slow_upload(spec):
+        upload_started.set()
+        time.sleep(1)
+        return FileUploadResponse(
+            message="done", transactions_processed=0, transactions=[]
+        )
+
+    transactions_repository = MagicMock()
+    transactions_repository.get_all_rows.return_value = []
+    statement_upload_service = MagicMock()
+    statement_upload_service.upload_statement.side_effect = slow_upload
+    router = TransactionRouter(
+        transactions_repository=transactions_repository,
+        statement_analysis_service=MagicMock(),
+        statement_upload_service=statement_upload_service,
+        statement_repository=MagicMock(),
+    )
+    app = FastAPI()
+    app.include_router(router.router)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        upload = asyncio.create_task(
+            client.post(
+                "/transactions/upload",
+                json={
+                    "statementId": "statement-1",
+                    "statementSchema": {
+                        "id": "schema-1",
+                        "fileType": "CSV",
+                        "columnMapping": {
+                            "date": "Date",
+                            "description": "Description",
+                            "amount": "Amount",
+                        },
+                    },
+                },
+            )
+        )
+        await asyncio.to_thread(upload_started.wait, 5)
+
+        start = time.perf_counter()
+        reads = await asyncio.gather(*(client.get("/transactions") for _ in range(5)))
+        read_seconds = time.perf_counter() - start
+
+        assert not upload.done()
+        assert read_seconds < 0.5
+        assert all(response.status_code == 200 for response in reads)
+        assert (await upload).status_code == 200
+
+
+UPLOAD_REQUEST = {
+    "statementId": "statement-1",
+    "statementSchema": {
+        "id": "schema-1",
+        "fileType": "CSV",
+        "columnMapping": {
+            "date": "Date",
+            "description": "Description",
+            "amount": "Amount",
+        },
+    },
+}
+
+
+def create_upload_client(transactions_processed, schedule_categorization):
+    statement_upload_service = MagicMock()
+    statement_upload_service.upload_statement.return_value = FileUploadResponse(
+        message="done", transactions_processed=transactions_processed, transactions=[]
+    )
+    router = TransactionRouter(
+        transactions_repository=MagicMock(),
+        statement_analysis_service=MagicMock(),
+        statement_upload_service=statement_upload_service,
+        statement_repository=MagicMock(),
+        schedule_categorization=schedule_categorization,
+    )
+    app = FastAPI()
+    app.include_router(router.router)
+    return TestClient(app)
+
+
+def test_upload_schedules_categorization_for_inserted_rows():
+    schedule_categorization = MagicMock(return_value="task-1")
+    client = create_upload_client(42, schedule_categorization)
+
+    response = client.post("/transactions/upload", json=UPLOAD_REQUEST)
+
+    assert response.status_code == 200
+    assert response.json()["categorizationTaskId"] == "task-1"
+    schedule_categorization.assert_called_once_with(42)
+
+
+def test_upload_without_new_rows_or_opted_out_does_not_schedule():
+    schedule_categorization = MagicMock()
+
+    create_upload_client(0, schedule_categorization).post(
+        "/transactions/upload", json=UPLOAD_REQUEST
+    )
+    create_upload_client(5, schedule_categorization).post(
+        "/transactions/upload?auto_categorize=false", json=UPLOAD_REQUEST
+    )
+
+    schedule_categorization.assert_not_called()
+
+
+def test_upload_succeeds_when_scheduling_fails():
+    schedule_categorization = MagicMock(side_effect=ConnectionError("broker down"))
+    client = create_upload_client(3, schedule_categorization)
+
+    response = client.post("/transactions/upload", json=UPLOAD_REQUEST)
+
+    assert response.status_code == 200
+    assert response.json()["categorizationTaskId"] is None
+
+
+def test_export_transactions():
+    transactions_repository = TransactionsRepository(db_session)
+    sources_repository = SourcesRepository(db_session)
+    source = sources_repository.create(random_source())
+    transaction = transactions_repository.create(random_transaction_create(source.id))
+
+    app_instance = create_app(
+        db_session=db_session,
+        transactions_repository=transactions_repository,
+        sources_repository=sources_repository,
+    )
+    client = TestClient(app_instance.app)
+
+    response = client.get(f"/transactions/export?format=ndjson&source_id={source.id}")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "transactions.ndjson" in response.headers["content-disposition"]
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["description"] for row in rows] == [transaction.description]
+    assert rows[0]["source"] == source.name
+
+
+def test_analyze_statements_passes_every_file_to_the_batch_service():
+    batch_analysis_service = MagicMock()
+    batch_analysis_service.analyze.return_value = BatchAnalysisResponse(
+        files=[
+            BatchFileAnalysis(file_name="a.csv", error="Error analyzing file: bad"),
+            BatchFileAnalysis(file_name="b.csv", new_transactions=0),
+        ]
+    )
+    router = TransactionRouter(
+        transactions_repository=MagicMock(),
+        statement_analysis_service=MagicMock(),
+        statement_upload_service=MagicMock(),
+        statement_repository=MagicMock(),
+        batch_analysis_service=batch_analysis_service,
+    )
+    app = FastAPI()
+    app.include_router(router.router)
+    client = TestClient(app)
+
+    response = client.post(
+        "/transactions/analyze/batch",
+        files=[("files", ("a.csv", b"1")), ("files", ("b.csv", b"2"))],
+    )
+
+    assert response.status_code == 200
+    batch_analysis_service.analyze.assert_called_once_with(
+        [("a.csv", b"1"), ("b.csv", b"2")]
+    )
+    files = response.json()["files"]
+    assert [file["fileName"] for file in files] == ["a.csv", "b.csv"]
+    assert files[0]["error"] == "Error analyzing file: bad"
+    assert files[1]["newTransactions"] == 0
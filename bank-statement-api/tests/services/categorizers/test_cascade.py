@@ -0,0 +1,138 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.app.services.categorizers.cascade import (
+    CascadeStage,
+    CascadeTransactionCategorizer,
+)
+from src.app.services.categorizers.transaction_categorizer import (
+    CategorisationData,
+    CategorizationResult,
+    TransactionCategorizer,
+)
+
+
+def stub_categorizer(answers):
+    """answers maps transaction_id to (sub_category_id, confidence)"""
+    categorizer = AsyncMock(spec=TransactionCategorizer)
+
+    async def categorize_transaction_side_effect(transactions):
+        return [
+            CategorizationResult(
+                transaction_id=t.transaction_id,
+                sub_category_id=answers[t.transaction_id][0],
+                confidence=answers[t.transaction_id][1],
+            )
+            for t in transactions
+            if t.transaction_id in answers
+        ]
+
+    categorizer.categorize_transaction.side_effect = categorize_transaction_side_effect
+    return categorizer
+
+
+def transactions(*ids):
+    return [
+        CategorisationData(
+            transaction_id=id,
+            description=f"transaction {id}",
+            normalized_description=f"transaction {id}",
+        )
+        for id in ids
+    ]
+
+
+@pytest.mark.asyncio
+async def test_only_unresolved_transactions_reach_the_next_stage():
+    history = stub_categorizer({1: (10, 1.0)})
+    keywords = stub_categorizer({2: (20, 0.9), 3: (30, 0.4)})
+    llm = stub_categorizer({3: (31, 0.8), 4: (40, 0.7)})
+
+    cascade = CascadeTransactionCategorizer(
+        [
+            CascadeStage("history", history, 1.0),
+            CascadeStage("keywords", keywords, 0.8),
+            CascadeStage("llm", llm),
+        ]
+    )
+
+    results = await cascade.categorize_transaction(transactions(1, 2, 3, 4))
+
+    assert [(r.transaction_id, r.sub_category_id) for r in results] == [
+        (1, 10),
+        (2, 20),
+        (3, 31),
+        (4, 40),
+    ]
+    keywords_input = keywords.categorize_transaction.call_args[0][0]
+    assert [t.transaction_id for t in keywords_input] == [2, 3, 4]
+    llm_input = llm.categorize_transaction.call_args[0][0]
+    assert [t.transaction_id for t in llm_input] == [3, 4]
+
+
+@pytest.mark.asyncio
+async def test_stops_calling_stages_once_everything_is_resolved():
+    history = stub_categorizer({1: (10, 1.0), 2: (20, 1.0)})
+    llm = stub_categorizer({})
+
+    cascade = CascadeTransactionCategorizer(
+        [CascadeStage("history", history, 1.0), CascadeStage("llm", llm)]
+    )
+
+    await cascade.categorize_transaction(transactions(1, 2))
+
+    llm.categorize_transaction.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_keeps_best_low_confidence_result_when_no_stage_is_confident():
+    keywords = stub_categorizer({1: (10, 0.5)})
+    embeddings = stub_categorizer({1: (11, 0.3)})
+
+    cascade = CascadeTransactionCategorizer(
+        [
+            CascadeStage("keywords", keywords, 0.8),
+            CascadeStage("embeddings", embeddings, 0.8),
+        ]
+    )
+
+    results = await cascade.categorize_transaction(transactions(1, 2))
+
+    assert len(results) == 1
+    assert results[0].sub_category_id == 10
+    assert results[0].confidence == 0.5
+
+
+@pytest.mark.asyncio
+async def test_reports_hit_rates_per_stage():
+    history = stub_categorizer({1: (10, 1.0)})
+    llm = stub_categorizer({2: (20, 0.9), 3: (30, 0.9)})
+
+    cascade = CascadeTransactionCategorizer(
+        [CascadeStage("history", history, 1.0), CascadeStage("llm", llm)]
+    )
+
+    await cascade.categorize_transaction(transactions(1, 2, 3, 4))
+
+    history_stats, llm_stats = cascade.get_stats()
+    assert history_stats.transactions_in == 4
+    assert history_stats.resolved == 1
+    assert history_stats.hit_rate == 0.25
+    assert llm_stats.transactions_in == 3
+    assert llm_stats.resolved == 2
+    assert llm_stats.calls == 1
+    assert llm_stats.total_seconds >= 0
+
+
+def test_refresh_rules_refreshes_every_stage():
+    first = MagicMock(spec=TransactionCategorizer)
+    second = MagicMock(spec=TransactionCategorizer)
+
+    cascade = CascadeTransactionCategorizer(
+        [CascadeStage("first", first), CascadeStage("second", second)]
+    )
+    cascade.refresh_rules()
+
+    first.refresh_rules.assert_called_once()
+    second.refresh_rules.assert_called_once()
@@ -0,0 +1,44 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.app.services.categorizers.existing_transactions_categorizer import (
+    ExistingTransactionsCategorizer,
+)
+from src.app.services.categorizers.factory import create_categorizer, parse_stages
+from src.app.services.categorizers.keyword import KeywordTransactionCategorizer
+from tests.conftest import create_sample_categories_repository
+
+
+def test_parse_stages():
+    assert parse_stages("history:1.0, keywords:0.8,llm") == [
+        ("history", 1.0),
+        ("keywords", 0.8),
+        ("llm", 0.0),
+    ]
+
+
+def test_create_categorizer_builds_stages_in_order():
+    llm_categorizer = MagicMock()
+
+    cascade = create_categorizer(
+        categories_repository=create_sample_categories_repository(),
+        transactions_repository=MagicMock(),
+        llm_categorizer=llm_categorizer,
+        stages_spec="history:1.0,keywords:0.9,llm",
+    )
+
+    assert [stage.name for stage in cascade.stages] == ["history", "keywords", "llm"]
+    assert isinstance(cascade.stages[0].categorizer, ExistingTransactionsCategorizer)
+    assert isinstance(cascade.stages[1].categorizer, KeywordTransactionCategorizer)
+    assert cascade.stages[1].min_confidence == 0.9
+    assert cascade.stages[2].categorizer is llm_categorizer
+
+
+def test_create_categorizer_rejects_unknown_stage():
+    with pytest.raises(ValueError):
+        create_categorizer(
+            categories_repository=MagicMock(),
+            transactions_repository=MagicMock(),
+            stages_spec="history,magic",
+        )
@@ -1,11 +1,18 @@
 from unittest.mock import MagicMock
 
-from src.app.services.categorizers.keyword import KeywordTransactionCategorizer
+import pytest
+
+from src.app.services.categorizers.keyword import (
+    KeywordIndex,
+    KeywordTransactionCategorizer,
+    tokenize,
+)
 from src.app.services.categorizers.transaction_categorizer import CategorisationData
 from tests.conftest import create_category_tree
 
 
-def test_keyword_categorizer():
+@pytest.mark.asyncio
+async def test_keyword_categorizer():
     categories = create_category_tree(
         id=10,
         category_name="Food",
@@ -36,7 +43,7 @@ def test_keyword_categorizer():
             normalized_description="Payment to GROCERIES STORE",
         ),
     ]
-    results = categorizer.categorize_transaction(transactions)
+    results = await categorizer.categorize_transaction(transactions)
 
     assert results[0].transaction_id == 100
     assert results[0].sub_category_id == 20
@@ -45,3 +52,73 @@ def test_keyword_categorizer():
     assert results[1].transaction_id == 200
     assert results[1].sub_category_id == 30
     assert results[1].confidence > 0.0
+
+
+def test_tokenize_normalizes_case_accents_and_punctuation():
+    assert tokenize("Pagamento: CAFÉ São-João") == ["pagamento", "cafe", "sao", "joao"]
+    assert tokenize("") == []
+
+
+def test_index_matches_multi_word_phrases():
+    index = KeywordIndex()
+    index.add("uber eats", 1)
+    index.add("uber", 2)
+
+    assert index.score(tokenize("UBER EATS order")) == {1: 2.0, 2: 1.0}
+    assert index.score(tokenize("uber trip")) == {2: 1.0}
+    assert index.score(tokenize("eats uber")) == {2: 1.0}
+
+
+def test_keyword_categorizer_weights_all_matched_keywords():
+    categorizer = KeywordTransactionCategorizer(
+        categories_repository=MagicMock(),
+        keywords_map={"supermarket": 30, "continente": 30, "bar": 20},
+    )
+
+    results = categorizer.categorize_batch(
+        [
+            CategorisationData(
+                transaction_id=1,
+                description="Continente supermarket bar",
+                normalized_description="continente supermarket bar",
+            ),
+            CategorisationData(
+                transaction_id=2,
+                description="Bank transfer",
+                normalized_description="bank transfer",
+            ),
+        ]
+    )
+
+    assert len(results) == 1
+    assert results[0].transaction_id == 1
+    assert results[0].sub_category_id == 30
+    assert results[0].confidence == pytest.approx(2 / 3)
+
+
+def test_keyword_categorizer_full_category_name_is_a_phrase():
+    categories_repository = MagicMock()
+    categories_repository.get_all.return_value = create_category_tree(
+        id=10,
+        category_name="Transport",
+        subcategory_id_1=20,
+        subcategory_name_1="Transport: Fuel",
+        subcategory_id_2=30,
+        subcategory_name_2="Transport: Parking",
+    )
+
+    categorizer = KeywordTransactionCategorizer(
+        categories_repository=categories_repository
+    )
+
+    results = categorizer.categorize_batch(
+        [
+            CategorisationData(
+                transaction_id=1,
+                description="transport parking lisboa",
+                normalized_description="transport parking lisboa",
+            )
+        ]
+    )
+
+    assert results[0].sub_category_id == 30
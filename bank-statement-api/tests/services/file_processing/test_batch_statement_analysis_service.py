@@ -0,0 +1,217 @@
+import io
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from decimal import Decimal
+from typing import List, Tuple
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+from src.app.common.fingerprint import statement_fingerprints
+from src.app.models import Source, Transaction
+from src.app.repositories.statement_repository import StatementRepository
+from src.app.repositories.statement_schema_repository import StatementSchemaRepository
+from src.app.repositories.transactions_repository import TransactionsRepository
+from src.app.schemas import StatementTransaction
+from src.app.services.file_processing.batch_statement_analysis_service import (
+    BatchStatementAnalysisService,
+    BatchTooLarge,
+    expand_archives,
+)
+from src.app.services.file_processing.conversion_model import ConversionModel
+from src.app.services.file_processing.file_type_detector import FileTypeDetector
+from src.app.services.file_processing.parsers.parser_factory import ParserFactory
+from src.app.services.file_processing.statement_analysis_service import (
+    StatementAnalysisService,
+)
+from src.app.services.file_processing.statement_statistics_calculator import (
+    StatementStatisticsCalculator,
+)
+from src.app.services.file_processing.transactions_builder import TransactionsBuilder
+from src.app.services.file_processing.transactions_cleaner import TransactionsCleaner
+from src.app.storage.blob_store import BlobStore, DatabaseBlobBackend
+from tests.conftest import create_test_db
+
+
+def _csv(rows: List[Tuple[str, str, float]], amount_column="Amount") -> bytes:
+    df = pd.DataFrame(rows, columns=["Date", "Description", amount_column])
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def _zip(files: List[Tuple[str, bytes]]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files:
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def _conversion_model(df: pd.DataFrame) -> ConversionModel:
+    return ConversionModel(
+        column_map={
+            "date": "Date",
+            "description": "Description",
+            "amount": df.columns[2],
+        },
+        header_row=0,
+        start_row=1,
+    )
+
+
+def _setup(executor=None):
+    session = create_test_db()
+    session.add(Source(id=1, name="bank"))
+    session.commit()
+
+    column_normalizer = MagicMock()
+    column_normalizer.normalize_columns.side_effect = _conversion_model
+    analysis_service = StatementAnalysisService(
+        file_type_detector=FileTypeDetector(),
+        parser_factory=ParserFactory(),
+        column_normalizer=column_normalizer,
+        transaction_cleaner=TransactionsCleaner(),
+        transactions_builder=TransactionsBuilder(),
+        statistics_calculator=StatementStatisticsCalculator(),
+        statement_repository=StatementRepository(
+            session, BlobStore(DatabaseBlobBackend(session))
+        ),
+        statement_schema_repository=StatementSchemaRepository(session),
+    )
+    service = BatchStatementAnalysisService(
+        analysis_service,
+        TransactionsRepository(session),
+        executor=executor,
+        max_workers=4,
+    )
+    return session, service, column_normalizer
+
+
+JANUARY = [
+    ("2024-01-10", "Groceries", -42.5),
+    ("2024-01-20", "Salary", 2000.0),
+    ("2024-01-30", "Rent", -800.0),
+]
+FEBRUARY = [
+    ("2024-01-30", "Rent", -800.0),
+    ("2024-02-05", "Groceries", -37.2),
+]
+
+
+def test_batch_maps_columns_once_per_header_and_dedupes_across_files():
+    session, service, column_normalizer = _setup()
+    stored = StatementTransaction(
+        date=date(2024, 1, 10),
+        description="Groceries",
+        amount=Decimal("-42.5"),
+        currency="EUR",
+    )
+    session.add(
+        Transaction(
+            date=stored.date,
+            description=stored.description,
+            amount=stored.amount,
+            currency=stored.currency,
+            source_id=1,
+            fingerprint=statement_fingerprints([stored], 1)[0],
+        )
+    )
+    session.commit()
+
+    response = service.analyze(
+        [
+            ("january.csv", _csv(JANUARY)),
+            (
+                "more.zip",
+                _zip(
+                    [
+                        ("2024/february.csv", _csv(FEBRUARY)),
+                        ("card.csv", _csv(JANUARY, amount_column="Value")),
+                        ("__MACOSX/._card.csv", b"resource fork"),
+                    ]
+                ),
+            ),
+        ]
+    )
+
+    files = {file.file_name: file for file in response.files}
+    assert list(files) == ["january.csv", "february.csv", "card.csv"]
+    assert all(file.error is None for file in files.values())
+    assert column_normalizer.normalize_columns.call_count == 2
+    assert (
+        files["january.csv"].analysis.statement_schema.id
+        == files["february.csv"].analysis.statement_schema.id
+    )
+
+    assert files["january.csv"].new_transactions == 2
+    assert files["january.csv"].duplicate_transactions == 1
+    assert files["february.csv"].new_transactions == 1
+    assert files["february.csv"].duplicate_transactions == 1
+    assert files["february.csv"].analysis.total_transactions == 2
+
+
+def test_repeated_and_previously_analyzed_files_are_not_parsed_again():
+    _, service, column_normalizer = _setup()
+    january = _csv(JANUARY)
+    first = service.analyze([("january.csv", january)])
+
+    response = service.analyze(
+        [
+            ("copy.csv", january),
+            ("february.csv", _csv(FEBRUARY)),
+            ("again.csv", january),
+        ]
+    )
+
+    copy, february, again = response.files
+    assert copy.already_analyzed
+    assert copy.analysis.statement_id == first.files[0].analysis.statement_id
+    assert not february.already_analyzed
+    assert again.already_analyzed
+    assert again.analysis.statement_id == copy.analysis.statement_id
+    # February has the same columns, so it reuses the stored schema
+    assert column_normalizer.normalize_columns.call_count == 1
+    assert february.analysis.statement_schema == copy.analysis.statement_schema
+
+
+def test_a_bad_file_does_not_fail_the_batch():
+    _, service, _ = _setup()
+
+    response = service.analyze(
+        [
+            ("january.csv", _csv(JANUARY)),
+            ("notes.txt", b"not a statement"),
+            ("broken.csv", b"Date,Description,Amount\nyesterday,Coffee,abc\n"),
+        ]
+    )
+
+    january, notes, broken = response.files
+    assert january.error is None
+    assert january.analysis.total_transactions == 3
+    assert notes.error is not None
+    assert broken.error is not None
+    assert broken.analysis is None
+
+
+def test_cleaning_runs_in_a_process_pool():
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        _, service, _ = _setup(executor=executor)
+        response = service.analyze(
+            [("january.csv", _csv(JANUARY)), ("february.csv", _csv(FEBRUARY))]
+        )
+
+    assert [file.analysis.total_transactions for file in response.files] == [3, 2]
+
+
+def test_expand_archives_enforces_batch_limits():
+    files = [("a.csv", b"12345"), ("b.zip", _zip([("c.csv", b"67890")]))]
+
+    assert expand_archives(files, max_files=2, max_bytes=10) == [
+        ("a.csv", b"12345"),
+        ("c.csv", b"67890"),
+    ]
+    with pytest.raises(BatchTooLarge):
+        expand_archives(files, max_files=1, max_bytes=10)
+    with pytest.raises(BatchTooLarge):
+        expand_archives(files, max_files=2, max_bytes=9)
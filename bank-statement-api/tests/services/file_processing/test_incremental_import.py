@@ -0,0 +1,171 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import List
+
+from src.app.models import Source, Transaction
+from src.app.repositories.source_import_marks_repository import (
+    SourceImportMarksRepository,
+)
+from src.app.repositories.sources_repository import SourcesRepository
+from src.app.repositories.transactions_repository import TransactionsRepository
+from src.app.schemas import StatementTransaction
+from src.app.services.file_processing.incremental_import import (
+    IncrementalImport,
+    overlap_fingerprint,
+)
+from tests.conftest import create_test_db
+
+
+def _statement(start: date, end: date) -> List[StatementTransaction]:
+    days = (end - start).days + 1
+    return [
+        StatementTransaction(
+            date=start + timedelta(days=offset),
+            description=f"Purchase {offset}",
+            amount=Decimal("-12.30"),
+            currency="EUR",
+        )
+        for offset in range(days)
+    ]
+
+
+def _import(session, source_id: int, transactions: List[StatementTransaction]):
+    session.add_all(
+        [
+            Transaction(
+                date=t.date,
+                description=t.description,
+                amount=t.amount,
+                currency=t.currency,
+                source_id=source_id,
+            )
+            for t in transactions
+        ]
+    )
+    session.commit()
+
+
+def _setup():
+    session = create_test_db()
+    source = Source(name="bank")
+    session.add(source)
+    session.commit()
+    repository = SourceImportMarksRepository(session)
+    return session, source.id, repository, IncrementalImport(repository, 7)
+
+
+def test_without_a_mark_every_row_is_deduped():
+    _, source_id, _, incremental_import = _setup()
+    statement = _statement(date(2024, 1, 1), date(2024, 1, 31))
+
+    partition = incremental_import.partition(statement, source_id)
+
+    assert partition.to_dedupe == statement
+    assert partition.rejected == []
+
+
+def test_overlapping_statement_only_dedupes_new_rows():
+    session, source_id, repository, incremental_import = _setup()
+    january = _statement(date(2024, 1, 1), date(2024, 1, 31))
+    _import(session, source_id, january)
+    incremental_import.record(january, source_id)
+
+    mark = repository.get(source_id)
+    assert mark.low_water_mark == date(2024, 1, 1)
+    assert mark.high_water_mark == date(2024, 1, 31)
+    assert mark.overlap_start == date(2024, 1, 25)
+
+    # The February export repeats the last ten days of January
+    next_statement = [t for t in january if t.date >= date(2024, 1, 22)] + [
+        StatementTransaction(
+            date=date(2024, 2, 2),
+            description="Rent",
+            amount=Decimal("-800"),
+            currency="EUR",
+        )
+    ]
+    partition = incremental_import.partition(next_statement, source_id)
+
+    assert [t.description for t in partition.to_dedupe] == ["Rent"]
+    assert len(partition.rejected) == 10
+
+
+def test_late_posted_row_sends_the_overlap_window_to_dedupe():
+    session, source_id, _, incremental_import = _setup()
+    january = _statement(date(2024, 1, 1), date(2024, 1, 31))
+    _import(session, source_id, january)
+    incremental_import.record(january, source_id)
+
+    late = StatementTransaction(
+        date=date(2024, 1, 30),
+        description="Settled late",
+        amount=Decimal("-5"),
+        currency="EUR",
+    )
+    next_statement = [t for t in january if t.date >= date(2024, 1, 20)] + [late]
+    partition = incremental_import.partition(next_statement, source_id)
+
+    assert late in partition.to_dedupe
+    assert len(partition.to_dedupe) == 8
+    assert all(t.date < date(2024, 1, 25) for t in partition.rejected)
+
+
+def test_record_merges_overlapping_ranges_and_restarts_after_a_gap():
+    session, source_id, repository, incremental_import = _setup()
+    january = _statement(date(2024, 1, 1), date(2024, 1, 31))
+    overlapping = _statement(date(2024, 1, 28), date(2024, 2, 29))
+    after_gap = _statement(date(2024, 4, 1), date(2024, 4, 30))
+
+    incremental_import.record(january, source_id)
+    incremental_import.record(overlapping, source_id)
+    mark = repository.get(source_id)
+    assert (mark.low_water_mark, mark.high_water_mark) == (
+        date(2024, 1, 1),
+        date(2024, 2, 29),
+    )
+
+    _import(session, source_id, after_gap)
+    incremental_import.record(after_gap, source_id)
+    mark = repository.get(source_id)
+    assert (mark.low_water_mark, mark.high_water_mark) == (
+        date(2024, 4, 1),
+        date(2024, 4, 30),
+    )
+    assert mark.overlap_fingerprint == overlap_fingerprint(
+        [t for t in after_gap if t.date >= date(2024, 4, 24)]
+    )
+
+
+def test_deleting_a_transaction_in_the_range_resets_the_mark():
+    session, source_id, repository, incremental_import = _setup()
+    january = _statement(date(2024, 1, 1), date(2024, 1, 31))
+    _import(session, source_id, january)
+    incremental_import.record(january, source_id)
+    transactions = TransactionsRepository(session)
+    stored = session.query(Transaction).order_by(Transaction.date).all()
+
+    transactions.delete(stored[0])
+    assert repository.get(source_id) is None
+
+    partition = incremental_import.partition(january, source_id)
+    assert partition.to_dedupe == january
+    assert partition.rejected == []
+
+
+def test_deleting_a_source_deletes_its_mark():
+    session, source_id, repository, incremental_import = _setup()
+    incremental_import.record(
+        _statement(date(2024, 1, 1), date(2024, 1, 31)), source_id
+    )
+    sources = SourcesRepository(session)
+
+    sources.delete(sources.get_by_id(source_id))
+
+    assert repository.get(source_id) is None
+
+
+def test_fingerprint_ignores_order_and_amount_scale():
+    rows = _statement(date(2024, 1, 1), date(2024, 1, 3))
+    rescaled = [t.model_copy(update={"amount": Decimal("-12.3")}) for t in rows]
+
+    assert overlap_fingerprint(rows) == overlap_fingerprint(reversed(rescaled))
@@ -0,0 +1,145 @@
+import pandas as pd
+
+from src.app.repositories.statement_schema_repository import StatementSchemaRepository
+from src.app.schemas import ColumnMapping, StatementSchemaDefinition
+from src.app.services.file_processing.file_type_detector import FileType
+from src.app.services.file_processing.schema_fingerprint import (
+    SchemaSimilarityIndex,
+    header_at,
+    normalize_header,
+    remap_columns,
+    statement_hash,
+)
+from tests.conftest import create_test_db
+
+MAPPING = ColumnMapping(
+    date="Date", description="Description", amount="Amount", balance="Balance"
+)
+
+
+def _df(columns, rows=1):
+    return pd.DataFrame([[""] * len(columns)] * rows, columns=columns)
+
+
+def _store(repository, column_names, file_type=FileType.CSV, header_row=0):
+    schema = StatementSchemaDefinition(
+        id=f"schema-{len(repository.list_schema_data())}",
+        source_id=4,
+        file_type=file_type.name,
+        column_mapping=MAPPING,
+        header_row=header_row,
+        start_row=header_row + 1,
+        column_names=column_names,
+    )
+    repository.save(
+        {
+            "id": schema.id,
+            "statement_hash": statement_hash(column_names, file_type),
+            "schema_data": schema.model_dump(),
+        }
+    )
+    return schema
+
+
+def test_statement_hash_ignores_column_order_only():
+    columns = ["Date", "Description", "Amount"]
+
+    assert statement_hash(columns, FileType.CSV) == statement_hash(
+        list(reversed(columns)), FileType.CSV
+    )
+    assert statement_hash(columns, FileType.CSV) != statement_hash(
+        columns, FileType.EXCEL
+    )
+    assert statement_hash(columns, FileType.CSV) != statement_hash(
+        ["date", "description", "amount"], FileType.CSV
+    )
+
+
+def test_header_at_reads_the_header_row():
+    df = pd.DataFrame([["Bank export", ""], ["Date", "Amount"], ["2024-01-01", "1"]])
+
+    assert header_at(df, 2) == ["Date", "Amount"]
+    assert header_at(_df(["Date", "Amount"]), 0) == ["Date", "Amount"]
+
+
+def test_normalize_header():
+    assert normalize_header("  Descrição do Movimento ") == "descricao do movimento"
+    assert normalize_header("Amount (EUR)") == "amount eur"
+
+
+def test_remap_columns_follows_renamed_columns():
+    mapping = remap_columns(
+        MAPPING, ["DATE", "Amount (EUR)", "description", "Balance", "Reference"]
+    )
+
+    assert mapping == ColumnMapping(
+        date="DATE",
+        description="description",
+        amount="Amount (EUR)",
+        balance="Balance",
+    )
+
+
+def test_remap_columns_rejects_missing_or_ambiguous_columns():
+    assert remap_columns(MAPPING, ["Date", "Description", "Balance"]) is None
+    assert (
+        remap_columns(
+            MAPPING,
+            ["Date", "Description", "Amount EUR", "Amount USD", "Balance"],
+        )
+        is None
+    )
+
+
+def test_index_adapts_the_closest_layout_to_the_new_header():
+    repository = StatementSchemaRepository(create_test_db())
+    _store(repository, ["Date", "Description", "Amount", "Balance"])
+    _store(repository, ["Date", "Description", "Amount", "Balance"], FileType.EXCEL)
+    _store(repository, ["Date", "Memo", "Value"])
+    index = SchemaSimilarityIndex(repository, threshold=0.8)
+
+    similar = index.find_similar(
+        _df(["Balance", "date", "Description", "Amount (EUR)"]), FileType.CSV
+    )
+
+    assert similar.similarity == 0.8
+    assert similar.schema.id == "schema-0"
+    assert similar.schema.source_id == 4
+    assert similar.schema.column_mapping.amount == "Amount (EUR)"
+    assert similar.schema.column_mapping.date == "date"
+    assert similar.schema.column_names == [
+        "Balance",
+        "date",
+        "Description",
+        "Amount (EUR)",
+    ]
+
+
+def test_index_reads_the_header_where_the_known_layout_has_it():
+    repository = StatementSchemaRepository(create_test_db())
+    _store(repository, ["Date", "Description", "Amount", "Balance"], header_row=2)
+    index = SchemaSimilarityIndex(repository, threshold=0.8)
+    df = pd.DataFrame(
+        [
+            ["Account 123", "", "", ""],
+            ["Date", "Description", "Amount", "Balance "],
+            ["2024-01-01", "Coffee", "-2", "10"],
+        ]
+    )
+
+    similar = index.find_similar(df, FileType.CSV)
+
+    assert similar.schema.column_mapping.balance == "Balance "
+
+
+def test_index_without_a_close_enough_layout_finds_nothing():
+    repository = StatementSchemaRepository(create_test_db())
+    _store(repository, ["Date", "Description", "Amount", "Balance"])
+    index = SchemaSimilarityIndex(repository, threshold=0.8)
+
+    assert (
+        index.find_similar(
+            _df(["Date", "Description", "Amount", "Category", "Notes"]), FileType.CSV
+        )
+        is None
+    )
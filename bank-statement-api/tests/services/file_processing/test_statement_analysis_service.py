@@ -4,8 +4,9 @@ from typing import List
 from unittest.mock import MagicMock
 
 import pandas as pd
+from fastapi.encoders import jsonable_encoder
 
-from src.app.models import StatementSchemaMapping
+from src.app.models import Statement, StatementSchemaMapping
 from src.app.repositories.statement_repository import StatementRepository
 from src.app.repositories.statement_schema_repository import StatementSchemaRepository
 from src.app.schemas import (
@@ -32,6 +33,8 @@ from src.app.services.file_processing.transactions_builder import (
     TransactionsBuilder,
 )
 from src.app.services.file_processing.transactions_cleaner import TransactionsCleaner
+from src.app.storage.blob_store import BlobStore, DatabaseBlobBackend
+from tests.conftest import create_test_db
 
 
 class TestFileAnalysisService:
@@ -87,6 +90,76 @@ class TestFileAnalysisService:
         assert result.statement_id is not None
         assert result.statement_schema.source_id == 1
 
+    def test_new_schema_takes_the_id_it_was_stored_under(self):
+        statement_schema_repository = MagicMock()
+        statement_schema_repository.find_by_statement_hash.return_value = None
+        statement_schema_repository.list_schema_data.return_value = []
+        # A concurrent analysis of the same columns saved its schema first
+        statement_schema_repository.save.return_value = "winning-schema-id"
+
+        service = createStatementAnalysisService(
+            statement_schema_repository=statement_schema_repository
+        )
+        result = service.analyze_statement(b"Date,Description,Amount\n", "a.csv")
+
+        assert result.statement_schema.id == "winning-schema-id"
+
+    def test_analyze_same_file_twice_replays_the_first_analysis(self):
+        df = pd.DataFrame(
+            {
+                "Date": ["2023-01-01", "2023-01-02"],
+                "Description": ["Salary", "Groceries"],
+                "Amount": [1000.00, -50.00],
+            }
+        )
+        file_content = df.to_csv(index=False).encode("utf-8")
+        session = create_test_db()
+        statement_repository = StatementRepository(
+            session, BlobStore(DatabaseBlobBackend(session))
+        )
+        statement_parser = MagicMock()
+        statement_parser.parse.return_value = df
+        parser_factory = MagicMock()
+        parser_factory.create_parser.return_value = statement_parser
+
+        service = createStatementAnalysisService(
+            df=df,
+            parser_factory=parser_factory,
+            statement_repository=statement_repository,
+        )
+        first = service.analyze_statement(file_content, "sample.csv")
+        second = service.analyze_statement(file_content, "sample (1).csv")
+
+        assert second == first
+        assert statement_parser.parse.call_count == 1
+        assert session.query(Statement).count() == 1
+
+    def test_replayed_analysis_uses_the_schema_it_was_imported_with(self):
+        df = pd.DataFrame({"Date": ["2023-01-01"], "Amount": [10.0]})
+        file_content = df.to_csv(index=False).encode("utf-8")
+        session = create_test_db()
+        statement_repository = StatementRepository(
+            session, BlobStore(DatabaseBlobBackend(session))
+        )
+        service = createStatementAnalysisService(
+            df=df, statement_repository=statement_repository
+        )
+        first = service.analyze_statement(file_content, "sample.csv")
+        imported_schema = first.statement_schema.model_copy(update={"source_id": 7})
+        statement_repository.save_import_result(
+            first.statement_id,
+            {
+                "statement_schema": jsonable_encoder(imported_schema),
+                "transactions_processed": 1,
+                "skipped_duplicates": 0,
+            },
+        )
+
+        second = service.analyze_statement(file_content, "sample.csv")
+
+        assert second.statement_id == first.statement_id
+        assert second.statement_schema.source_id == 7
+
     def test_analyze_file_with_header_row_at_first(self):
         data = {
             "Date": ["2023-01-01", "2023-01-02"],
@@ -213,6 +286,65 @@ class TestFileAnalysisService:
             "950.0",
         ]
 
+    def test_analyze_file_with_drifted_header_reuses_the_similar_schema(self):
+        session = create_test_db()
+        statement_schema_repository = StatementSchemaRepository(session)
+        january = pd.DataFrame(
+            {
+                "Date": ["2023-01-01"],
+                "Description": ["Salary"],
+                "Amount": [1000.00],
+                "Currency": ["EUR"],
+                "Balance": [1000.00],
+            }
+        )
+        # The bank renamed a column and moved another
+        february = pd.DataFrame(
+            {
+                "Description": ["Groceries"],
+                "Date": ["2023-02-01"],
+                "Amount (EUR)": [-50.00],
+                "Currency": ["EUR"],
+                "Balance": [950.00],
+            }
+        )
+        column_normalizer = MagicMock()
+        column_normalizer.normalize_columns.return_value = ConversionModel(
+            column_map={
+                "date": "Date",
+                "description": "Description",
+                "amount": "Amount",
+                "currency": "Currency",
+                "balance": "Balance",
+            },
+            header_row=0,
+            start_row=1,
+        )
+        statement_parser = MagicMock()
+        statement_parser.parse.side_effect = [january, february, february]
+        parser_factory = MagicMock()
+        parser_factory.create_parser.return_value = statement_parser
+        service = createStatementAnalysisService(
+            df=january,
+            parser_factory=parser_factory,
+            column_normalizer=column_normalizer,
+            statement_schema_repository=statement_schema_repository,
+        )
+
+        first = service.analyze_statement(b"january", "january.csv")
+        second = service.analyze_statement(b"february", "february.csv")
+        third = service.analyze_statement(b"february, again", "february.csv")
+
+        assert column_normalizer.normalize_columns.call_count == 1
+        assert second.statement_schema.id != first.statement_schema.id
+        assert second.statement_schema.column_mapping.amount == "Amount (EUR)"
+        assert second.statement_schema.column_names == list(february.columns)
+        conversion_model = service.transaction_cleaner.clean.call_args[0][1]
+        assert conversion_model.column_map["amount"] == "Amount (EUR)"
+        # Saved for the new header, so the next file like it is an exact match
+        assert third.statement_schema == second.statement_schema
+        assert len(statement_schema_repository.list_schema_data()) == 2
+
 
 def createStatementAnalysisService(
     df: pd.DataFrame = None,
@@ -322,6 +454,7 @@ def createStatementAnalysisService(
     if statement_repository is None:
         statement_repository = MagicMock()
         statement_repository.save.return_value = statement_id
+        statement_repository.find_analyzed.return_value = None
     if statement_schema_repository is None:
         statement_schema_repository = MagicMock()
         statement_schema_repository.find_by_statement_hash.return_value = (
@@ -4,7 +4,10 @@ from decimal import Decimal
 from unittest.mock import MagicMock
 
 import pandas as pd
+from fastapi.encoders import jsonable_encoder
 
+from src.app.observability.tracing import InMemorySpanCollector, Tracer
+from src.app.repositories.statement_schema_repository import StatementSchemaRepository
 from src.app.schemas import (
     ColumnMapping,
     FileUploadResponse,
@@ -12,15 +15,19 @@ from src.app.schemas import (
     Transaction,
     UploadFileSpec,
 )
+from src.app.services.file_processing import statement_upload_service
 from src.app.services.file_processing.file_type_detector import (
     FileType,
 )
+from src.app.services.file_processing.incremental_import import ImportPartition
+from src.app.services.file_processing.schema_fingerprint import statement_hash
 from src.app.services.file_processing.statement_upload_service import (
     StatementUploadService,
 )
 from src.app.services.file_processing.transactions_builder import (
     StatementTransaction,
 )
+from tests.conftest import create_test_db
 
 
 class TestStatementUploadService:
@@ -36,7 +43,6 @@ class TestStatementUploadService:
         }
         df = pd.DataFrame(data)
         file_content = df.to_csv(index=False).encode("utf-8")
-        file_name = "sample.csv"
         statement_id = str(uuid.uuid4())
 
         # Mock dependencies
@@ -51,11 +57,8 @@ class TestStatementUploadService:
 
         # Mock statement repository
         statement_repository = MagicMock()
-        statement_repository.get_by_id.return_value = {
-            "id": statement_id,
-            "content": file_content,
-            "file_name": file_name,
-        }
+        statement_repository.read_content.return_value = file_content
+        statement_repository.get_import_result.return_value = None
 
         # Mock column mapping
         column_mapping = ColumnMapping(
@@ -91,7 +94,6 @@ class TestStatementUploadService:
 
         # Mock transactions repository
         transactions_repository = MagicMock()
-        transactions_repository.find_duplicates.return_value = []
 
         # Create proper Transaction objects for the response
         created_transactions = [
@@ -120,13 +122,14 @@ class TestStatementUploadService:
                 normalized_description="groceries",
             ),
         ]
-        transactions_repository.create_many.return_value = created_transactions
+        transactions_repository.insert_new.return_value = created_transactions
 
         # Mock statement schema repository
         statement_schema_repository = MagicMock()
         statement_schema_repository.update.return_value = None
 
         # Create service under test
+        tracer = Tracer(collector=InMemorySpanCollector())
         service = StatementUploadService(
             parser_factory=parser_factory,
             transaction_cleaner=transaction_cleaner,
@@ -134,6 +137,7 @@ class TestStatementUploadService:
             statement_repository=statement_repository,
             transactions_repository=transactions_repository,
             statement_schema_repository=statement_schema_repository,
+            tracer=tracer,
         )
 
         # Create upload spec
@@ -163,12 +167,32 @@ class TestStatementUploadService:
         assert result.skipped_duplicates == 0
 
         # Verify interactions with dependencies
-        statement_repository.get_by_id.assert_called_once_with(statement_id)
+        statement_repository.read_content.assert_called_once_with(statement_id)
         parser_factory.create_parser.assert_called_once()
         statement_parser.parse.assert_called_once_with(file_content)
         transaction_cleaner.clean.assert_called_once()
         transactions_builder.build_transactions.assert_called_once_with(cleaned_df)
-        transactions_repository.create_many.assert_called_once()
+        transactions_repository.insert_new.assert_called_once()
+        created = transactions_repository.insert_new.call_args[0][0]
+        assert {t.statement_id for t in created} == {statement_id}
+        assert len({t.fingerprint for t in created}) == 2
+
+        statement_repository.save_import_result.assert_called_once()
+
+        spans = tracer.collector.summary()
+        assert set(spans) == {
+            "upload",
+            "upload.lookup_previous",
+            "upload.fetch_statement",
+            "upload.parse",
+            "upload.clean",
+            "upload.build",
+            "upload.dedupe",
+            "upload.insert",
+            "upload.schema_update",
+        }
+        assert spans["upload.parse"]["bytes"] == len(file_content)
+        assert spans["upload.insert"]["rows"] == 2
 
     def test_statement_upload_service_with_duplicate_transactions(self):
         # Arrange
@@ -182,7 +206,6 @@ class TestStatementUploadService:
         }
         df = pd.DataFrame(data)
         file_content = df.to_csv(index=False).encode("utf-8")
-        file_name = "sample.csv"
         statement_id = str(uuid.uuid4())
 
         # Mock dependencies
@@ -197,11 +220,8 @@ class TestStatementUploadService:
 
         # Mock statement repository
         statement_repository = MagicMock()
-        statement_repository.get_by_id.return_value = {
-            "id": statement_id,
-            "content": file_content,
-            "file_name": file_name,
-        }
+        statement_repository.read_content.return_value = file_content
+        statement_repository.get_import_result.return_value = None
 
         # Mock column mapping
         column_mapping = ColumnMapping(
@@ -235,11 +255,8 @@ class TestStatementUploadService:
         ]
         transactions_builder.build_transactions.return_value = transactions
 
-        # Mock transactions repository - simulate duplicate detection
+        # Mock transactions repository - the first transaction is already stored
         transactions_repository = MagicMock()
-        transactions_repository.find_duplicates.return_value = [
-            transactions[0]
-        ]  # First transaction is a duplicate
 
         # Create proper Transaction objects for the response
         created_transactions = [
@@ -256,7 +273,7 @@ class TestStatementUploadService:
                 normalized_description="groceries",
             )
         ]
-        transactions_repository.create_many.return_value = created_transactions
+        transactions_repository.insert_new.return_value = created_transactions
 
         # Mock statement schema repository
         statement_schema_repository = MagicMock()
@@ -299,5 +316,261 @@ class TestStatementUploadService:
         assert result.skipped_duplicates == 1  # One duplicate skipped
 
         # Verify interactions with dependencies
-        transactions_repository.find_duplicates.assert_called_once()
-        transactions_repository.create_many.assert_called_once()  # Only non-duplicate transactions created
+        transactions_repository.insert_new.assert_called_once()
+        transactions_repository.find_duplicates.assert_not_called()
+
+    def test_upload_of_an_imported_statement_replays_the_result(self):
+        # Arrange
+        statement_id = str(uuid.uuid4())
+        statement_schema = StatementSchemaDefinition(
+            id=str(uuid.uuid4()),
+            source_id=1,
+            file_type="CSV",
+            column_mapping=ColumnMapping(
+                date="Date", description="Description", amount="Amount"
+            ),
+        )
+        imported = [
+            Transaction(
+                id=1,
+                date=date(2023, 1, 1),
+                description="Salary",
+                amount=1000.00,
+                source_id=1,
+            )
+        ]
+
+        statement_repository = MagicMock()
+        statement_repository.get_import_result.return_value = {
+            "statement_schema": jsonable_encoder(statement_schema),
+            "transactions_processed": 1,
+            "skipped_duplicates": 3,
+        }
+        transactions_repository = MagicMock()
+        transactions_repository.get_by_statement_id.return_value = imported
+        parser_factory = MagicMock()
+
+        service = StatementUploadService(
+            parser_factory=parser_factory,
+            transaction_cleaner=MagicMock(),
+            transactions_builder=MagicMock(),
+            statement_repository=statement_repository,
+            transactions_repository=transactions_repository,
+            statement_schema_repository=MagicMock(),
+        )
+
+        # Act
+        result = service.upload_statement(
+            UploadFileSpec(statement_id=statement_id, statement_schema=statement_schema)
+        )
+
+        # Assert
+        assert result.already_imported
+        assert result.transactions_processed == 1
+        assert result.skipped_duplicates == 3
+        assert result.transactions == imported
+        transactions_repository.get_by_statement_id.assert_called_once_with(
+            statement_id
+        )
+        statement_repository.read_content.assert_not_called()
+        parser_factory.create_parser.assert_not_called()
+        transactions_repository.insert_new.assert_not_called()
+
+    def test_upload_skips_lookups_for_rows_already_imported(self):
+        # Arrange
+        statement_id = str(uuid.uuid4())
+        old, new = [
+            StatementTransaction(
+                date=date(2024, 1, day),
+                description=f"Purchase {day}",
+                amount=Decimal("-10"),
+                currency="EUR",
+            )
+            for day in (5, 30)
+        ]
+        transactions_builder = MagicMock()
+        transactions_builder.build_transactions.return_value = [old, new]
+        statement_repository = MagicMock()
+        statement_repository.read_content.return_value = b"content"
+        statement_repository.get_import_result.return_value = None
+        transactions_repository = MagicMock()
+        transactions_repository.insert_new.return_value = []
+        incremental_import = MagicMock()
+        incremental_import.partition.return_value = ImportPartition(
+            to_dedupe=[new], rejected=[old]
+        )
+
+        service = StatementUploadService(
+            parser_factory=MagicMock(),
+            transaction_cleaner=MagicMock(),
+            transactions_builder=transactions_builder,
+            statement_repository=statement_repository,
+            transactions_repository=transactions_repository,
+            statement_schema_repository=MagicMock(),
+            incremental_import=incremental_import,
+        )
+
+        # Act
+        result = service.upload_statement(
+            UploadFileSpec(
+                statement_id=statement_id,
+                statement_schema=StatementSchemaDefinition(
+                    id=str(uuid.uuid4()),
+                    source_id=3,
+                    file_type="CSV",
+                    column_mapping=ColumnMapping(
+                        date="Date", description="Description", amount="Amount"
+                    ),
+                ),
+            )
+        )
+
+        # Assert
+        assert result.transactions_processed == 0
+        assert result.skipped_duplicates == 2
+        transactions_repository.insert_new.assert_called_once_with([new])
+        incremental_import.record.assert_called_once_with(
+            incremental_import.partition.call_args[0][0], 3
+        )
+
+    def test_upload_reports_progress_after_each_insert_batch(self, monkeypatch):
+        # Arrange
+        monkeypatch.setattr(statement_upload_service, "INSERT_BATCH_SIZE", 2)
+        transactions = [
+            StatementTransaction(
+                date=date(2024, 1, day),
+                description=f"Purchase {day}",
+                amount=Decimal("-10"),
+                currency="EUR",
+            )
+            for day in range(1, 6)
+        ]
+        transactions_builder = MagicMock()
+        transactions_builder.build_transactions.return_value = transactions
+        statement_repository = MagicMock()
+        statement_repository.read_content.return_value = b"content"
+        statement_repository.get_import_result.return_value = None
+        transactions_repository = MagicMock()
+        # The second row of every batch is already stored
+        transactions_repository.insert_new.side_effect = lambda batch: [
+            Transaction(
+                id=index,
+                date=row.date,
+                description=row.description,
+                amount=row.amount,
+                currency=row.currency,
+                source_id=row.source_id,
+                categorization_status="pending",
+            )
+            for index, row in enumerate(batch[:1])
+        ]
+        progress = MagicMock()
+
+        service = StatementUploadService(
+            parser_factory=MagicMock(),
+            transaction_cleaner=MagicMock(),
+            transactions_builder=transactions_builder,
+            statement_repository=statement_repository,
+            transactions_repository=transactions_repository,
+            statement_schema_repository=MagicMock(),
+        )
+
+        # Act
+        result = service.upload_statement(
+            UploadFileSpec(
+                statement_id=str(uuid.uuid4()),
+                statement_schema=StatementSchemaDefinition(
+                    id=str(uuid.uuid4()),
+                    file_type="CSV",
+                    column_mapping=ColumnMapping(
+                        date="Date", description="Description", amount="Amount"
+                    ),
+                ),
+            ),
+            progress,
+        )
+
+        # Assert
+        assert result.transactions_processed == 3
+        assert result.skipped_duplicates == 2
+        assert [(c.args, c.kwargs) for c in progress.call_args_list] == [
+            (("parsing",), {}),
+            (("cleaning",), {}),
+            (("deduplicating",), {"rows_parsed": 5}),
+            (("inserting",), {"duplicates": 0}),
+            (("inserting",), {"rows_inserted": 1, "duplicates": 1}),
+            (("inserting",), {"rows_inserted": 2, "duplicates": 2}),
+            (("inserting",), {"rows_inserted": 3, "duplicates": 2}),
+        ]
+
+    def test_upload_saves_the_schema_under_the_hash_the_analysis_looks_up(self):
+        # Arrange
+        df = pd.DataFrame(
+            {"Amount (EUR)": [-5.0], "Date": ["2024-01-01"], "Description": ["Tea"]}
+        )
+        statement_parser = MagicMock()
+        statement_parser.parse.return_value = df
+        parser_factory = MagicMock()
+        parser_factory.create_parser.return_value = statement_parser
+        statement_repository = MagicMock()
+        statement_repository.read_content.return_value = b"content"
+        statement_repository.get_import_result.return_value = None
+        transactions_repository = MagicMock()
+        transactions_repository.insert_new.return_value = []
+        transactions_builder = MagicMock()
+        transactions_builder.build_transactions.return_value = []
+        statement_schema_repository = StatementSchemaRepository(create_test_db())
+        # The file was analyzed with the schema of a similar layout
+        similar = StatementSchemaDefinition(
+            id="similar-schema",
+            file_type="CSV",
+            column_mapping=ColumnMapping(
+                date="Date", description="Description", amount="Amount"
+            ),
+            column_names=["Date", "Description", "Amount"],
+        )
+        statement_schema_repository.save(
+            {
+                "id": similar.id,
+                "statement_hash": statement_hash(similar.column_names, FileType.CSV),
+                "schema_data": similar.model_dump(),
+            }
+        )
+
+        service = StatementUploadService(
+            parser_factory=parser_factory,
+            transaction_cleaner=MagicMock(),
+            transactions_builder=transactions_builder,
+            statement_repository=statement_repository,
+            transactions_repository=transactions_repository,
+            statement_schema_repository=statement_schema_repository,
+        )
+        corrected = similar.model_copy(
+            update={
+                "source_id": 2,
+                "column_mapping": ColumnMapping(
+                    date="Date", description="Description", amount="Amount (EUR)"
+                ),
+            }
+        )
+
+        # Act
+        for _ in range(2):
+            service.upload_statement(
+                UploadFileSpec(
+                    statement_id=str(uuid.uuid4()), statement_schema=corrected
+                )
+            )
+
+        # Assert
+        saved = statement_schema_repository.find_by_statement_hash(
+            statement_hash(["Date", "Description", "Amount (EUR)"], FileType.CSV)
+        )
+        schema = StatementSchemaDefinition.model_validate(saved.schema_data)
+        assert schema.id == saved.id != similar.id
+        assert schema.source_id == 2
+        assert schema.column_mapping.amount == "Amount (EUR)"
+        assert schema.column_names == ["Amount (EUR)", "Date", "Description"]
+        assert len(statement_schema_repository.list_schema_data()) == 2
+        untouched = statement_schema_repository.get_by_id(similar.id)
+        assert untouched.schema_data == similar.model_dump()
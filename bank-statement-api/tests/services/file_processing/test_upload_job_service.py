@@ -0,0 +1,194 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from src.app.models import Source
+from src.app.repositories.statement_repository import StatementRepository
+from src.app.repositories.upload_jobs_repository import UploadJobsRepository
+from src.app.schemas import (
+    ColumnMapping,
+    FileUploadResponse,
+    StatementSchemaDefinition,
+    UploadFileSpec,
+)
+from src.app.services.file_processing.upload_job_service import UploadJobService
+from src.app.storage.blob_store import BlobStore, DatabaseBlobBackend
+from tests.conftest import create_test_db
+
+
+def _setup(**kwargs):
+    session = create_test_db()
+    statement_id = StatementRepository(
+        session, BlobStore(DatabaseBlobBackend(session))
+    ).save(b"Date,Description,Amount\n", "statement.csv")
+    spec = UploadFileSpec(
+        statement_id=statement_id,
+        statement_schema=StatementSchemaDefinition(
+            id=str(uuid.uuid4()),
+            file_type="CSV",
+            column_mapping=ColumnMapping(
+                date="Date", description="Description", amount="Amount"
+            ),
+        ),
+    )
+    jobs_repository = UploadJobsRepository(session)
+    upload_service = MagicMock()
+    service = UploadJobService(jobs_repository, upload_service, **kwargs)
+    return spec, jobs_repository, upload_service, service
+
+
+def _upload(spec, progress):
+    progress("parsing")
+    progress("deduplicating", rows_parsed=12)
+    progress("inserting", rows_inserted=10, duplicates=2)
+    return FileUploadResponse(
+        message="File processed successfully",
+        transactions_processed=10,
+        transactions=[],
+        skipped_duplicates=2,
+    )
+
+
+def test_job_records_progress_and_result():
+    schedule_categorization = MagicMock(return_value="task-1")
+    spec, jobs_repository, upload_service, service = _setup(
+        schedule_categorization=schedule_categorization
+    )
+    stages = []
+
+    def upload_statement(spec, progress):
+        def record(stage, **counts):
+            progress(stage, **counts)
+            stages.append(jobs_repository.get_status(job_id))
+
+        return _upload(spec, record)
+
+    upload_service.upload_statement.side_effect = upload_statement
+
+    job_id = jobs_repository.create(spec.statement_id, spec.model_dump(), True)
+    service.run(job_id)
+
+    assert [(job["status"], job["stage"]) for job in stages] == [
+        ("running", "parsing"),
+        ("running", "deduplicating"),
+        ("running", "inserting"),
+    ]
+    assert stages[1]["rows_parsed"] == 12
+    job = jobs_repository.get_status(job_id)
+    assert job["status"] == "succeeded"
+    assert (job["rows_parsed"], job["rows_inserted"], job["duplicates"]) == (12, 10, 2)
+    assert job["result"]["categorizationTaskId"] == "task-1"
+    assert upload_service.upload_statement.call_args[0][0] == spec
+    schedule_categorization.assert_called_once_with(10)
+
+
+def test_failed_upload_marks_the_job_failed():
+    spec, jobs_repository, upload_service, service = _setup()
+    upload_service.upload_statement.side_effect = ValueError(
+        "Error uploading file: bad date"
+    )
+
+    job_id = service.submit(spec)
+
+    job = jobs_repository.get_status(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "Error uploading file: bad date"
+    assert job["result"] is None
+
+
+def test_failed_database_write_still_marks_the_job_failed():
+    spec, jobs_repository, upload_service, service = _setup()
+    session = jobs_repository.db
+
+    def upload_statement(spec, progress):
+        session.add_all([Source(name="bank"), Source(name="bank")])
+        session.commit()
+
+    upload_service.upload_statement.side_effect = upload_statement
+
+    job_id = service.submit(spec)
+
+    job = jobs_repository.get_status(job_id)
+    assert job["status"] == "failed"
+    assert "UNIQUE constraint failed" in job["error"]
+
+
+def test_submit_hands_the_job_to_enqueue_or_the_executor():
+    enqueue = MagicMock()
+    spec, jobs_repository, upload_service, service = _setup(enqueue=enqueue)
+
+    job_id = service.submit(spec, auto_categorize=False)
+
+    enqueue.assert_called_once_with(job_id)
+    assert jobs_repository.get_status(job_id)["status"] == "queued"
+    assert jobs_repository.get(job_id).auto_categorize is False
+    upload_service.upload_statement.assert_not_called()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        scope = MagicMock()
+        spec, jobs_repository, upload_service, service = _setup(
+            executor=executor, scope=scope
+        )
+        upload_service.upload_statement.side_effect = _upload
+        job_id = service.submit(spec)
+
+    assert jobs_repository.get_status(job_id)["status"] == "succeeded"
+    scope.assert_called_once_with()
+
+
+def test_jobs_cancelled_at_shutdown_are_marked_failed():
+    started, release = threading.Event(), threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1)
+    spec, jobs_repository, upload_service, service = _setup(executor=executor)
+
+    def upload_statement(spec, progress):
+        started.set()
+        release.wait(5)
+        return _upload(spec, progress)
+
+    upload_service.upload_statement.side_effect = upload_statement
+    running = service.submit(spec)
+    started.wait(5)
+    queued = service.submit(spec)
+    executor.shutdown(wait=False, cancel_futures=True)
+    release.set()
+    executor.shutdown()
+
+    assert jobs_repository.get_status(running)["status"] == "succeeded"
+    job = jobs_repository.get_status(queued)
+    assert job["status"] == "failed"
+    assert job["error"] == "Cancelled when the server stopped"
+
+
+def test_fail_stale_only_fails_idle_unfinished_thread_jobs():
+    spec, jobs_repository, _, service = _setup()
+    idle = datetime.now() - timedelta(days=1)
+    abandoned = jobs_repository.create(spec.statement_id, spec.model_dump())
+    jobs_repository.update(abandoned, status="running", updated_at=idle)
+    finished = jobs_repository.create(spec.statement_id, spec.model_dump())
+    jobs_repository.update(finished, status="succeeded", updated_at=idle)
+    active = jobs_repository.create(spec.statement_id, spec.model_dump())
+    in_broker = jobs_repository.create(
+        spec.statement_id, spec.model_dump(), backend="celery"
+    )
+    jobs_repository.update(in_broker, updated_at=idle)
+
+    assert service.fail_stale(idle_seconds=3600) == 1
+
+    assert jobs_repository.get_status(abandoned)["status"] == "failed"
+    assert jobs_repository.get_status(finished)["status"] == "succeeded"
+    assert jobs_repository.get_status(active)["status"] == "queued"
+    assert jobs_repository.get_status(in_broker)["status"] == "queued"
+
+
+def test_celery_jobs_are_never_failed_as_stale():
+    enqueue = MagicMock()
+    spec, jobs_repository, _, service = _setup(enqueue=enqueue)
+    job_id = service.submit(spec)
+    jobs_repository.update(job_id, updated_at=datetime.now() - timedelta(days=1))
+
+    assert jobs_repository.get(job_id).backend == "celery"
+    assert service.fail_stale(idle_seconds=3600) == 0
+    assert jobs_repository.get_status(job_id)["status"] == "queued"
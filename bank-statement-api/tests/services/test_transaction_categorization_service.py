@@ -0,0 +1,147 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.app.ai.llm_client import LLMRateLimitError
+from src.app.services.categorizers.transaction_categorizer import (
+    CategorizationResult,
+    TransactionCategorizer,
+)
+from src.app.services.transaction_categorization_service import (
+    RateLimitBackoff,
+    TransactionCategorizationService,
+)
+
+
+class FakeTransactionsRepository:
+    def __init__(self, count):
+        self.statuses = {id: "pending" for id in range(1, count + 1)}
+        self.unresolved = []
+
+    def get_uncategorized_transactions(self, batch_size, exclude_ids=()):
+        pending = [
+            id
+            for id, status in self.statuses.items()
+            if status == "pending" and id not in exclude_ids
+        ]
+        return [
+            SimpleNamespace(
+                id=id, description=f"t{id}", normalized_description=f"t{id}"
+            )
+            for id in pending[:batch_size]
+        ]
+
+    def update_transaction_category(
+        self, transaction_id, category_id, sub_category_id, status
+    ):
+        self.statuses[transaction_id] = status
+
+    def record_unresolved(self, transaction_ids):
+        self.unresolved.extend(transaction_ids)
+
+
+def create_service(transactions_repository, categorize, backoff=None):
+    categorizer = AsyncMock(spec=TransactionCategorizer)
+    categorizer.categorize_transaction.side_effect = categorize
+    categories_repository = MagicMock()
+    categories_repository.get_parent_category_id.return_value = 1
+    return TransactionCategorizationService(
+        categories_repository, transactions_repository, categorizer, backoff
+    )
+
+
+def categorize_all(transactions):
+    return [
+        CategorizationResult(
+            transaction_id=t.transaction_id, sub_category_id=2, confidence=1.0
+        )
+        for t in transactions
+    ]
+
+
+@pytest.mark.asyncio
+async def test_drain_categorizes_until_backlog_is_empty():
+    repository = FakeTransactionsRepository(25)
+    service = create_service(repository, categorize_all)
+
+    result = await service.drain(batch_size=10)
+
+    assert result.categorized == 25
+    assert not result.rate_limited
+    assert set(repository.statuses.values()) == {"categorized"}
+
+
+@pytest.mark.asyncio
+async def test_rows_without_a_result_are_retried_by_a_later_drain():
+    repository = FakeTransactionsRepository(4)
+
+    def categorize_even(transactions):
+        return categorize_all([t for t in transactions if t.transaction_id % 2 == 0])
+
+    service = create_service(repository, categorize_even)
+
+    result = await service.drain(batch_size=3)
+
+    assert (result.categorized, result.unresolved) == (2, 2)
+    assert repository.unresolved == [1, 3]
+    assert repository.statuses == {
+        1: "pending",
+        2: "categorized",
+        3: "pending",
+        4: "categorized",
+    }
+
+    service = create_service(repository, categorize_all)
+
+    result = await service.drain(batch_size=3)
+
+    assert result.categorized == 2
+    assert set(repository.statuses.values()) == {"categorized"}
+
+
+@pytest.mark.asyncio
+async def test_drain_backs_off_while_rate_limited():
+    repository = FakeTransactionsRepository(3)
+    responses = [LLMRateLimitError("slow down", retry_after=7), None]
+
+    def categorize(transactions):
+        response = responses.pop(0)
+        if response:
+            raise response
+        return categorize_all(transactions)
+
+    service = create_service(repository, categorize)
+
+    with patch("asyncio.sleep", new=AsyncMock()) as sleep:
+        result = await service.drain(batch_size=10)
+
+    sleep.assert_awaited_once_with(7)
+    assert result.categorized == 3
+
+
+@pytest.mark.asyncio
+async def test_drain_stops_when_rate_limit_retries_are_exhausted():
+    repository = FakeTransactionsRepository(3)
+
+    def categorize(transactions):
+        raise LLMRateLimitError("slow down")
+
+    service = create_service(
+        repository, categorize, RateLimitBackoff(initial_seconds=1, max_retries=2)
+    )
+
+    with patch("asyncio.sleep", new=AsyncMock()) as sleep:
+        result = await service.drain(batch_size=10)
+
+    assert [call.args[0] for call in sleep.await_args_list] == [1, 2]
+    assert result.rate_limited
+    assert set(repository.statuses.values()) == {"pending"}
+
+
+def test_backoff_doubles_up_to_the_maximum():
+    backoff = RateLimitBackoff(initial_seconds=10, max_seconds=30, max_retries=4)
+
+    delays = [backoff.next_delay() for _ in range(5)]
+
+    assert delays == [10, 20, 30, 30, None]
@@ -0,0 +1,106 @@
+import csv
+import io
+import json
+import sys
+from datetime import date
+
+import pytest
+
+from src.app.models import Category, Source
+from src.app.repositories.transactions_repository import (
+    EXPORT_COLUMNS,
+    TransactionsFilter,
+    TransactionsRepository,
+)
+from src.app.schemas import TransactionCreate
+from src.app.services.transactions_export import (
+    ExportFormatUnavailable,
+    TransactionsExporter,
+)
+from tests.conftest import create_test_db
+
+
+def create_exporter(count=5, batch_size=2):
+    session = create_test_db()
+    session.add(Source(id=1, name="bank"))
+    session.add(Category(id=1, category_name="Food"))
+    session.add(Category(id=2, category_name="Groceries", parent_category_id=1))
+    session.commit()
+    repository = TransactionsRepository(session)
+    repository.create_many(
+        [
+            TransactionCreate(
+                date=date(2024, 1, day),
+                description=f"Shop {day}",
+                amount=-day,
+                source_id=1,
+                category_id=1,
+                sub_category_id=2,
+                categorization_status="categorized",
+            )
+            for day in range(1, count + 1)
+        ]
+    )
+    return TransactionsExporter(repository, batch_size=batch_size)
+
+
+def test_csv_export_streams_in_batches():
+    exporter = create_exporter(count=5, batch_size=2)
+
+    chunks = list(exporter.export(TransactionsFilter(), "csv"))
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+
+    assert len(chunks) == 3
+    assert rows[0] == EXPORT_COLUMNS
+    assert rows[1] == [
+        "1",
+        "2024-01-01",
+        "Shop 1",
+        "-1.00",
+        "EUR",
+        "bank",
+        "Food",
+        "Groceries",
+        "categorized",
+    ]
+    assert len(rows) == 6
+
+
+def test_csv_export_of_no_rows_has_a_header():
+    exporter = create_exporter(count=0)
+
+    content = b"".join(exporter.export(TransactionsFilter(), "csv")).decode()
+
+    assert content.strip() == ",".join(EXPORT_COLUMNS)
+
+
+def test_ndjson_export_applies_the_filter():
+    exporter = create_exporter(count=5)
+
+    content = b"".join(
+        exporter.export(TransactionsFilter(start_date=date(2024, 1, 4)), "ndjson")
+    )
+    rows = [json.loads(line) for line in content.decode().splitlines()]
+
+    assert [row["date"] for row in rows] == ["2024-01-04", "2024-01-05"]
+    assert rows[0]["amount"] == -4.0
+    assert rows[0]["sub_category"] == "Groceries"
+
+
+def test_parquet_export():
+    pq = pytest.importorskip("pyarrow.parquet")
+    exporter = create_exporter(count=5, batch_size=2)
+
+    content = b"".join(exporter.export(TransactionsFilter(), "parquet"))
+    table = pq.read_table(io.BytesIO(content))
+
+    assert table.num_rows == 5
+    assert table.column_names == EXPORT_COLUMNS
+
+
+def test_parquet_export_without_pyarrow(monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    exporter = create_exporter(count=1)
+
+    with pytest.raises(ExportFormatUnavailable):
+        exporter.export(TransactionsFilter(), "parquet")
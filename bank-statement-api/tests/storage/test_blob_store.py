@@ -0,0 +1,88 @@
+import random
+import threading
+
+import pytest
+
+from src.app.storage.blob_store import (
+    BlobNotFound,
+    BlobStore,
+    DatabaseBlobBackend,
+    FilesystemBlobBackend,
+    create_blob_store,
+)
+from tests.conftest import create_test_db
+
+
+@pytest.fixture(params=["database", "filesystem"])
+def store(request, tmp_path):
+    if request.param == "database":
+        return BlobStore(DatabaseBlobBackend(create_test_db()))
+    return BlobStore(FilesystemBlobBackend(str(tmp_path)))
+
+
+def test_round_trip_and_deduplication(store):
+    content = "Data;Descrição;Montante\n".encode() * 1000
+
+    first = store.put(content)
+    second = store.put(content)
+
+    assert first.sha256 == BlobStore.hash(content)
+    assert not first.already_stored
+    assert second.already_stored
+    assert store.get(first.sha256) == content
+
+
+def test_iter_content_streams_in_chunks(store):
+    # Random bytes barely compress, so the blob spans many chunks
+    content = random.Random(0).randbytes(50_000)
+    key = store.put(content).sha256
+
+    chunks = list(store.iter_content(key, chunk_size=4096))
+
+    assert len(chunks) > 1
+    assert b"".join(chunks) == content
+
+
+def test_missing_blob(store):
+    with pytest.raises(BlobNotFound):
+        store.get(BlobStore.hash(b"never stored"))
+    with pytest.raises(BlobNotFound):
+        list(store.iter_content(BlobStore.hash(b"never stored"), 64))
+
+
+def test_database_backend_ignores_concurrent_duplicate():
+    backend = DatabaseBlobBackend(create_test_db())
+
+    backend.put("ab" * 32, b"one", 3)
+    backend.put("ab" * 32, b"two", 3)
+
+    assert backend.get("ab" * 32) == b"one"
+
+
+def test_create_blob_store_from_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("STATEMENT_STORE", "filesystem")
+    monkeypatch.setenv("STATEMENT_STORE_PATH", str(tmp_path))
+
+    store = create_blob_store(db=None)
+    key = store.put(b"content").sha256
+
+    assert isinstance(store.backend, FilesystemBlobBackend)
+    assert (tmp_path / key[:2] / key[2:4] / f"{key}.zst").exists()
+
+
+def test_filesystem_lock_waits_for_the_holder(tmp_path):
+    backend = FilesystemBlobBackend(str(tmp_path))
+    key = BlobStore.hash(b"content")
+    acquired = threading.Event()
+
+    def take_lock():
+        with backend.lock(key):
+            acquired.set()
+
+    with backend.lock(key):
+        thread = threading.Thread(target=take_lock)
+        thread.start()
+        assert not acquired.wait(0.2)
+    thread.join()
+
+    assert acquired.is_set()
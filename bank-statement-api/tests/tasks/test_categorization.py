@@ -0,0 +1,145 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.app.db import Base
+from src.app.models import Category
+from src.app.services.transaction_categorization_service import DrainResult
+from src.app.tasks.categorization import (
+    RATE_LIMITED_COUNTDOWN_SECONDS,
+    CategorizationWorker,
+    DrainLock,
+    drain_pending_transactions,
+)
+
+
+def create_scoped_session():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+
+
+def create_worker(session):
+    worker = CategorizationWorker(session=session, categorizer=MagicMock())
+    worker.service = MagicMock()
+    worker.service.drain = AsyncMock(return_value=DrainResult(categorized=3))
+    return worker
+
+
+def test_worker_refreshes_rules_only_when_categories_change():
+    session = create_scoped_session()
+    session.add(Category(category_name="Food"))
+    session.commit()
+    session.remove()
+    worker = create_worker(session)
+
+    assert worker.run(10).categorized == 3
+    assert worker.run(10).categorized == 3
+    assert worker.categorizer.refresh_rules.call_count == 1
+
+    session.add(Category(category_name="Travel"))
+    session.commit()
+    session.remove()
+
+    worker.run(10)
+    assert worker.categorizer.refresh_rules.call_count == 2
+
+
+def test_worker_uses_a_fresh_session_per_run():
+    session = create_scoped_session()
+    worker = create_worker(session)
+    sessions = []
+
+    async def record_session(batch_size, max_seconds):
+        sessions.append(session())
+        return DrainResult()
+
+    worker.service.drain = record_session
+
+    worker.run(10)
+    worker.run(10)
+
+    assert sessions[0] is not sessions[1]
+    assert session() not in sessions
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value.encode()
+        return True
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+def test_drain_lock_allows_a_single_holder():
+    redis = FakeRedis()
+    first, second = DrainLock(redis), DrainLock(redis)
+
+    assert first.acquire()
+    assert not second.acquire()
+
+    second.release()
+    assert not second.acquire()
+
+    first.release()
+    assert second.acquire()
+
+
+def run_drain(worker, lock):
+    with patch("src.app.tasks.categorization.get_worker", return_value=worker), patch(
+        "src.app.tasks.categorization.categorize_pending_transactions"
+    ) as task:
+        categorized = drain_pending_transactions(10, lock)
+    return categorized, task
+
+
+def test_drain_skips_while_another_task_holds_the_lock():
+    redis = FakeRedis()
+    DrainLock(redis).acquire()
+    worker = MagicMock()
+
+    categorized, task = run_drain(worker, DrainLock(redis))
+
+    assert categorized == 0
+    worker.run.assert_not_called()
+    task.apply_async.assert_not_called()
+
+
+def test_drain_hands_leftover_backlog_to_a_follow_up_task():
+    worker = MagicMock()
+    worker.run.return_value = DrainResult(categorized=5, rate_limited=True)
+    worker.has_pending.return_value = True
+    lock = DrainLock(FakeRedis())
+
+    categorized, task = run_drain(worker, lock)
+
+    assert categorized == 5
+    task.apply_async.assert_called_once_with(
+        (10,), countdown=RATE_LIMITED_COUNTDOWN_SECONDS
+    )
+    assert lock.acquire()
+
+
+def test_drain_stops_once_backlog_is_empty():
+    worker = MagicMock()
+    worker.run.return_value = DrainResult(categorized=5)
+    worker.has_pending.return_value = False
+
+    _, task = run_drain(worker, DrainLock(FakeRedis()))
+
+    task.apply_async.assert_not_called()
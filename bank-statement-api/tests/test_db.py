@@ -0,0 +1,31 @@
+from sqlalchemy.pool import NullPool
+
+from src.app.db import engine_options
+from src.app.observability.metrics import InstrumentedQueuePool
+
+
+def test_engine_options_leave_sqlite_pooling_alone():
+    assert engine_options("sqlite:///statements.db") == {}
+
+
+def test_engine_options_read_pool_settings_from_environment(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "8")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "2")
+    monkeypatch.setenv("DB_POOL_RECYCLE", "600")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+
+    options = engine_options("postgresql://localhost/bankstatements")
+
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 8
+    assert options["max_overflow"] == 2
+    assert options["pool_recycle"] == 600
+    assert options["pool_pre_ping"] is False
+
+
+def test_engine_options_hand_pooling_to_pgbouncer(monkeypatch):
+    monkeypatch.setenv("DB_PGBOUNCER", "true")
+
+    options = engine_options("postgresql://localhost/bankstatements")
+
+    assert options == {"poolclass": NullPool}
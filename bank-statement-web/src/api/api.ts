@@ -1,6 +1,8 @@
 import axios from 'axios';
 import {
   Transaction,
+  TransactionAggregate,
+  TransactionAggregateGroupBy,
   Category,
   Source,
   StatementUploadResponse,
@@ -42,6 +44,24 @@ export const transactionsApi = {
     return response.data;
   },
 
+  aggregate: async (params: {
+    groupBy: TransactionAggregateGroupBy[];
+    startDate?: string;
+    endDate?: string;
+    categoryId?: number;
+    sourceId?: number;
+  }): Promise<TransactionAggregate[]> => {
+    const { groupBy, ...filters } = params;
+    // FastAPI expects repeated keys (group_by=a&group_by=b), not axios' group_by[]=a
+    const query = new URLSearchParams();
+    groupBy.forEach((key) => query.append('group_by', key));
+    Object.entries(toSnakeCase(filters)).forEach(([key, value]) => {
+      if (value !== undefined) query.append(key, String(value));
+    });
+    const response = await api.get(`/transactions/aggregate?${query}`);
+    return response.data;
+  },
+
   getById: async (id: number): Promise<Transaction> => {
     const response = await api.get(`/transactions/${id}`);
     return response.data;
@@ -8,6 +8,7 @@ import { useApiContext } from '../api/ApiContext';
 import type {
   StatementUploadResponse,
   Transaction,
+  TransactionAggregateGroupBy,
   StatementSchemaDefinition,
   StatementAnalysisResponse as StatementAnalysisResponse,
 } from '../types';
@@ -28,6 +29,20 @@ export const useTransactions = (params?: {
   });
 };
 
+export const useTransactionAggregates = (params: {
+  groupBy: TransactionAggregateGroupBy[];
+  startDate?: string;
+  endDate?: string;
+  categoryId?: number;
+  sourceId?: number;
+}) => {
+  const { transactionsApi } = useApiContext();
+  return useQuery({
+    queryKey: ['transactionAggregates', params],
+    queryFn: () => transactionsApi.aggregate(params),
+  });
+};
+
 export const useTransaction = (id: number) => {
   const { transactionsApi } = useApiContext();
   return useQuery({
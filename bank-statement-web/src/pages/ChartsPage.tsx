@@ -9,7 +9,7 @@ import {
   PieChart, Pie, Cell, BarChart, Bar, XAxis, YAxis, CartesianGrid,
   Tooltip, Legend, ResponsiveContainer
 } from 'recharts';
-import { useTransactions, useCategories, useSources } from '../hooks/useQueries';
+import { useTransactionAggregates, useCategories, useSources } from '../hooks/useQueries';
 
 // Colors for the charts
 const COLORS = ['#0088FE', '#00C49F', '#FFBB28', '#FF8042', '#8884D8', '#82CA9D', '#FFC658', '#8DD1E1'];
@@ -30,86 +30,65 @@ const ChartsPage: React.FC = () => {
   // State for maximized chart
   const [maximizedChart, setMaximizedChart] = useState<ChartType>(ChartType.NONE);
 
-  // Fetch data
-  const { data: transactions, isLoading: isLoadingTransactions } = useTransactions({
+  // Fetch data, aggregated on the server
+  const filters = {
     startDate: startDate || undefined,
     endDate: endDate || undefined,
     categoryId: categoryId,
     sourceId: sourceId
+  };
+  const { data: categoryTotals, isLoading: isLoadingCategoryTotals } = useTransactionAggregates({
+    groupBy: ['category'],
+    ...filters
+  });
+  const { data: monthlyTotals, isLoading: isLoadingMonthlyTotals } = useTransactionAggregates({
+    groupBy: ['month'],
+    ...filters
   });
   const { data: categories, isLoading: isLoadingCategories } = useCategories();
   const { data: sources, isLoading: isLoadingSources } = useSources();
 
-  // Prepare data for pie chart (by category)
+  // Prepare data for pie chart (expenses by category)
   const prepareCategoryData = () => {
-    if (!transactions || !categories) return [];
-
-    const categoryMap = new Map<number, { name: string; value: number }>();
+    if (!categoryTotals || !categories) return [];
 
-    // Initialize with all categories
-    categories.forEach(category => {
-      categoryMap.set(category.id, { name: category.categoryName, value: 0 });
-    });
-
-    // Sum transaction amounts by category
-    transactions.forEach(transaction => {
-      if (transaction.categoryId && transaction.amount < 0) { // Only count expenses (negative amounts)
-        const categoryData = categoryMap.get(transaction.categoryId);
-        if (categoryData) {
-          categoryMap.set(
-            transaction.categoryId,
-            { ...categoryData, value: categoryData.value + Math.abs(transaction.amount) }
-          );
-        }
-      }
-    });
+    const categoryNames = new Map<number, string>(
+      categories.map(category => [category.id, category.categoryName])
+    );
 
-    // Convert to array and filter out categories with zero value
-    return Array.from(categoryMap.values())
-      .filter(item => item.value > 0)
+    return categoryTotals
+      .filter(row => row.categoryId && categoryNames.has(row.categoryId) && row.outflow > 0)
+      .map(row => ({ name: categoryNames.get(row.categoryId!)!, value: row.outflow }))
       .sort((a, b) => b.value - a.value);
   };
 
-  // Prepare data for bar chart (monthly expenses)
+  // Prepare data for bar chart (monthly income and expenses), already sorted by month
   const prepareMonthlyData = () => {
-    if (!transactions) return [];
+    if (!monthlyTotals) return [];
 
-    const monthlyMap = new Map<string, { name: string; expenses: number; income: number }>();
-
-    // Process transactions
-    transactions.forEach(transaction => {
-      const date = new Date(transaction.date);
-      const monthYear = `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}`;
-      const monthName = date.toLocaleString('default', { month: 'short', year: 'numeric' });
-
-      if (!monthlyMap.has(monthYear)) {
-        monthlyMap.set(monthYear, { name: monthName, expenses: 0, income: 0 });
-      }
-
-      const monthData = monthlyMap.get(monthYear)!;
-      if (transaction.amount < 0) {
-        monthlyMap.set(
-          monthYear,
-          { ...monthData, expenses: monthData.expenses + Math.abs(transaction.amount) }
-        );
-      } else {
-        monthlyMap.set(
-          monthYear,
-          { ...monthData, income: monthData.income + transaction.amount }
-        );
-      }
+    return monthlyTotals.map(row => {
+      const [year, month] = row.month!.split('-').map(Number);
+      const monthName = new Date(year, month - 1, 1)
+        .toLocaleString('default', { month: 'short', year: 'numeric' });
+      return { name: monthName, expenses: row.outflow, income: row.inflow };
     });
-
-    // Convert to array and sort by date
-    return Array.from(monthlyMap.values())
-      .sort((a, b) => a.name.localeCompare(b.name));
   };
 
+  const summary = monthlyTotals?.reduce(
+    (totals, row) => ({
+      income: totals.income + row.inflow,
+      expenses: totals.expenses + row.outflow,
+      balance: totals.balance + row.total,
+      count: totals.count + row.count
+    }),
+    { income: 0, expenses: 0, balance: 0, count: 0 }
+  );
+
   const categoryData = prepareCategoryData();
   const monthlyData = prepareMonthlyData();
 
   const handleFilterChange = () => {
-    // The filters are automatically applied through the useTransactions hook
+    // The filters are automatically applied through the useTransactionAggregates hook
   };
 
   const handleClearFilters = () => {
@@ -232,7 +211,7 @@ const ChartsPage: React.FC = () => {
                     {maximizedChart === ChartType.CATEGORY ? 'Minimize' : 'Maximize'}
                   </Button>
                 </div>
-                {isLoadingTransactions || isLoadingCategories ? (
+                {isLoadingCategoryTotals || isLoadingCategories ? (
                   <div className="text-center p-5">Loading...</div>
                 ) : categoryData.length > 0 ? (
                   <ResponsiveContainer width="100%" height={getChartHeight(ChartType.CATEGORY)}>
@@ -280,7 +259,7 @@ const ChartsPage: React.FC = () => {
                     {maximizedChart === ChartType.MONTHLY ? 'Minimize' : 'Maximize'}
                   </Button>
                 </div>
-                {isLoadingTransactions ? (
+                {isLoadingMonthlyTotals ? (
                   <div className="text-center p-5">Loading...</div>
                 ) : monthlyData.length > 0 ? (
                   <ResponsiveContainer width="100%" height={getChartHeight(ChartType.MONTHLY)}>
@@ -318,18 +297,15 @@ const ChartsPage: React.FC = () => {
             <Card className="mb-4">
               <Card.Body>
                 <h5>Summary Statistics</h5>
-                {isLoadingTransactions ? (
+                {isLoadingMonthlyTotals ? (
                   <div className="text-center p-3">Loading...</div>
-                ) : transactions ? (
+                ) : summary ? (
                   <Row>
                     <Col md={3}>
                       <div className="text-center">
                         <h6>Total Income</h6>
                         <h4 className="text-success">
-                          €{transactions
-                            .filter(t => t.amount > 0)
-                            .reduce((sum, t) => sum + t.amount, 0)
-                            .toFixed(2)}
+                          €{summary.income.toFixed(2)}
                         </h4>
                       </div>
                     </Col>
@@ -337,27 +313,22 @@ const ChartsPage: React.FC = () => {
                       <div className="text-center">
                         <h6>Total Expenses</h6>
                         <h4 className="text-danger">
-                          €{Math.abs(transactions
-                            .filter(t => t.amount < 0)
-                            .reduce((sum, t) => sum + t.amount, 0))
-                            .toFixed(2)}
+                          €{summary.expenses.toFixed(2)}
                         </h4>
                       </div>
                     </Col>
                     <Col md={3}>
                       <div className="text-center">
                         <h6>Balance</h6>
-                        <h4 className={transactions.reduce((sum, t) => sum + t.amount, 0) >= 0 ? 'text-success' : 'text-danger'}>
-                          €{transactions
-                            .reduce((sum, t) => sum + t.amount, 0)
-                            .toFixed(2)}
+                        <h4 className={summary.balance >= 0 ? 'text-success' : 'text-danger'}>
+                          €{summary.balance.toFixed(2)}
                         </h4>
                       </div>
                     </Col>
                     <Col md={3}>
                       <div className="text-center">
                         <h6>Transaction Count</h6>
-                        <h4>{transactions.length}</h4>
+                        <h4>{summary.count}</h4>
                       </div>
                     </Col>
                   </Row>
@@ -9,6 +9,20 @@ export interface Transaction {
   categorizationStatus?: string;
 }
 
+export type TransactionAggregateGroupBy = 'month' | 'category' | 'sub_category' | 'source';
+
+// Only the requested groupBy keys are present
+export interface TransactionAggregate {
+  month?: string;
+  categoryId?: number | null;
+  subCategoryId?: number | null;
+  sourceId?: number;
+  count: number;
+  total: number;
+  inflow: number;
+  outflow: number;
+}
+
 export interface Category {
   id: number;
   categoryName: string;
@@ -25,6 +39,7 @@ export interface StatementUploadResponse {
   message: string;
   transactionsProcessed: number;
   skippedDuplicates: number;
+  alreadyImported?: boolean;
 }
 
 export interface ColumnMapping {
@@ -44,6 +59,7 @@ export interface StatementSchemaDefinition {
   columnMapping: ColumnMapping;
   startRow: number;
   headerRow: number;
+  columnNames?: string[];
 }
 
 export interface StatementAnalysisResponse {